@@ -1,12 +1,27 @@
 """
 api/server.py
 FastAPI service for LEO Core — exposes endpoints to run audits and retrieve results.
+
+Audits run as background jobs (`leo.jobs`): `POST /audits` returns a job id
+at once and `GET /audits/{id}` reports status and result. Request handlers
+never run the pipeline themselves, and concurrent audits of one URL share a job.
+
+Progress streams as each agent completes, over Server-Sent Events
+(`GET /audit/stream`, `GET /audits/{id}/events`) or a WebSocket (`/ws/audit`):
+`stage` events carry the metrics computed so far, then `done` carries the
+LeoRank and suggestions.
 """
 
-from fastapi import FastAPI, Query
-from leo.graph import run_pipeline
+import asyncio
+import json
+
+from fastapi import FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from leo import telemetry
+from leo import db
 from leo.db import get_recent_scores
-from leo.state import LeoState
+from leo.jobs import AuditJob, audit_summary, get_job_manager, watch
 
 app = FastAPI(
     title="LEO Core API",
@@ -21,20 +36,103 @@ def health_check():
     return {"status": "ok", "version": "0.2.0"}
 
 
+class AuditRequest(BaseModel):
+    url: str
+
+
+@app.post("/audits", status_code=202)
+def create_audit(request: AuditRequest):
+    """Queue an audit and return its job id; joins the in-flight job if the URL is already being audited."""
+    return get_job_manager().submit(request.url).to_dict()
+
+
+def _get_job(job_id: str) -> AuditJob:
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown audit job")
+    return job
+
+
+@app.get("/audits/{job_id}")
+def get_audit(job_id: str):
+    """Status of an audit job, with the result once it is done."""
+    return _get_job(job_id).to_dict()
+
+
+def _event_stream(job: AuditJob) -> StreamingResponse:
+    async def body():
+        yield f"event: job\ndata: {json.dumps({'id': job.id, 'url': job.url})}\n\n"
+        async for event in watch(job):
+            yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/audits/{job_id}/events")
+def audit_events(job_id: str):
+    """Server-Sent Events for an existing job (past events are replayed first)."""
+    return _event_stream(_get_job(job_id))
+
+
+@app.get("/audit/stream")
+def audit_stream(url: str = Query(..., description="Target website URL to audit")):
+    """Start (or join) an audit and stream its progress as Server-Sent Events."""
+    return _event_stream(get_job_manager().submit(url))
+
+
+@app.websocket("/ws/audit")
+async def audit_websocket(websocket: WebSocket):
+    """Send `{"url": ...}`; receive one JSON message per event until `done`/`failed`. Repeatable."""
+    await websocket.accept()
+    try:
+        while True:
+            request = await websocket.receive_json()
+            if not isinstance(request, dict) or not request.get("url"):
+                await websocket.send_json({"event": "failed", "error": "Expected {\"url\": ...}"})
+                continue
+            job = get_job_manager().submit(request["url"])
+            await websocket.send_json({"event": "job", "id": job.id, "url": job.url})
+            async for event in watch(job):
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+
+
 @app.get("/audit")
-def audit_url(url: str = Query(..., description="Target website URL to audit")):
-    """Run full LEO audit pipeline for a given URL."""
+async def audit_url(
+    url: str = Query(..., description="Target website URL to audit"),
+    metrics: str = Query(None, description="Comma-separated outputs, e.g. structure,retrieval (default: all + leo_rank)"),
+    suggestions: bool = Query(True, description="Run the AdvisorAgent (an LLM call when configured)"),
+    persist: bool = Query(True, description="Record the score in the database"),
+):
+    """
+    Audit a URL and wait for the result; recent results are served from the result cache.
+    With `metrics` / `suggestions=false` only the agents needed for those outputs run.
+    """
+    from starlette.concurrency import run_in_threadpool
+
+    from leo.graph import resolve_outputs, run_pipeline
+
     try:
-        result: LeoState = run_pipeline(url)
-        return {
-            "url": result.url,
-            "metrics": result.metrics,
-            "leo_rank": result.leo_rank,
-            "suggestions": result.suggestions,
-            "timestamp": result.timestamp,
-        }
-    except Exception as e:
-        return {"error": str(e)}
+        outputs = resolve_outputs(metrics.split(",") if metrics else None, suggestions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    manager = get_job_manager()
+    cached = manager.lookup(url)
+    if cached is not None:
+        # A cached full audit answers any narrower request.
+        return audit_summary(cached, outputs)
+    if outputs is not None or not persist:
+        # Partial or unrecorded audits bypass the job queue and the result cache.
+        result = await run_in_threadpool(run_pipeline, url, lean=True, outputs=outputs, persist=persist)
+        if result.error:
+            return {"error": result.error}
+        return audit_summary(result, outputs)
+    job = manager.submit(url)
+    result = await asyncio.wrap_future(job.future)
+    if result.error:
+        return {"error": result.error}
+    return audit_summary(result)
 
 
 @app.get("/metrics")
@@ -47,6 +145,70 @@ def get_metrics(limit: int = 10):
         return {"error": str(e)}
 
 
+@app.get("/scores/history")
+def score_history(
+    url: str,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str = None,
+    since: str = Query(None, description="ISO timestamp, inclusive"),
+    until: str = Query(None, description="ISO timestamp, exclusive"),
+):
+    """One URL's scores, newest first; follow `next_cursor` for older pages."""
+    try:
+        rows, next_cursor = db.get_score_history(url, limit=limit, cursor=cursor, since=since, until=until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"results": rows, "next_cursor": next_cursor}
+
+
+@app.get("/scores/leaderboard")
+def score_leaderboard(limit: int = Query(100, ge=1, le=1000), cursor: str = None):
+    """URLs ordered by their latest LeoRank, highest first."""
+    try:
+        rows, next_cursor = db.get_leaderboard(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"results": rows, "next_cursor": next_cursor}
+
+
+@app.get("/scores/aggregate")
+def score_aggregate(since: str = None, until: str = None, url: str = None, daily: bool = False):
+    """Count, mean, min, max, p50 and p90 of ranks in a time window (plus per-day rows with `daily`)."""
+    result = db.get_rank_aggregates(since=since, until=until, url=url)
+    if daily:
+        result["days"] = db.get_daily_aggregates(url=url, since=since, until=until)
+    return result
+
+
+@app.get("/export")
+def export(
+    format: str = Query("ndjson", description="ndjson or csv"),
+    gzip: bool = False,
+    since: str = None,
+    until: str = None,
+    url: str = None,
+):
+    """Stream the full score history (optionally filtered) as NDJSON or CSV, in constant memory."""
+    from leo.export import FORMATS, export_scores
+
+    try:
+        body = export_scores(format, compress=gzip, since=since, until=until, url=url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filename = f"leo-scores.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        body,
+        media_type="application/gzip" if gzip else FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.get("/internal/stats", response_class=PlainTextResponse)
+def internal_stats():
+    """Instrumentation in Prometheus text format: stage latencies, bytes fetched, caches, DB calls."""
+    return PlainTextResponse(telemetry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("api.server:app", host="0.0.0.0", port=8000)
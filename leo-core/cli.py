@@ -2,37 +2,138 @@
 cli.py
 Command-line interface for LEO Core — powered by Typer.
 Supports running audits, listing recent scores, and serving the FastAPI API or MCP server.
+
+Each command imports only what it needs, so short invocations such as
+`leo recent` or `leo --help` never load the agents, uvicorn or the MCP server.
+Check with `make importtime`.
 """
 
+import json
+
 import typer
-import uvicorn
-from leo.graph import run_pipeline
-from leo.db import get_recent_scores
-from leo.mcp.server import start_mcp_server
 
 app = typer.Typer(help="LEO Core — AI Visibility Scoring CLI")
 
 
+@app.callback()
+def main(log_level: str = typer.Option(None, help="Pipeline log level (DEBUG, INFO, WARNING, ERROR)")):
+    """LEO Core — AI Visibility Scoring CLI"""
+    if log_level:
+        from leo.utils.log_utils import set_level
+
+        set_level(log_level)
+
+
 @app.command()
-def audit(url: str):
-    """Run full LEO audit pipeline for a given URL."""
+def audit(
+    url: str,
+    metrics: str = typer.Option(None, help="Comma-separated outputs to compute, e.g. structure,retrieval"),
+    suggestions: bool = typer.Option(True, help="Run the AdvisorAgent"),
+    save: bool = typer.Option(True, help="Record the score in the database"),
+):
+    """Run the LEO audit pipeline for a given URL (only the agents the requested outputs need)."""
+    from leo.graph import resolve_outputs, run_pipeline
+
     typer.echo(f"🔍 Auditing {url} ...")
     try:
-        result = run_pipeline(url)
-        typer.echo(f"✅ LEO Rank: {result.leo_rank}")
+        outputs = resolve_outputs(metrics.split(",") if metrics else None, suggestions)
+        result = run_pipeline(url, outputs=outputs, persist=save)
+        if outputs is None or "leo_rank" in outputs:
+            typer.echo(f"✅ LEO Rank: {result.leo_rank}")
         typer.echo("�� Metrics:")
         for k, v in result.metrics.items():
             typer.echo(f"  {k}: {v}")
-        typer.echo("\n💡 Suggestions:")
-        for s in result.suggestions:
-            typer.echo(f"  - {s}")
+        if outputs is None or "suggestions" in outputs:
+            typer.echo("\n💡 Suggestions:")
+            for s in result.suggestions:
+                typer.echo(f"  - {s}")
     except Exception as e:
         typer.echo(f"❌ Error: {e}")
 
 
+@app.command("audit-batch")
+def audit_batch(
+    path: str = typer.Argument(..., help="Text file with one URL per line"),
+    concurrency: int = typer.Option(8, help="Audits running at the same time"),
+    per_host: int = typer.Option(4, help="Maximum open connections per host"),
+    as_json: bool = typer.Option(False, "--json", help="Emit one JSON object per audit"),
+    processes: int = typer.Option(0, help="Worker processes for parsing and scoring (0: in-process, -1: one per core)"),
+):
+    """Audit every URL in a file concurrently, streaming results as they finish."""
+    from leo.batch import BatchStats, read_url_file, run_pipeline_many
+
+    stats = BatchStats()
+    results = run_pipeline_many(
+        read_url_file(path), concurrency=concurrency, per_host=per_host, stats=stats, processes=processes
+    )
+    for result in results:
+        if as_json:
+            typer.echo(json.dumps({
+                "url": result.url,
+                "metrics": result.metrics,
+                "leo_rank": result.leo_rank,
+                "error": result.error,
+                "timestamp": result.timestamp,
+            }))
+        elif result.error:
+            typer.echo(f"❌ {result.url} | {result.error}")
+        else:
+            typer.echo(f"{result.timestamp} | {result.url} | Rank: {result.leo_rank}")
+    typer.echo(
+        f"🏁 Audited {stats.completed} URLs ({stats.failed} failed) in {stats.elapsed:.2f}s "
+        f"— {stats.throughput:.2f} URLs/s",
+        err=as_json,
+    )
+
+
+@app.command("crawl-site")
+def crawl_site(
+    url: str = typer.Argument(..., help="Start URL; only pages on the same host are audited"),
+    max_pages: int = typer.Option(100, help="Maximum pages to audit"),
+    max_depth: int = typer.Option(3, help="Maximum link depth from the start URL"),
+    concurrency: int = typer.Option(4, help="Audits in flight against the host"),
+    delay: float = typer.Option(0.5, help="Minimum seconds between requests (robots Crawl-delay wins if larger)"),
+    sitemap: bool = typer.Option(True, help="Seed the frontier from the site's sitemaps"),
+    as_json: bool = typer.Option(False, "--json", help="Emit per-page lines and the report as JSON"),
+):
+    """Crawl a whole site and roll page audits up into a domain-level LeoRank."""
+    from dataclasses import asdict
+
+    from leo.site import crawl_site as run_crawl
+
+    def on_page(page):
+        if as_json:
+            typer.echo(json.dumps(asdict(page)))
+        elif page.error:
+            typer.echo(f"❌ {page.url} | {page.error}")
+        else:
+            typer.echo(f"{page.url} | Rank: {page.leo_rank}")
+
+    report = run_crawl(
+        url,
+        max_pages=max_pages,
+        max_depth=max_depth,
+        concurrency=concurrency,
+        delay=delay,
+        use_sitemap=sitemap,
+        on_page=on_page,
+    )
+    if as_json:
+        typer.echo(json.dumps(report.to_dict()))
+        return
+    typer.echo(
+        f"🏁 {report.host}: domain LeoRank {report.leo_rank} over {report.pages} pages "
+        f"({report.failed} failed, {report.blocked} blocked by robots.txt) in {report.elapsed:.2f}s"
+    )
+    for name, value in report.metrics.items():
+        typer.echo(f"  {name}: {value}")
+
+
 @app.command()
 def recent(limit: int = 10):
     """Display recent audit results from DB."""
+    from leo.db import get_recent_scores
+
     typer.echo(f"📈 Showing last {limit} results:")
     try:
         rows = get_recent_scores(limit)
@@ -45,9 +146,152 @@ def recent(limit: int = 10):
         typer.echo(f"❌ Error: {e}")
 
 
+@app.command()
+def history(
+    url: str,
+    limit: int = typer.Option(20, help="Rows per page"),
+    cursor: str = typer.Option(None, help="Continue from a previous page's cursor"),
+    since: str = typer.Option(None, help="ISO timestamp (inclusive)"),
+    until: str = typer.Option(None, help="ISO timestamp (exclusive)"),
+):
+    """Show one URL's score history, newest first."""
+    from leo.db import get_score_history
+
+    rows, next_cursor = get_score_history(url, limit=limit, cursor=cursor, since=since, until=until)
+    for r in rows:
+        typer.echo(f"{r['timestamp']} | Rank: {r['rank']}")
+    if next_cursor:
+        typer.echo(f"… more: --cursor {next_cursor}")
+
+
+@app.command()
+def leaderboard(
+    limit: int = typer.Option(20, help="Rows per page"),
+    cursor: str = typer.Option(None, help="Continue from a previous page's cursor"),
+):
+    """Show URLs ranked by their latest LeoRank."""
+    from leo.db import get_leaderboard
+
+    rows, next_cursor = get_leaderboard(limit=limit, cursor=cursor)
+    for i, r in enumerate(rows, 1):
+        typer.echo(f"{i:>4}. {r['rank']:>6} | {r['url']} ({r['audits']} audits, last {r['timestamp']})")
+    if next_cursor:
+        typer.echo(f"… more: --cursor {next_cursor}")
+
+
+@app.command()
+def aggregate(
+    since: str = typer.Option(None, help="ISO timestamp (inclusive), e.g. 2025-11-01"),
+    until: str = typer.Option(None, help="ISO timestamp (exclusive)"),
+    url: str = typer.Option(None, help="Restrict to one URL"),
+    daily: bool = typer.Option(False, help="Also print one line per day"),
+):
+    """Rank statistics (count, mean, min, max, p50, p90) over a time window."""
+    from leo.db import get_daily_aggregates, get_rank_aggregates
+
+    stats = get_rank_aggregates(since=since, until=until, url=url)
+    typer.echo(" | ".join(f"{k}: {round(v, 2) if isinstance(v, float) else v}" for k, v in stats.items()))
+    if daily:
+        for d in get_daily_aggregates(url=url, since=since, until=until):
+            typer.echo(f"{d['day']} | n={d['count']} avg={d['avg']:.2f} min={d['min']} max={d['max']}")
+
+
+@app.command()
+def export(
+    output: str = typer.Option("-", "--output", "-o", help="File to write, or - for stdout"),
+    format: str = typer.Option("ndjson", help="ndjson or csv"),
+    gzip: bool = typer.Option(False, help="gzip-compress the output"),
+    since: str = typer.Option(None, help="ISO timestamp (inclusive)"),
+    until: str = typer.Option(None, help="ISO timestamp (exclusive)"),
+    url: str = typer.Option(None, help="Restrict to one URL"),
+):
+    """Stream the score history to a file or stdout as NDJSON or CSV."""
+    import sys
+
+    from leo.export import export_scores
+
+    try:
+        chunks = export_scores(format, compress=gzip, since=since, until=until, url=url)
+    except ValueError as e:
+        typer.echo(f"❌ {e}", err=True)
+        raise typer.Exit(2)
+    out = sys.stdout.buffer if output == "-" else open(output, "wb")
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+            typer.echo(f"📦 Exported to {output}", err=True)
+
+
+@app.command()
+def rescore(
+    weights: str = typer.Option(None, help="Weights YAML to apply (default: leo/config/weights.yml)"),
+    chunk_size: int = typer.Option(100000, help="Score rows updated per transaction"),
+):
+    """Recompute LeoRank for the whole stored history from its saved metrics — no re-audits."""
+    import time
+
+    from leo.agents.scoring_agent import coefficients, load_weights
+    from leo.db import rescore as run_rescore
+
+    factors = coefficients(load_weights(weights))
+    typer.echo("⚖️  Re-weighting history: " + ", ".join(f"{k} × {v:.3f}" for k, v in factors.items()))
+    started = time.perf_counter()
+    counts = run_rescore(factors, chunk_size=chunk_size)
+    typer.echo(
+        f"✅ Rescored {counts['scores']} audits, {counts['latest_scores']} leaderboard rows and "
+        f"{counts['page_cache']} page snapshots in {time.perf_counter() - started:.2f}s"
+    )
+    if counts["skipped"]:
+        typer.echo(f"ℹ️  {counts['skipped']} older audits have no stored metrics and were left unchanged.")
+
+
+@app.command()
+def bench(
+    output: str = typer.Option("bench-results.json", help="Where to write the JSON report"),
+    baseline: str = typer.Option("bench-baseline.json", help="Baseline report to compare against"),
+    tolerance: float = typer.Option(0.25, help="Allowed regression as a fraction of the baseline"),
+    iterations: int = typer.Option(5, help="Audits per page size"),
+    update_baseline: bool = typer.Option(False, "--update-baseline", help="Save this run as the new baseline"),
+):
+    """Run the offline benchmark suite and fail on regressions against the baseline."""
+    import os
+
+    # Offline by design: no OpenAI calls, so numbers are comparable between runs.
+    os.environ.pop("OPENAI_API_KEY", None)
+    from leo.bench import compare, load_report, run_benchmarks, save_report
+
+    typer.echo(f"⏱️  Running benchmarks ({iterations} iterations per page size) ...")
+    report = run_benchmarks(iterations=iterations)
+    for name, value in sorted(report["results"].items()):
+        typer.echo(f"  {name}: {value}")
+    save_report(report, output)
+    typer.echo(f"📝 Report written to {output}")
+
+    if update_baseline:
+        save_report(report, baseline)
+        typer.echo(f"📌 Baseline updated: {baseline}")
+        return
+    previous = load_report(baseline)
+    if previous is None:
+        typer.echo(f"ℹ️  No baseline at {baseline}; run with --update-baseline to create one.")
+        return
+    regressions = compare(report["results"], previous["results"], tolerance)
+    if regressions:
+        typer.echo(f"❌ {len(regressions)} regression(s) beyond {tolerance:.0%}:")
+        for line in regressions:
+            typer.echo(f"  - {line}")
+        raise typer.Exit(1)
+    typer.echo("✅ No regressions against baseline.")
+
+
 @app.command()
 def serve(host: str = "0.0.0.0", port: int = 8000):
     """Run the FastAPI server."""
+    import uvicorn
+
     typer.echo(f"🚀 Starting API server at http://{host}:{port}")
     uvicorn.run("api.server:app", host=host, port=port)
 
@@ -55,6 +299,8 @@ def serve(host: str = "0.0.0.0", port: int = 8000):
 @app.command()
 def mcp(port: int = 8800):
     """Run the MCP server for GPT-native access."""
+    from leo.mcp.server import start_mcp_server
+
     typer.echo(f"🧩 Launching MCP server on port {port}")
     start_mcp_server(port=port)
 
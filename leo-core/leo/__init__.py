@@ -1,10 +1,31 @@
 """
 leo package initializer
 Exposes core imports for convenience.
+
+Attributes are resolved lazily on first access so that importing `leo` (or a
+single submodule such as `leo.db`) does not pull in the agents, HTTP stack,
+NumPy or database drivers that the caller never uses.
 """
 
-from .db import get_connection, save_score, get_recent_scores
-from .state import LeoState
-from .graph import run_pipeline
+from importlib import import_module
+
+_EXPORTS = {
+    "LeoState": "leo.state",
+    "run_pipeline": "leo.graph",
+    "run_pipeline_many": "leo.batch",
+    "get_connection": "leo.db",
+    "save_score": "leo.db",
+    "save_scores": "leo.db",
+    "get_recent_scores": "leo.db",
+}
+
+__all__ = ["LeoState", "run_pipeline", "run_pipeline_many", "get_connection", "save_score", "save_scores", "get_recent_scores"]
+
 
-__all__ = ["LeoState", "run_pipeline", "get_connection", "save_score", "get_recent_scores"]
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'leo' has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
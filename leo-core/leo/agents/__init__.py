@@ -1,10 +1,19 @@
 """Agent exports for Leo Core."""
-from . import advisor_agent, crawler_agent, scoring_agent, semantic_agent, structure_agent
+from importlib import import_module
 
 __all__ = [
     "advisor_agent",
     "crawler_agent",
+    "dedup_agent",
+    "retrieval_agent",
     "structure_agent",
     "semantic_agent",
     "scoring_agent",
 ]
+
+
+def __getattr__(name):
+    # Agent modules are imported on demand so one agent never drags in the others' dependencies.
+    if name not in __all__:
+        raise AttributeError(f"module 'leo.agents' has no attribute {name!r}")
+    return import_module(f"{__name__}.{name}")
@@ -1,25 +1,168 @@
 """
 leo/agents/advisor_agent.py
 Generates actionable recommendations based on structure, semantic, and LeoRank results.
-If OpenAI API is available, enhances suggestions using GPT; otherwise uses static logic.
+If an LLM backend is available (see leo/llm.py), enhances suggestions using GPT;
+otherwise uses static logic.
+
+The prompt depends only on three numbers, so `SuggestionService` quantizes
+them to `LEO_ADVISOR_BUCKET`-point buckets and memoizes the replies in a TTL
+cache: audits of similar sites share one completion. Concurrent misses for the
+same bucket wait on a single call, and misses for different buckets arriving
+within `max_wait` are sent as one multi-site prompt. Near-duplicates of a
+recently audited page reuse its suggestions outright (see leo/dedup.py).
 """
 
+import json
 import os
+import re
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from leo.cache import TTLCache
+from leo.llm import LLMBackend, get_llm_backend
 from leo.state import LeoState
+from leo.utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+ADVISOR_BUCKET = float(os.getenv("LEO_ADVISOR_BUCKET", "5"))
+ADVISOR_CACHE_TTL = float(os.getenv("LEO_ADVISOR_CACHE_TTL", "86400"))
+ADVISOR_CACHE_SIZE = int(os.getenv("LEO_ADVISOR_CACHE_SIZE", "4096"))
+
+MetricKey = Tuple[float, float, float]
+
+SITE = "Structure: {0}\nSemantic: {1}\nLeoRank: {2}"
+
+PROMPT = """You are an AI visibility auditor.
+The website has these metrics:
+{0}
+
+Suggest 3 concise improvements to increase AI visibility, one per line."""
+
+BATCH_PROMPT = """You are an AI visibility auditor.
+For each website below, suggest 3 concise improvements to increase AI visibility.
+Reply with a JSON array holding one array of 3 strings per website, in order.
+
+{0}"""
+
+
+def quantize(value: Optional[float], bucket: float = ADVISOR_BUCKET) -> float:
+    """Snap a 0–100 metric to the nearest multiple of `bucket`."""
+    value = value or 0.0
+    if bucket <= 0:
+        return round(value, 2)
+    return round(float(round(value / bucket) * bucket), 2)
+
 
-try:
-    import openai
-except ImportError:
-    openai = None
+def parse_tips(reply: str) -> List[str]:
+    """Split a completion into tips, dropping list numbering and bullets."""
+    tips = [re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip() for line in reply.splitlines()]
+    return [tip for tip in tips if tip]
+
+
+class SuggestionService:
+    """Memoized, coalesced access to LLM suggestions keyed by quantized metrics."""
+
+    def __init__(
+        self,
+        backend: LLMBackend,
+        cache: TTLCache = None,
+        bucket: float = ADVISOR_BUCKET,
+        max_batch: int = 8,
+        max_wait: float = 0.02,
+    ):
+        self.backend = backend
+        self.cache = cache or TTLCache("advisor", max_entries=ADVISOR_CACHE_SIZE, ttl=ADVISOR_CACHE_TTL)
+        self.bucket = bucket
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._pending: List[MetricKey] = []
+        self._inflight: Dict[MetricKey, Future] = {}
+
+    def key(self, structure: float, semantic: float, leo_rank: float) -> MetricKey:
+        return quantize(structure, self.bucket), quantize(semantic, self.bucket), quantize(leo_rank, self.bucket)
+
+    def suggest(self, key: MetricKey) -> List[str]:
+        hit = self.cache.get((self.backend.name, key))
+        if hit is not None:
+            return list(hit[0])
+        leader = False
+        with self._cond:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = Future()
+                self._pending.append(key)
+                leader = len(self._pending) == 1
+                if len(self._pending) >= self.max_batch:
+                    self._cond.notify_all()
+        if leader:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._pending) >= self.max_batch, timeout=self.max_wait)
+                batch, self._pending = self._pending, []
+            self._flush(batch)
+        return list(future.result())
+
+    def _flush(self, keys: List[MetricKey]) -> None:
+        try:
+            replies = self._complete(keys)
+        except Exception as e:
+            with self._cond:
+                futures = [self._inflight.pop(key) for key in keys]
+            for future in futures:
+                future.set_exception(e)
+            return
+        for key, tips in zip(keys, replies):
+            self.cache.set((self.backend.name, key), tips)
+        with self._cond:
+            futures = [self._inflight.pop(key) for key in keys]
+        for future, tips in zip(futures, replies):
+            future.set_result(tips)
+
+    def _complete(self, keys: Sequence[MetricKey]) -> List[List[str]]:
+        if len(keys) == 1:
+            return [parse_tips(self.backend.complete(PROMPT.format(SITE.format(*keys[0]))))]
+        sites = "\n\n".join(f"Website {i}:\n{SITE.format(*key)}" for i, key in enumerate(keys, 1))
+        reply = self.backend.complete(BATCH_PROMPT.format(sites), max_tokens=150 * len(keys))
+        try:
+            tips = json.loads(reply[reply.index("["): reply.rindex("]") + 1])
+            if len(tips) == len(keys) and all(isinstance(t, list) for t in tips):
+                return [[str(tip).strip() for tip in site] for site in tips]
+        except ValueError:
+            pass
+        logger.warning(f"[AdvisorAgent] ⚠️ Unreadable batched reply for {len(keys)} sites — asking one by one.")
+        return [parse_tips(self.backend.complete(PROMPT.format(SITE.format(*key)))) for key in keys]
+
+
+_default_service: Optional[SuggestionService] = None
+_service_lock = threading.Lock()
+
+
+def get_suggestion_service() -> Optional[SuggestionService]:
+    """Return the process-wide suggestion service, or None when no LLM backend is configured."""
+    global _default_service
+    if _default_service is None:
+        backend = get_llm_backend()
+        if backend is None:
+            return None
+        with _service_lock:
+            if _default_service is None:
+                _default_service = SuggestionService(backend)
+    return _default_service
 
 
 class AdvisorAgent:
     """Provide recommendations to improve AI visibility and LEO rank."""
 
-    def __init__(self):
-        self.api_key = os.getenv("OPENAI_API_KEY", "")
-        if self.api_key and openai:
-            openai.api_key = self.api_key
+    name = "advisor"
+    inputs = ("structure", "semantic", "leo_rank", "fingerprint")
+    outputs = ("suggestions",)
+
+    def __init__(self, backend: LLMBackend = None, service: SuggestionService = None):
+        if service is None and backend is not None:
+            service = SuggestionService(backend)
+        self.service = service or get_suggestion_service()
 
     def _static_recommendations(self, state: LeoState):
         """Fallback static logic."""
@@ -40,32 +183,22 @@ class AdvisorAgent:
         return tips
 
     def run(self, state: LeoState) -> LeoState:
-        print("[AdvisorAgent] Generating improvement suggestions...")
+        if state.duplicate_of and state.suggestions:
+            logger.info(f"[AdvisorAgent] ✅ Reusing suggestions of near-duplicate {state.duplicate_of}.")
+            return state
+        logger.info("[AdvisorAgent] Generating improvement suggestions...")
 
-        if self.api_key and openai:
+        if self.service:
             try:
-                prompt = f"""
-                You are an AI visibility auditor.
-                The website has these metrics:
-                Structure: {state.metrics.get('structure')}
-                Semantic: {state.metrics.get('semantic')}
-                LeoRank: {state.leo_rank}
-
-                Suggest 3 concise improvements to increase AI visibility.
-                """
-                chat = openai.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=200,
-                )
-                suggestions = [m["message"]["content"].strip() for m in chat.choices]
-                print("[AdvisorAgent] ✅ Online GPT recommendations generated.")
+                key = self.service.key(state.metrics.get("structure"), state.metrics.get("semantic"), state.leo_rank)
+                suggestions = self.service.suggest(key) or self._static_recommendations(state)
+                logger.info("[AdvisorAgent] ✅ Online GPT recommendations generated.")
             except Exception as e:
-                print(f"[AdvisorAgent] ⚠️ OpenAI API failed ({e}) — using static recommendations.")
+                logger.warning(f"[AdvisorAgent] ⚠️ LLM call failed ({e}) — using static recommendations.")
                 suggestions = self._static_recommendations(state)
         else:
             suggestions = self._static_recommendations(state)
-            print("[AdvisorAgent] ✅ Static recommendations applied.")
+            logger.info("[AdvisorAgent] ✅ Static recommendations applied.")
 
         state.suggestions = suggestions
         return state
@@ -2,30 +2,123 @@
 leo/agents/crawler_agent.py
 Fetches a website’s HTML and extracts visible text content.
 This is the entry point of the LEO Core audit pipeline.
+
+The body is streamed: non-HTML responses are rejected from their headers,
+at most `max_bytes` are read, and chunks are decoded and parsed as they
+arrive, keeping at most `max_text_chars` of visible text. Peak memory per
+audit is therefore bounded regardless of the page size. The text is then
+tokenized once into `state.text_stats` (counts, keyword hits and the SimHash
+fingerprint), which the other agents read instead of re-splitting the text.
+
+With an `analysis_pool` (see leo/analysis.py) the crawler only fetches and
+hands the compressed body to a worker process, which also computes the
+structure score (and the semantic score when `offload_semantic` is set).
 """
 
+import codecs
+import hashlib
+import os
+import time
+
 import requests
-from bs4 import BeautifulSoup
-from leo.state import LeoState
+from leo import telemetry
+from leo.analysis import analyze_page, compress_html
+from leo.state import LeoState, PageValidators
+from leo.utils.html_utils import DocumentAnalyzer
+from leo.utils.http_utils import get_session, is_html, media_type, sniff_encoding
+from leo.utils.log_utils import get_logger
+from leo.utils.text_utils import compute_text_stats
+
+logger = get_logger(__name__)
+
+MAX_TEXT_CHARS = 100000
+MAX_FETCH_BYTES = int(os.getenv("LEO_MAX_FETCH_BYTES", str(5 * 1024 * 1024)))
+CHUNK_BYTES = 64 * 1024
+
+
+class FetchRejected(Exception):
+    """The response is not something the pipeline can audit (e.g. not HTML)."""
 
 
 class CrawlerAgent:
-    """Fetch and parse the target website."""
+    """Fetch and parse the target website.
 
-    def __init__(self, timeout: int = 10):
+    When `state.validators` carries metadata from a previous audit, the fetch is
+    conditional (If-None-Match / If-Modified-Since). A 304 response or a body
+    whose hash matches the previous one sets `state.not_modified` and skips parsing.
+    """
+
+    name = "crawler"
+    inputs = ()
+    outputs = ("html", "text", "document", "text_stats")
+
+    def __init__(
+        self,
+        timeout: int = 10,
+        parser: str = None,
+        session: requests.Session = None,
+        max_bytes: int = MAX_FETCH_BYTES,
+        max_text_chars: int = MAX_TEXT_CHARS,
+        max_links: int = 0,
+        analysis_pool=None,
+        offload_semantic: bool = False,
+    ):
         self.timeout = timeout
+        self.parser = parser
+        self.session = session or get_session()
+        self.max_bytes = max_bytes
+        self.max_text_chars = max_text_chars
+        self.max_links = max_links
+        self.analysis_pool = analysis_pool
+        self.offload_semantic = bool(analysis_pool) and offload_semantic
+        if analysis_pool is not None:
+            self.outputs = CrawlerAgent.outputs + (("structure", "semantic") if self.offload_semantic else ("structure",))
 
     def run(self, state: LeoState) -> LeoState:
         """Fetch HTML and extract readable text."""
         url = state.url
-        print(f"[CrawlerAgent] Fetching {url} ...")
+        logger.info(f"[CrawlerAgent] Fetching {url} ...")
+
+        previous = state.validators
+        headers = {}
+        if previous and previous.etag:
+            headers["If-None-Match"] = previous.etag
+        if previous and previous.last_modified:
+            headers["If-Modified-Since"] = previous.last_modified
 
         try:
-            response = requests.get(url, timeout=self.timeout, headers={"User-Agent": "LEO-Core/0.2"})
-            response.raise_for_status()
-            html = response.text
+            with self.session.get(url, timeout=self.timeout, headers=headers, stream=True) as response:
+                if response.status_code == 304 and previous:
+                    state.not_modified = True
+                    state.validators = PageValidators(
+                        etag=response.headers.get("ETag", previous.etag),
+                        last_modified=response.headers.get("Last-Modified", previous.last_modified),
+                        content_hash=previous.content_hash,
+                    )
+                    logger.info(f"[CrawlerAgent] ♻️ {url} not modified (304)")
+                    return state
+                response.raise_for_status()
+                content_type = response.headers.get("Content-Type")
+                if not is_html(content_type):
+                    raise FetchRejected(f"unsupported content type {media_type(content_type)}")
+                # With a stored hash the page may turn out unchanged: hash first, parse only if needed.
+                pooled = self.analysis_pool is not None
+                analyzer = None if pooled or (previous and previous.content_hash) else self._analyzer()
+                html, content_hash, size, truncated, parse_seconds = self._read_body(response, analyzer)
+            telemetry.inc("leo_fetch_bytes_total", size)
+            state.validators = PageValidators(
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                content_hash=content_hash,
+            )
+            if previous and previous.content_hash == content_hash:
+                state.not_modified = True
+                logger.info(f"[CrawlerAgent] ♻️ {url} body unchanged since last audit")
+                return state
         except Exception as e:
-            print(f"[CrawlerAgent] ❌ Failed to fetch {url}: {e}")
+            logger.error(f"[CrawlerAgent] ❌ Failed to fetch {url}: {e}")
+            telemetry.inc("leo_fetch_errors_total")
+            state.error = f"fetch failed: {e}"
             state.html = ""
             state.text = ""
             return state
@@ -33,14 +126,87 @@ class CrawlerAgent:
         # Store HTML
         state.html = html
 
-        # Parse and extract text
-        soup = BeautifulSoup(html, "html.parser")
-
-        for element in soup(["script", "style", "noscript"]):
-            element.decompose()
+        # Parse once; downstream agents reuse the document artifact
+        telemetry.observe("leo_html_bytes", size)
+        if self.analysis_pool is not None:
+            return self._analyze_in_pool(state, truncated)
+        if analyzer is None:
+            analyzer = self._analyzer()
+            started = time.perf_counter()
+            analyzer.feed(html)
+            parse_seconds = time.perf_counter() - started
+        if truncated:
+            analyzer.mark_truncated()
+            logger.warning(f"[CrawlerAgent] ⚠️ {url} exceeds {self.max_bytes} bytes — analyzing the first part only")
+        started = time.perf_counter()
+        document = analyzer.close()
+        parse_seconds += time.perf_counter() - started
+        telemetry.observe("leo_parse_duration_seconds", parse_seconds, parser=document.parser)
+        state.document = document
+        state.text = document.text
+        state.text_stats = compute_text_stats(document.text)
 
-        visible_text = " ".join(soup.stripped_strings)
-        state.text = visible_text[:100000]  # cap to avoid large pages
+        logger.info(f"[CrawlerAgent] ✅ Extracted {state.text_stats.tokens} words of text ({document.parser})")
+        return state
 
-        print(f"[CrawlerAgent] ✅ Extracted {len(visible_text.split())} words of text")
+    def _analyze_in_pool(self, state: LeoState, truncated: bool) -> LeoState:
+        """Parse and score the body in a worker process; the GIL stays free for fetching."""
+        future = self.analysis_pool.submit(
+            analyze_page,
+            compress_html(state.html),
+            self.parser,
+            self.max_text_chars,
+            self.max_links,
+            truncated,
+            self.offload_semantic,
+        )
+        document, text_stats, metrics, parse_seconds = future.result()
+        if truncated:
+            logger.warning(f"[CrawlerAgent] ⚠️ {state.url} exceeds {self.max_bytes} bytes — analyzing the first part only")
+        telemetry.observe("leo_parse_duration_seconds", parse_seconds, parser=document.parser)
+        state.document = document
+        state.text = document.text
+        state.text_stats = text_stats
+        state.metrics.update(metrics)
+        logger.info(f"[CrawlerAgent] ✅ Analyzed {text_stats.tokens} words in a worker process ({document.parser})")
         return state
+
+    def _analyzer(self) -> DocumentAnalyzer:
+        return DocumentAnalyzer(self.parser, max_text_chars=self.max_text_chars, max_links=self.max_links)
+
+    def _read_body(self, response, analyzer):
+        """
+        Stream up to `max_bytes` of the body, decoding incrementally and feeding
+        `analyzer` (when given) as chunks arrive.
+        Returns (html, sha256 hex digest, bytes read, truncated, parse seconds).
+        """
+        declared = response.headers.get("Content-Length")
+        truncated = bool(declared and declared.isdigit() and int(declared) > self.max_bytes)
+        hasher = hashlib.sha256()
+        pieces = []
+        decoder = None
+        size = 0
+        parse_seconds = 0.0
+        for chunk in response.iter_content(CHUNK_BYTES):
+            if size + len(chunk) > self.max_bytes:
+                chunk = chunk[: self.max_bytes - size]
+                truncated = True
+            size += len(chunk)
+            hasher.update(chunk)
+            if decoder is None:
+                encoding = sniff_encoding(response.headers.get("Content-Type"), chunk)
+                decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            text = decoder.decode(chunk)
+            pieces.append(text)
+            if analyzer is not None:
+                started = time.perf_counter()
+                analyzer.feed(text)
+                parse_seconds += time.perf_counter() - started
+            if size >= self.max_bytes:
+                break
+        if decoder is not None:
+            tail = decoder.decode(b"", final=True)
+            pieces.append(tail)
+            if analyzer is not None:
+                analyzer.feed(tail)
+        return "".join(pieces), hasher.hexdigest(), size, truncated, parse_seconds
@@ -0,0 +1,50 @@
+"""
+leo/agents/dedup_agent.py
+Looks the page's SimHash fingerprint, computed by the crawler along with the
+other text statistics, up in the near-duplicate index (leo/dedup.py). When a
+page within the distance threshold was analyzed recently, its semantic score
+and suggestions are copied into the state and the Semantic and Advisor agents
+skip their embedding and LLM calls.
+"""
+
+from leo import telemetry
+from leo.dedup import DEDUP_ENABLED, SimHashIndex, get_dedup_index
+from leo.state import LeoState
+from leo.utils.log_utils import get_logger
+from leo.utils.url_utils import normalize_url
+
+logger = get_logger(__name__)
+
+
+class DedupAgent:
+    """Record the page fingerprint and reuse the analysis of a recent near-duplicate."""
+
+    name = "dedup"
+    inputs = ("text_stats",)
+    outputs = ("fingerprint",)
+
+    def __init__(self, index: SimHashIndex = None, enabled: bool = DEDUP_ENABLED):
+        self.index = index
+        self.enabled = enabled
+
+    def run(self, state: LeoState) -> LeoState:
+        if state.text_stats is None or state.text_stats.fingerprint is None:
+            return state  # no text, or too short to fingerprint
+        state.fingerprint = state.text_stats.fingerprint
+        fingerprint = int(state.fingerprint, 16)
+        if not self.enabled:
+            return state
+
+        index = self.index or get_dedup_index()
+        match = index.find(fingerprint, exclude=normalize_url(state.url))
+        telemetry.inc("leo_cache_hits_total" if match else "leo_cache_misses_total", cache="dedup")
+        if match is None:
+            return state
+
+        state.duplicate_of = match.url
+        if "semantic" in match.metrics:
+            state.metrics.setdefault("semantic", match.metrics["semantic"])
+        if match.suggestions:
+            state.suggestions = list(match.suggestions)
+        logger.info(f"[DedupAgent] ✅ Near-duplicate of {match.url} ({match.distance} bits apart) — reusing its analysis.")
+        return state
@@ -0,0 +1,32 @@
+"""
+leo/agents/retrieval_agent.py
+Scores how retrievable a page is for AI search: enough visible text, headings
+to anchor passages, and links to related content. Produces a retrieval score (0–100).
+"""
+
+from leo.state import LeoState
+from leo.utils.log_utils import get_logger
+from leo.utils.metrics_utils import compute_retrieval_score
+
+logger = get_logger(__name__)
+
+
+class RetrievalAgent:
+    """Combine text richness, heading and link signals into a retrieval score."""
+
+    name = "retrieval"
+    inputs = ("text_stats", "document")
+    outputs = ("retrieval",)
+
+    def run(self, state: LeoState) -> LeoState:
+        document = state.document
+        if document is None:
+            logger.warning("[RetrievalAgent] ⚠️ No parsed document — skipping retrieval analysis.")
+            state.metrics["retrieval"] = 0.0
+            return state
+
+        characters = state.text_stats.characters if state.text_stats else len((state.text or "").strip())
+        score = compute_retrieval_score("", document.headings, document.links, characters=characters)
+        state.metrics["retrieval"] = round(score * 100, 2)
+        logger.info(f"[RetrievalAgent] ✅ Retrieval score: {state.metrics['retrieval']}")
+        return state
@@ -1,41 +1,98 @@
 """
 leo/agents/scoring_agent.py
 Aggregates structure, semantic, and other metrics into a single LEO Rank (0–100).
+
+Weights come from `leo/config/weights.yml`, parsed once and re-read only when
+the file's mtime changes; `weights_version()` is a short hash of the weights in
+use, which keys the audit result cache (leo/cache.py). `coefficients()` turns them into the normalized
+per-metric factors shared by the agent and `db.rescore()` (`leo rescore`).
+LeoRank is the weighted mean of the scored metrics that are present, so
+audits that request only some metrics still get a comparable rank.
 """
 
-import yaml
+import hashlib
+import json
 import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import yaml
 from leo.state import LeoState
+from leo.utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+WEIGHTS_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "weights.yml")
+DEFAULT_WEIGHTS = {"structure": 0.4, "semantic": 0.4, "retrieval": 0.2}
+SCORED_METRICS = ("structure", "semantic", "retrieval")
+
+# path -> (mtime, weights, version)
+_weights_cache: Dict[str, Tuple[float, Dict[str, float], str]] = {}
+_weights_lock = threading.Lock()
+
+
+def _version(weights: Dict[str, float]) -> str:
+    return hashlib.sha1(json.dumps(weights, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+_DEFAULT_ENTRY = (-1.0, DEFAULT_WEIGHTS, _version(DEFAULT_WEIGHTS))
+
+
+def _load(path: Optional[str]) -> Tuple[float, Dict[str, float], str]:
+    path = path or WEIGHTS_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return _DEFAULT_ENTRY
+    cached = _weights_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "r") as f:
+            data = yaml.safe_load(f) or {}
+        weights = data.get("weights", data) if isinstance(data, dict) else {}
+        weights = {name: float(value) for name, value in weights.items()}
+        cached = (mtime, weights, _version(weights))
+        with _weights_lock:
+            _weights_cache[path] = cached
+    return cached
+
+
+def load_weights(path: Optional[str] = None) -> Dict[str, float]:
+    """Metric weights from a YAML file (flat, or under a `weights:` key), cached by mtime."""
+    return dict(_load(path)[1])
+
+
+def weights_version(path: Optional[str] = None) -> str:
+    """Short hash of the weights `load_weights(path)` returns; changes whenever they do."""
+    return _load(path)[2]
+
+
+def coefficients(weights: Dict[str, float]) -> Dict[str, float]:
+    """
+    Per-metric factors of the LeoRank: the scored metrics' weights, normalized
+    to sum to 1. A metric missing from `weights` keeps its `DEFAULT_WEIGHTS` value.
+    """
+    raw = {name: weights.get(name, DEFAULT_WEIGHTS[name]) for name in SCORED_METRICS}
+    total = sum(raw.values()) or 1
+    return {name: weight / total for name, weight in raw.items()}
 
 
 class ScoringAgent:
     """Combine weighted metrics to compute the final LeoRank score."""
 
+    name = "scoring"
+    inputs = SCORED_METRICS
+    outputs = ("leo_rank",)
+
     def __init__(self, weights_path: str = None):
-        # Load weights from config
-        default_path = weights_path or os.path.join(os.path.dirname(__file__), "..", "config", "weights.yml")
-        if os.path.exists(default_path):
-            with open(default_path, "r") as f:
-                self.weights = yaml.safe_load(f).get("weights", {})
-        else:
-            self.weights = {"structure": 0.5, "semantic": 0.5}
+        self.weights = load_weights(weights_path)
 
     def run(self, state: LeoState) -> LeoState:
-        print("[ScoringAgent] Computing LeoRank...")
-
-        structure = state.metrics.get("structure", 0.0)
-        semantic = state.metrics.get("semantic", 0.0)
-
-        w_structure = self.weights.get("structure", 0.5)
-        w_semantic = self.weights.get("semantic", 0.5)
-
-        # Normalize total weights
-        total_weight = w_structure + w_semantic or 1
-        w_structure /= total_weight
-        w_semantic /= total_weight
+        logger.info("[ScoringAgent] Computing LeoRank...")
 
-        leo_rank = (structure * w_structure + semantic * w_semantic)
+        factors = {name: f for name, f in coefficients(self.weights).items() if name in state.metrics}
+        total = sum(factors.values()) or 1
+        leo_rank = sum(state.metrics[name] * factor for name, factor in factors.items()) / total
         state.leo_rank = round(leo_rank, 2)
 
-        print(f"[ScoringAgent] ✅ LeoRank computed: {state.leo_rank}")
+        logger.info(f"[ScoringAgent] ✅ LeoRank computed: {state.leo_rank}")
         return state
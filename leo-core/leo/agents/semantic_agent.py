@@ -1,60 +1,96 @@
 """
 leo/agents/semantic_agent.py
-Analyzes semantic quality of visible text — readability, relevance, and
-embedding similarity if OpenAI API is available.
+Analyzes semantic quality of visible text: the semantic score is the mean
+pairwise cosine similarity of chunk embeddings (OpenAI when available, the
+local NumPy backend otherwise), as specified in specs/leo-specs.yml.
+Embeddings come from the provider layer in leo/embeddings.py (cached, batched).
+Near-duplicates of a recently audited page reuse its score (see leo/dedup.py).
 """
 
-import os
-import re
-import numpy as np
-from leo.state import LeoState
+from typing import List, Optional, Sequence
 
-try:
-    import openai
-except ImportError:
-    openai = None
+from leo.embeddings import EmbeddingProvider, get_embedding_provider
+from leo.state import LeoState, TextStats
+from leo.utils.metrics_utils import chunk_text, cohesion_scores
+from leo.utils.log_utils import get_logger
+from leo.utils.text_utils import compute_text_stats
+
+logger = get_logger(__name__)
+
+CHUNK_SIZE = 500
+MAX_BLOCK_CHUNKS = 4096  # chunks embedded together before cohesion is computed
 
 
 class SemanticAgent:
     """Evaluate text clarity, keyword density, and semantic cohesion."""
 
-    def __init__(self):
-        self.api_key = os.getenv("OPENAI_API_KEY", "")
-        if self.api_key and openai:
-            openai.api_key = self.api_key
+    name = "semantic"
+    inputs = ("text", "text_stats", "fingerprint")
+    outputs = ("semantic",)
+
+    def __init__(self, provider: EmbeddingProvider = None):
+        self.provider = provider or get_embedding_provider()
 
-    def _fallback_score(self, text: str) -> float:
-        """Offline stub for environments without API key."""
-        words = text.split()
-        avg_word_len = np.mean([len(w) for w in words]) if words else 0
-        keyword_density = len(re.findall(r"(ai|ml|data|cloud|intelligence|automation)", text.lower()))
+    def _fallback_score(self, stats: TextStats) -> float:
+        """Lexical score for texts too short to measure cohesion: word length and keyword hits."""
         # normalize
-        score = min((avg_word_len * 5 + keyword_density * 10), 100)
+        score = min((stats.avg_token_length * 5 + stats.keyword_hits * 10), 100)
         return round(score, 2)
 
+    def score_texts(self, texts: List[str], stats: Optional[Sequence[Optional[TextStats]]] = None) -> List[float]:
+        """
+        Score many pages: mean pairwise cosine similarity of their chunk embeddings (0–100).
+
+        Chunks of consecutive pages are embedded together in blocks of up to
+        `MAX_BLOCK_CHUNKS`, and cohesion is computed per page in O(n·d), so
+        memory stays bounded for long pages and large batches. Pages too short
+        to yield two chunks fall back to the lexical score, read from their
+        `stats` (computed here for pages without).
+        """
+        scores = [0.0] * len(texts)
+        block: List[int] = []
+        block_chunks: List[List[str]] = []
+
+        def flush():
+            counts = [len(c) for c in block_chunks]
+            embeddings = self.provider.embed([chunk for chunks in block_chunks for chunk in chunks])
+            for index, cohesion in zip(block, cohesion_scores(embeddings, counts)):
+                scores[index] = round(cohesion * 100, 2)
+            block.clear()
+            block_chunks.clear()
+
+        for index, text in enumerate(texts):
+            chunks = chunk_text(text or "", CHUNK_SIZE)
+            if len(chunks) < 2:
+                if text:
+                    page_stats = stats[index] if stats is not None else None
+                    scores[index] = self._fallback_score(page_stats or compute_text_stats(text))
+                continue
+            block.append(index)
+            block_chunks.append(chunks)
+            if sum(len(c) for c in block_chunks) >= MAX_BLOCK_CHUNKS:
+                flush()
+        if block:
+            flush()
+        return scores
+
+    def run_many(self, states: List[LeoState]) -> List[LeoState]:
+        """Run the semantic stage for a batch of pages in one vectorized pass."""
+        texts = [s.text or "" for s in states]
+        for state, score in zip(states, self.score_texts(texts, [s.text_stats for s in states])):
+            state.metrics["semantic"] = score
+        return states
+
     def run(self, state: LeoState) -> LeoState:
+        if state.duplicate_of and "semantic" in state.metrics:
+            logger.info(f"[SemanticAgent] ✅ Reusing cohesion score of near-duplicate {state.duplicate_of}.")
+            return state
         if not state.text:
-            print("[SemanticAgent] ⚠️ No text to analyze — skipping semantic stage.")
+            logger.warning("[SemanticAgent] ⚠️ No text to analyze — skipping semantic stage.")
             state.metrics["semantic"] = 0.0
             return state
 
-        print("[SemanticAgent] Analyzing semantic content...")
-
-        # If API key exists, attempt embeddings
-        if self.api_key and openai:
-            try:
-                chunks = state.text[:4000]  # limit to fit model context
-                emb = openai.embeddings.create(input=chunks, model="text-embedding-3-small")
-                vector = np.array(emb.data[0].embedding)
-                cohesion = np.mean(vector[:128]) * 100
-                score = max(0.0, min(cohesion, 100))
-                print(f"[SemanticAgent] ✅ Online embedding analysis done. Score: {score:.2f}")
-            except Exception as e:
-                print(f"[SemanticAgent] ⚠️ OpenAI API failed — fallback mode ({e})")
-                score = self._fallback_score(state.text)
-        else:
-            score = self._fallback_score(state.text)
-            print(f"[SemanticAgent] ✅ Offline mode semantic score: {score}")
-
-        state.metrics["semantic"] = score
+        logger.info("[SemanticAgent] Analyzing semantic content...")
+        state = self.run_many([state])[0]
+        logger.info(f"[SemanticAgent] ✅ Cohesion score ({self.provider.name}): {state.metrics['semantic']}")
         return state
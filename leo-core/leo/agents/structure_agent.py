@@ -4,46 +4,49 @@ Analyzes HTML structure quality — headings, metadata, alt text, and links.
 Produces a structure score (0–100).
 """
 
-from bs4 import BeautifulSoup
-from leo.state import LeoState
+from leo.state import DocumentStats, LeoState
+from leo.utils.html_utils import analyze_html
+from leo.utils.log_utils import get_logger
+
+logger = get_logger(__name__)
 
 
 class StructureAgent:
     """Analyze the structural health of the website."""
 
-    def run(self, state: LeoState) -> LeoState:
-        if not state.html:
-            print("[StructureAgent] ⚠️ No HTML found — skipping structural analysis.")
-            state.metrics["structure"] = 0.0
-            return state
-
-        print("[StructureAgent] Analyzing HTML structure...")
-        soup = BeautifulSoup(state.html, "html.parser")
-
-        # Core structural elements
-        headings = len(soup.find_all(["h1", "h2", "h3"]))
-        metas = len(soup.find_all("meta"))
-        images = soup.find_all("img")
-        links = soup.find_all("a", href=True)
+    name = "structure"
+    inputs = ("html", "document")
+    outputs = ("structure",)
 
-        # Quality checks
-        alt_missing = sum(1 for img in images if not img.get("alt"))
-        link_broken = sum(1 for a in links if not a["href"] or a["href"].startswith("#"))
+    @staticmethod
+    def score(document: DocumentStats) -> float:
+        """Compute the 0–100 structure score from parsed document counts."""
+        total_images = document.images or 1
+        total_links = document.links or 1
 
-        total_images = len(images) or 1
-        total_links = len(links) or 1
-
-        alt_ratio = (total_images - alt_missing) / total_images
-        link_ratio = (total_links - link_broken) / total_links
+        alt_ratio = (total_images - document.images_missing_alt) / total_images
+        link_ratio = (total_links - document.links_broken) / total_links
 
         # Simple weighted score
         score = (
-            (min(headings, 10) / 10) * 0.25 +
-            (min(metas, 15) / 15) * 0.25 +
+            (min(document.headings, 10) / 10) * 0.25 +
+            (min(document.metas, 15) / 15) * 0.25 +
             alt_ratio * 0.25 +
             link_ratio * 0.25
         ) * 100
+        return round(score, 2)
+
+    def run(self, state: LeoState) -> LeoState:
+        if not state.html:
+            logger.warning("[StructureAgent] ⚠️ No HTML found — skipping structural analysis.")
+            state.metrics["structure"] = 0.0
+            return state
+
+        logger.info("[StructureAgent] Analyzing HTML structure...")
+        # Reuse the crawler's parse when available; parse once otherwise
+        if state.document is None:
+            state.document = analyze_html(state.html)
 
-        state.metrics["structure"] = round(score, 2)
-        print(f"[StructureAgent] ✅ Structure score: {state.metrics['structure']}")
+        state.metrics["structure"] = self.score(state.document)
+        logger.info(f"[StructureAgent] ✅ Structure score: {state.metrics['structure']}")
         return state
@@ -0,0 +1,97 @@
+"""
+leo/analysis.py
+Process-pool execution of the CPU-bound analysis stages for batch runs.
+
+HTML parsing, the structure score and, with the local embedding backend, the
+semantic score are pure Python/NumPy work serialized by the GIL, so a batch
+run otherwise keeps a single core busy however many audits are in flight.
+With an analysis pool the crawler only fetches: each body is zlib-compressed
+(level 1, typically 5–10× smaller) and sent to a worker process, which parses
+it and returns the compact `DocumentStats` and `TextStats` plus the metrics. Fetching, the
+OpenAI calls and persistence stay in the parent's I/O threads.
+
+    pool = create_pool(processes=-1)   # one worker per core
+    run_pipeline(url, analysis_pool=pool)
+"""
+
+import multiprocessing
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from leo.state import DocumentStats, TextStats
+from leo.utils.html_utils import DocumentAnalyzer
+from leo.utils.text_utils import compute_text_stats
+
+COMPRESS_LEVEL = 1
+
+_semantic_agent = None
+
+
+def resolve_processes(processes: int) -> int:
+    """Worker count for a `--processes` value: negative means one per core."""
+    if processes < 0:
+        return os.cpu_count() or 1
+    return processes
+
+
+def _warm_up() -> None:
+    # Import the agents once per worker instead of on its first page.
+    from leo.agents import semantic_agent, structure_agent  # noqa: F401
+
+
+def create_pool(processes: int = -1) -> ProcessPoolExecutor:
+    """
+    A process pool for `analyze_page`. Workers are spawned rather than forked:
+    the parent runs fetch threads and holds pooled sockets, neither of which
+    survives a fork safely.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max(1, resolve_processes(processes)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_warm_up,
+    )
+
+
+def compress_html(html: str) -> bytes:
+    return zlib.compress(html.encode("utf-8"), COMPRESS_LEVEL)
+
+
+def analyze_page(
+    payload: bytes,
+    parser: Optional[str] = None,
+    max_text_chars: Optional[int] = None,
+    max_links: int = 0,
+    truncated: bool = False,
+    semantic: bool = False,
+) -> Tuple[DocumentStats, TextStats, Dict[str, float], float]:
+    """
+    Worker entry point: parse compressed HTML and score it.
+    Returns (document, text stats, metrics, parse seconds); `metrics` always holds
+    `structure` and holds `semantic` when `semantic` is set.
+    """
+    from leo.agents.structure_agent import StructureAgent
+
+    started = time.perf_counter()
+    analyzer = DocumentAnalyzer(parser, max_text_chars=max_text_chars, max_links=max_links)
+    analyzer.feed(zlib.decompress(payload).decode("utf-8"))
+    if truncated:
+        analyzer.mark_truncated()
+    document = analyzer.close()
+    parse_seconds = time.perf_counter() - started
+    text_stats = compute_text_stats(document.text)
+
+    metrics = {"structure": StructureAgent.score(document)}
+    if semantic:
+        global _semantic_agent
+        if _semantic_agent is None:
+            from leo.agents.semantic_agent import SemanticAgent
+
+            _semantic_agent = SemanticAgent()
+        metrics["semantic"] = _semantic_agent.score_texts([document.text], [text_stats])[0]
+    return document, text_stats, metrics, parse_seconds
+
+
+__all__ = ["analyze_page", "compress_html", "create_pool", "resolve_processes"]
@@ -0,0 +1,113 @@
+"""
+leo/batch.py
+Batch audit engine — runs many LEO pipelines concurrently over one pooled,
+keep-alive HTTP session and streams each result as soon as it finishes.
+With `processes` the CPU-bound analysis runs in a process pool (leo/analysis.py).
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+from leo.analysis import create_pool, resolve_processes
+from leo.graph import run_pipeline
+from leo.state import LeoState
+from leo.utils.http_utils import build_session
+from leo.utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class BatchStats:
+    """Running counters for a batch audit."""
+
+    completed: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Audits completed per second."""
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+
+def read_url_file(path: str) -> Iterator[str]:
+    """Yield URLs from a text file, one per line; blank lines and # comments are skipped."""
+    with open(path, "r") as f:
+        for line in f:
+            url = line.strip()
+            if url and not url.startswith("#"):
+                yield url
+
+
+def run_pipeline_many(
+    urls: Iterable[str],
+    concurrency: int = 8,
+    per_host: int = 4,
+    stats: Optional[BatchStats] = None,
+    processes: int = 0,
+    lean: bool = True,
+) -> Iterator[LeoState]:
+    """
+    Audit many URLs concurrently, yielding each `LeoState` as it completes.
+
+    Fetches share one session, so connections are kept alive and reused;
+    at most `per_host` connections are opened to any single host. URLs are
+    consumed lazily with at most `2 * concurrency` audits queued at a time,
+    so arbitrarily long URL lists stream through in bounded memory.
+
+    `processes` > 0 parses and scores pages in that many worker processes
+    (-1: one per core), so the fetch threads are no longer capped by one core.
+    With `lean` (the default) results are yielded without their raw HTML and text.
+    """
+    concurrency = max(1, concurrency)
+    stats = stats if stats is not None else BatchStats()
+    session = build_session(per_host=per_host, max_hosts=max(concurrency, 10))
+    url_iter = iter(urls)
+    workers = resolve_processes(processes)
+    analysis_pool = create_pool(workers) if workers else None
+
+    def audit(url: str) -> LeoState:
+        try:
+            return run_pipeline(url, session=session, analysis_pool=analysis_pool, lean=lean)
+        except Exception as e:
+            logger.error(f"[LEO] ❌ Audit failed for {url}: {e}")
+            return LeoState(url=url, error=str(e))
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="leo-batch") as pool:
+            pending = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < 2 * concurrency:
+                    url = next(url_iter, None)
+                    if url is None:
+                        exhausted = True
+                    else:
+                        pending.add(pool.submit(audit, url))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    state = future.result()
+                    if state.error:
+                        stats.failed += 1
+                    stats.completed += 1
+                    yield state
+    finally:
+        stats.finished_at = time.perf_counter()
+        session.close()
+        if analysis_pool is not None:
+            analysis_pool.shutdown(cancel_futures=True)
+
+
+__all__ = ["BatchStats", "read_url_file", "run_pipeline_many"]
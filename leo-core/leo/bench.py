@@ -0,0 +1,246 @@
+"""
+leo/bench.py
+Offline benchmark harness for LEO Core (`leo bench`).
+
+A synthetic HTML corpus (small, median and multi-megabyte pages dense with
+images and links) is served from a local stub HTTP server, and the harness
+measures end-to-end `run_pipeline` throughput, per-agent timings, peak Python
+memory, batch throughput and DB write rates against throwaway databases.
+Results are flat `name -> value` JSON; `compare()` checks them against a saved
+baseline and reports every metric that regressed beyond the tolerance.
+"""
+
+import json
+import os
+import platform
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from leo import db
+from leo.utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# sections, images and links per page size
+CORPUS_SHAPES = {
+    "small": (5, 5, 10),
+    "median": (60, 40, 120),
+    "large": (2500, 2000, 6000),
+}
+
+# Metrics where a larger value is better; everything else (ms, bytes) should not grow.
+HIGHER_IS_BETTER_SUFFIXES = ("_per_s",)
+
+
+def generate_page(sections: int, images: int, links: int, seed: int = 0) -> str:
+    """Build a deterministic HTML page of the requested shape."""
+    words = ("cloud", "data", "platform", "model", "insight", "visibility", "search", "content")
+    parts = [
+        "<html><head><title>LEO bench page</title>",
+        "<meta charset='utf-8'><meta name='description' content='benchmark'>",
+        "<script>var tracking = {enabled: true};</script><style>p { margin: 0 }</style></head><body>",
+    ]
+    for i in range(sections):
+        text = " ".join(words[(i + j + seed) % len(words)] for j in range(40))
+        parts.append(f"<section><h2>Section {i}</h2><p>{text}.</p>")
+        if i < images:
+            alt = f" alt='figure {i}'" if i % 3 else ""
+            parts.append(f"<img src='/img/{i}.png'{alt}>")
+        parts.append("</section>")
+    for i in range(images - min(images, sections)):
+        parts.append(f"<img src='/extra/{i}.png' alt='extra {i}'>")
+    parts.append("<nav>")
+    parts.extend(f"<a href='/page/{i}'>link {i}</a>" if i % 10 else "<a href='#top'>top</a>" for i in range(links))
+    parts.append("</nav></body></html>")
+    return "".join(parts)
+
+
+def generate_corpus(sizes: Sequence[str] = tuple(CORPUS_SHAPES)) -> Dict[str, str]:
+    """Return `{size: html}` for the requested corpus sizes."""
+    return {size: generate_page(*CORPUS_SHAPES[size]) for size in sizes}
+
+
+@contextmanager
+def serve_corpus(pages: Dict[str, str]) -> Iterator[str]:
+    """Serve `pages` at `/<name>` from a local HTTP server; yields the base URL."""
+    encoded = {f"/{name}": html.encode("utf-8") for name, html in pages.items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+        def do_GET(self):
+            body = encoded.get(self.path.split("?")[0])
+            self.send_response(200 if body is not None else 404)
+            body = body if body is not None else b"not found"
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def bench_pipeline(base_url: str, sizes: Sequence[str], iterations: int) -> Dict[str, float]:
+    """Sequential end-to-end audits per page size: throughput, latency, agent timings, peak memory."""
+    from leo.graph import run_pipeline
+
+    results: Dict[str, float] = {}
+    for size in sizes:
+        url = f"{base_url}/{size}"
+        run_pipeline(url, revalidate=False)  # warm-up: imports, pools, caches
+        latencies: List[float] = []
+        timings: Dict[str, List[float]] = {}
+        tracemalloc.start()
+        for _ in range(iterations):
+            started = time.perf_counter()
+            state = run_pipeline(url, revalidate=False)
+            latencies.append(time.perf_counter() - started)
+            for stage, seconds in state.timings.items():
+                timings.setdefault(stage, []).append(seconds)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[f"pipeline.{size}.audits_per_s"] = round(iterations / sum(latencies), 3)
+        results[f"pipeline.{size}.latency_p50_ms"] = round(statistics.median(latencies) * 1000, 3)
+        results[f"pipeline.{size}.peak_memory_bytes"] = peak
+        for stage, values in sorted(timings.items()):
+            results[f"pipeline.{size}.{stage}_ms"] = round(statistics.mean(values) * 1000, 3)
+    return results
+
+
+def bench_batch(base_url: str, sizes: Sequence[str], audits: int, concurrency: int) -> Dict[str, float]:
+    """Concurrent batch throughput over a mix of the corpus pages."""
+    from leo.batch import BatchStats, run_pipeline_many
+
+    urls = [f"{base_url}/{sizes[i % len(sizes)]}?n={i}" for i in range(audits)]
+    stats = BatchStats()
+    for _ in run_pipeline_many(urls, concurrency=concurrency, per_host=concurrency, stats=stats):
+        pass
+    return {f"batch.c{concurrency}.audits_per_s": round(stats.throughput, 3)}
+
+
+def bench_db_writes(engine: str, rows: int) -> Dict[str, float]:
+    """Single-row and bulk insert rates for the configured engine."""
+    started = time.perf_counter()
+    for i in range(rows):
+        db.save_score(f"https://bench.example/{i}", float(i % 100))
+    single = rows / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    db.save_scores([(f"https://bench.example/bulk/{i}", float(i % 100)) for i in range(rows * 10)])
+    bulk = rows * 10 / (time.perf_counter() - started)
+    return {
+        f"db.{engine}.single_writes_per_s": round(single, 1),
+        f"db.{engine}.bulk_writes_per_s": round(bulk, 1),
+    }
+
+
+def _postgres_available() -> bool:
+    try:
+        db.get_connection().close()
+        return True
+    except Exception as e:
+        logger.warning(f"[Bench] ⚠️ Postgres unavailable, skipping ({e})")
+        return False
+
+
+def run_benchmarks(
+    sizes: Sequence[str] = tuple(CORPUS_SHAPES),
+    iterations: int = 5,
+    batch_audits: int = 32,
+    concurrency: int = 8,
+    db_rows: int = 500,
+) -> Dict:
+    """Run every benchmark against throwaway databases and return the report."""
+    engine, sqlite_path, pg_config = db.DB_ENGINE, db.SQLITE_PATH, dict(db.POSTGRES_CONFIG)
+    results: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory(prefix="leo-bench-") as workdir:
+        try:
+            db.configure(engine="sqlite", sqlite_path=os.path.join(workdir, "bench.db"))
+            with serve_corpus(generate_corpus(sizes)) as base_url:
+                results.update(bench_pipeline(base_url, sizes, iterations))
+                results.update(bench_batch(base_url, list(sizes), batch_audits, concurrency))
+            results.update(bench_db_writes("sqlite", db_rows))
+            # Postgres writes go to a dedicated scratch database, never the configured one.
+            pg_database = os.getenv("LEO_BENCH_PG_DATABASE")
+            if pg_database:
+                db.configure(engine="postgres", database=pg_database)
+                if _postgres_available():
+                    results.update(bench_db_writes("postgres", db_rows))
+        finally:
+            db.configure(engine=engine, sqlite_path=sqlite_path, database=pg_config["database"])
+
+    from leo.utils.html_utils import default_backend
+
+    return {
+        "version": 1,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parser": default_backend(),
+            "iterations": iterations,
+        },
+        "results": results,
+    }
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float = 0.25) -> List[str]:
+    """
+    Return a description of every metric that regressed by more than `tolerance`
+    (a fraction) relative to the baseline. Throughput metrics (`*_per_s`) regress
+    when they drop; latency, timing and memory metrics regress when they grow.
+    """
+    regressions = []
+    for name, base in sorted(baseline.items()):
+        current = results.get(name)
+        if current is None or not base:
+            continue
+        change = (current - base) / base
+        if name.endswith(HIGHER_IS_BETTER_SUFFIXES):
+            regressed = change < -tolerance
+        else:
+            regressed = change > tolerance
+        if regressed:
+            regressions.append(f"{name}: {base} -> {current} ({change:+.0%})")
+    return regressions
+
+
+def load_report(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_report(report: Dict, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+__all__ = [
+    "compare",
+    "generate_corpus",
+    "generate_page",
+    "load_report",
+    "run_benchmarks",
+    "save_report",
+    "serve_corpus",
+]
@@ -0,0 +1,112 @@
+"""
+leo/cache.py
+In-memory caches for LEO Core.
+
+`TTLCache` is a thread-safe, size-bounded LRU map whose entries are fresh for
+`ttl` seconds and then servable as stale for a further `grace` window, for
+stale-while-revalidate callers. Hits, stale hits, misses and evictions are
+counted in `leo.telemetry` under the cache's name.
+
+The audit result cache (`get_result_cache()` / `result_key()`) is keyed by the
+normalized URL and the scoring configuration version, so edits to
+`weights.yml` never serve results computed with old weights.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from leo import telemetry
+from leo.agents.scoring_agent import weights_version
+from leo.utils.url_utils import normalize_url
+
+RESULT_CACHE_TTL = float(os.getenv("LEO_RESULT_CACHE_TTL", "900"))
+RESULT_CACHE_GRACE = float(os.getenv("LEO_RESULT_CACHE_GRACE", "3600"))
+RESULT_CACHE_SIZE = int(os.getenv("LEO_RESULT_CACHE_SIZE", "1024"))
+
+
+class TTLCache:
+    """LRU cache with per-entry expiry and an optional stale grace window."""
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1024,
+        ttl: float = 900.0,
+        grace: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.grace = grace
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, bool]]:
+        """Return `(value, fresh)` — `fresh` is False inside the grace window — or None on a miss."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = self.clock() - stored_at
+                if age <= self.ttl + self.grace:
+                    self._data.move_to_end(key)
+                    fresh = age <= self.ttl
+                    telemetry.inc("leo_cache_hits_total" if fresh else "leo_cache_stale_total", cache=self.name)
+                    return value, fresh
+                del self._data[key]
+        telemetry.inc("leo_cache_misses_total", cache=self.name)
+        return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (value, self.clock())
+            self._data.move_to_end(key)
+            evicted = 0
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+        telemetry.inc("leo_cache_evictions_total", evicted, cache=self.name)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def config_version() -> str:
+    """Version of the scoring configuration: the hash of the weights the ScoringAgent loads."""
+    return weights_version()
+
+
+def result_key(url: str) -> Tuple[str, str]:
+    return normalize_url(url), config_version()
+
+
+_result_cache: Optional[TTLCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> TTLCache:
+    """Return the process-wide audit result cache (LEO_RESULT_CACHE_TTL / _GRACE / _SIZE)."""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = TTLCache(
+                    "results", max_entries=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL, grace=RESULT_CACHE_GRACE
+                )
+    return _result_cache
+
+
+__all__ = ["TTLCache", "config_version", "get_result_cache", "result_key"]
@@ -2,16 +2,40 @@
 leo/db.py
 Handles database operations for LEO Core — supports SQLite (default)
 and optional PostgreSQL (via environment variables).
+
+Connections are pooled: SQLite keeps one connection per thread (WAL mode, so
+readers never block the writer), Postgres uses a thread-safe connection pool
+of `LEO_PG_POOL_MAX` connections; when all are borrowed, callers wait up to
+`LEO_PG_POOL_TIMEOUT` seconds for one to be returned.
+Use the `connection()` context manager rather than opening connections by hand.
+
+Nothing happens at import time: psycopg2 is only imported when the Postgres
+engine is used, and the schema is created on the first pooled connection
+(or explicitly via `init_db()`).
+
+Read paths run in SQL on indexes: per-URL history on `scores (url, timestamp)`,
+leaderboards on the `latest_scores` rollup (one row per URL, maintained by
+every write), and time-window aggregates on `scores (timestamp)`. List queries
+page with opaque keyset cursors instead of OFFSET.
+
+Each score row also keeps the metric values it was computed from (one column
+per name in `METRIC_COLUMNS`), so `rescore()` can re-weight the whole history
+in SQL without re-auditing anything.
 """
 
+import base64
+import functools
+import json
+import math
 import os
 import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Tuple, Optional
-
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Optional
 
+from leo import telemetry
 
 DB_ENGINE = os.getenv("LEO_DB_ENGINE", "sqlite")  # 'sqlite' or 'postgres'
 SQLITE_PATH = os.getenv("LEO_SQLITE_PATH", "/tmp/leo.db")
@@ -22,64 +46,651 @@ POSTGRES_CONFIG = {
     "password": os.getenv("LEO_PG_PASSWORD", "leo123"),
     "database": os.getenv("LEO_PG_DATABASE", "leodb"),
 }
+PG_POOL_MIN = int(os.getenv("LEO_PG_POOL_MIN", "1"))
+PG_POOL_MAX = int(os.getenv("LEO_PG_POOL_MAX", "10"))
+PG_POOL_TIMEOUT = float(os.getenv("LEO_PG_POOL_TIMEOUT", "30"))
+
+# Metrics stored alongside every score; LeoRank is a weighted sum of these.
+METRIC_COLUMNS = ("structure", "semantic", "retrieval")
+
+_local = threading.local()
+_pg_pool = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool.getconn() raises when all connections are out; callers queue here instead.
+_pg_slots = threading.BoundedSemaphore(max(1, PG_POOL_MAX))
+_schema_ready = False
+_schema_lock = threading.Lock()
+_generation = 0  # bumped by configure() so other threads drop stale SQLite connections
+
+
+def _instrumented(op: str):
+    """Record latency and failures of a DB call under `leo_db_duration_seconds{op=...}`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with telemetry.timed("leo_db_duration_seconds", error_counter="leo_db_errors_total", op=op):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _sql(query: str) -> str:
+    """Adapt a '?'-parameterized query to the active engine's placeholder style."""
+    return query if DB_ENGINE == "sqlite" else query.replace("?", "%s")
 
 
 def get_connection():
-    """Return a database connection depending on engine."""
+    """Return a new, unpooled database connection depending on engine."""
     if DB_ENGINE == "postgres":
+        import psycopg2
+        from psycopg2.extras import RealDictCursor
+
         return psycopg2.connect(**POSTGRES_CONFIG, cursor_factory=RealDictCursor)
-    conn = sqlite3.connect(SQLITE_PATH)
+    conn = sqlite3.connect(SQLITE_PATH, timeout=30)
     conn.row_factory = sqlite3.Row
     return conn
 
 
+def _sqlite_connection() -> sqlite3.Connection:
+    """Return this thread's SQLite connection, opening it on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "generation", None) != _generation:
+        conn = get_connection()
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn = conn
+        _local.generation = _generation
+    return conn
+
+
+def _postgres_pool():
+    global _pg_pool
+    if _pg_pool is None:
+        with _pool_lock:
+            if _pg_pool is None:
+                from psycopg2.extras import RealDictCursor
+                from psycopg2.pool import ThreadedConnectionPool
+
+                _pg_pool = ThreadedConnectionPool(
+                    PG_POOL_MIN, PG_POOL_MAX, cursor_factory=RealDictCursor, **POSTGRES_CONFIG
+                )
+    return _pg_pool
+
+
+def _ensure_schema() -> None:
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                init_db()
+
+
+@contextmanager
+def _raw_connection() -> Iterator[Any]:
+    if DB_ENGINE == "postgres":
+        pool = _postgres_pool()
+        if not _pg_slots.acquire(timeout=PG_POOL_TIMEOUT):
+            from psycopg2.pool import PoolError
+
+            raise PoolError(f"no pooled connection free after {PG_POOL_TIMEOUT:g}s (LEO_PG_POOL_MAX={PG_POOL_MAX})")
+        try:
+            conn = pool.getconn()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                pool.putconn(conn)
+        finally:
+            _pg_slots.release()
+        return
+
+    conn = _sqlite_connection()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+@contextmanager
+def connection() -> Iterator[Any]:
+    """Borrow a pooled connection; commits on success and rolls back on error."""
+    _ensure_schema()
+    with _raw_connection() as conn:
+        yield conn
+
+
+def close_connections() -> None:
+    """Close this thread's SQLite connection and the Postgres pool, if open."""
+    global _pg_pool
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+    with _pool_lock:
+        if _pg_pool is not None:
+            _pg_pool.closeall()
+            _pg_pool = None
+
+
+def configure(engine: Optional[str] = None, sqlite_path: Optional[str] = None, **postgres) -> None:
+    """
+    Point the module at another database at runtime (benchmarks, tests, tools).
+
+    Pooled connections are closed (other threads reopen theirs lazily) and the
+    schema is re-checked on next use. `postgres` overrides POSTGRES_CONFIG keys.
+    """
+    global DB_ENGINE, SQLITE_PATH, _schema_ready, _generation
+    close_connections()
+    if engine:
+        DB_ENGINE = engine
+    if sqlite_path:
+        SQLITE_PATH = sqlite_path
+    POSTGRES_CONFIG.update(postgres)
+    _schema_ready = False
+    _generation += 1
+
+
 def init_db():
-    """Initialize the scores table."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS scores (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            url TEXT,
-            rank FLOAT,
-            timestamp TEXT
+    """Initialize the scores and page_cache tables and their indexes (idempotent)."""
+    global _schema_ready
+    id_column = "id INTEGER PRIMARY KEY AUTOINCREMENT" if DB_ENGINE == "sqlite" else "id SERIAL PRIMARY KEY"
+    with _raw_connection() as conn:
+        cur = conn.cursor()
+        if DB_ENGINE == "sqlite":
+            # WAL is persistent on the database file; set it once, before concurrent use
+            cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS scores (
+                {id_column},
+                url TEXT,
+                rank FLOAT,
+                timestamp TEXT
+            )
+            """
         )
-        """
-    )
-    conn.commit()
-    conn.close()
+        _add_columns(cur, "scores", {column: "FLOAT" for column in METRIC_COLUMNS})
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_scores_url_timestamp ON scores (url, timestamp)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_scores_timestamp ON scores (timestamp)")
+        # Latest rank and audit count per URL, kept in step with scores
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS latest_scores (
+                url TEXT PRIMARY KEY,
+                rank FLOAT,
+                timestamp TEXT,
+                audits INTEGER
+            )
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_latest_scores_rank ON latest_scores (rank, url)")
+        # One-off backfill of the rollup for databases created before it existed.
+        cur.execute(
+            """
+            INSERT INTO latest_scores (url, rank, timestamp, audits)
+            SELECT s.url, MAX(s.rank), s.timestamp, c.audits
+            FROM scores s
+            JOIN (SELECT url, MAX(timestamp) AS latest, COUNT(*) AS audits FROM scores GROUP BY url) c
+              ON s.url = c.url AND s.timestamp = c.latest
+            WHERE NOT EXISTS (SELECT 1 FROM latest_scores)
+            GROUP BY s.url, s.timestamp, c.audits
+            """
+        )
+        # Last fetch validators and analysis per URL, used for conditional re-audits
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS page_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                metrics TEXT,
+                leo_rank FLOAT,
+                suggestions TEXT,
+                timestamp TEXT
+            )
+            """
+        )
+        _add_columns(cur, "page_cache", {"fingerprint": "TEXT"})
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_page_cache_timestamp ON page_cache (timestamp)")
+    _schema_ready = True
+
+
+def _add_columns(cur, table: str, columns: Dict[str, str]) -> None:
+    """Add the columns missing from a table created by an older release."""
+    if DB_ENGINE == "sqlite":
+        cur.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cur.fetchall()}
+        for column, kind in columns.items():
+            if column not in existing:
+                cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+    else:
+        for column, kind in columns.items():
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {kind}")
+
+
+_UPSERT_LATEST = """
+    INSERT INTO latest_scores (url, rank, timestamp, audits) VALUES (?, ?, ?, ?)
+    ON CONFLICT (url) DO UPDATE SET
+        rank = CASE WHEN excluded.timestamp >= latest_scores.timestamp THEN excluded.rank ELSE latest_scores.rank END,
+        timestamp = CASE WHEN excluded.timestamp >= latest_scores.timestamp
+                         THEN excluded.timestamp ELSE latest_scores.timestamp END,
+        audits = latest_scores.audits + excluded.audits
+"""
+
+
+def _latest_rows(values: List[Tuple[str, float, str]]) -> List[Tuple[str, float, str, int]]:
+    # Collapse to one row per URL: an upsert may not touch the same key twice in one statement.
+    latest: Dict[str, list] = {}
+    for url, rank, ts in values:
+        entry = latest.get(url)
+        if entry is None:
+            latest[url] = [url, rank, ts, 1]
+        else:
+            if ts >= entry[2]:
+                entry[1], entry[2] = rank, ts
+            entry[3] += 1
+    return [tuple(entry) for entry in latest.values()]
+
+
+_SCORE_INSERT_PREFIX = f"INSERT INTO scores (url, rank, timestamp, {', '.join(METRIC_COLUMNS)}) VALUES "
+_INSERT_SCORE = _SCORE_INSERT_PREFIX + f"(?, ?, ?, {', '.join('?' * len(METRIC_COLUMNS))})"
 
 
-def save_score(url: str, rank: float) -> None:
-    """Insert a new score entry."""
-    conn = get_connection()
-    cur = conn.cursor()
+def _metric_values(metrics: Optional[Dict[str, float]]) -> Tuple:
+    metrics = metrics or {}
+    return tuple(metrics.get(column) for column in METRIC_COLUMNS)
+
+
+@_instrumented("save_score")
+def save_score(url: str, rank: float, metrics: Optional[Dict[str, float]] = None) -> None:
+    """Insert a new score entry, with the metric values it was computed from."""
     ts = datetime.utcnow().isoformat()
-    cur.execute(
-        "INSERT INTO scores (url, rank, timestamp) VALUES (?, ?, ?)"
-        if DB_ENGINE == "sqlite"
-        else "INSERT INTO scores (url, rank, timestamp) VALUES (%s, %s, %s)",
-        (url, rank, ts),
-    )
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(_sql(_INSERT_SCORE), (url, rank, ts, *_metric_values(metrics)))
+        cur.execute(_sql(_UPSERT_LATEST), (url, rank, ts, 1))
+
+
+@_instrumented("save_scores")
+def save_scores(rows: Iterable[Tuple]) -> int:
+    """
+    Bulk-insert score entries in a single transaction.
+
+    Each row is `(url, rank)`, `(url, rank, timestamp)` or
+    `(url, rank, timestamp, metrics)`; missing timestamps default to now.
+    Returns the number of rows written.
+    """
+    ts = datetime.utcnow().isoformat()
+    values = [
+        (row[0], row[1], row[2] if len(row) > 2 and row[2] else ts, *_metric_values(row[3] if len(row) > 3 else None))
+        for row in rows
+    ]
+    if not values:
+        return 0
+    latest = _latest_rows([value[:3] for value in values])
+    with connection() as conn:
+        cur = conn.cursor()
+        if DB_ENGINE == "postgres":
+            from psycopg2.extras import execute_values
+
+            execute_values(cur, _SCORE_INSERT_PREFIX + "%s", values, page_size=1000)
+            execute_values(cur, _sql(_UPSERT_LATEST).replace("(%s, %s, %s, %s)", "%s"), latest, page_size=1000)
+        else:
+            cur.executemany(_INSERT_SCORE, values)
+            cur.executemany(_UPSERT_LATEST, latest)
+    return len(values)
 
 
+@_instrumented("get_recent_scores")
 def get_recent_scores(limit: int = 10) -> List[Tuple[str, float, str]]:
     """Fetch recent audit results."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT url, rank, timestamp FROM scores ORDER BY id DESC LIMIT ?"
-        if DB_ENGINE == "sqlite"
-        else "SELECT url, rank, timestamp FROM scores ORDER BY id DESC LIMIT %s",
-        (limit,),
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(_sql("SELECT url, rank, timestamp FROM scores ORDER BY id DESC LIMIT ?"), (limit,))
+        return cur.fetchall()
+
+
+def encode_cursor(*key) -> str:
+    """Opaque keyset cursor for the last row of a page."""
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(key, list) or len(key) != 2:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return key
+
+
+def _window(column: str, since: Optional[str], until: Optional[str]) -> Tuple[List[str], List[Any]]:
+    clauses, params = [], []
+    if since:
+        clauses.append(f"{column} >= ?")
+        params.append(since)
+    if until:
+        clauses.append(f"{column} < ?")
+        params.append(until)
+    return clauses, params
+
+
+@_instrumented("get_score_history")
+def get_score_history(
+    url: str,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One URL's scores, newest first, within an optional [since, until) window of
+    ISO timestamps. Returns `(rows, next_cursor)`; pass the cursor back for the
+    next page (None when there are no more rows).
+    """
+    clauses, params = _window("timestamp", since, until)
+    clauses.insert(0, "url = ?")
+    params.insert(0, url)
+    if cursor:
+        ts, row_id = decode_cursor(cursor)
+        clauses.append("(timestamp < ? OR (timestamp = ? AND id < ?))")
+        params += [ts, ts, row_id]
+    query = (
+        f"SELECT id, url, rank, timestamp FROM scores WHERE {' AND '.join(clauses)} "
+        "ORDER BY timestamp DESC, id DESC LIMIT ?"
     )
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(_sql(query), (*params, limit))
+        rows = [dict(r) for r in cur.fetchall()]
+    next_cursor = encode_cursor(rows[-1]["timestamp"], rows[-1]["id"]) if len(rows) == limit else None
+    return rows, next_cursor
+
+
+@_instrumented("get_leaderboard")
+def get_leaderboard(limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """URLs ranked by their latest LeoRank (highest first), from the `latest_scores` rollup."""
+    where, params = "", []
+    if cursor:
+        rank, url = decode_cursor(cursor)
+        where = "WHERE rank < ? OR (rank = ? AND url < ?)"
+        params = [rank, rank, url]
+    query = f"SELECT url, rank, timestamp, audits FROM latest_scores {where} ORDER BY rank DESC, url DESC LIMIT ?"
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(_sql(query), (*params, limit))
+        rows = [dict(r) for r in cur.fetchall()]
+    next_cursor = encode_cursor(rows[-1]["rank"], rows[-1]["url"]) if len(rows) == limit else None
+    return rows, next_cursor
 
 
-# Initialize DB automatically on import
-init_db()
+@_instrumented("get_rank_aggregates")
+def get_rank_aggregates(
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    url: Optional[str] = None,
+    percentiles: Iterable[float] = (0.5, 0.9),
+) -> Dict[str, Any]:
+    """
+    Count, mean, min, max and nearest-rank percentiles (`p50`, `p90`, ...) of
+    the scores in a [since, until) window, optionally for a single URL.
+    """
+    clauses, params = _window("timestamp", since, until)
+    if url:
+        clauses.append("url = ?")
+        params.append(url)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    result: Dict[str, Any] = {}
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            _sql(f"SELECT COUNT(*) AS n, AVG(rank) AS mean, MIN(rank) AS low, MAX(rank) AS high FROM scores {where}"),
+            params,
+        )
+        row = dict(cur.fetchone())
+        count = row["n"] or 0
+        result.update(count=count, avg=row["mean"], min=row["low"], max=row["high"])
+        for p in percentiles:
+            key = f"p{round(p * 100):g}"
+            if not count:
+                result[key] = None
+            elif DB_ENGINE == "postgres":
+                cur.execute(f"SELECT percentile_disc(%s) WITHIN GROUP (ORDER BY rank) AS v FROM scores {_sql(where)}", (p, *params))
+                result[key] = cur.fetchone()["v"]
+            else:
+                offset = max(0, math.ceil(p * count) - 1)
+                cur.execute(f"SELECT rank FROM scores {where} ORDER BY rank LIMIT 1 OFFSET ?", (*params, offset))
+                result[key] = cur.fetchone()[0]
+    return result
+
+
+@_instrumented("get_daily_aggregates")
+def get_daily_aggregates(
+    url: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Per-day count, mean, min and max rank (oldest day first), optionally for a single URL."""
+    clauses, params = _window("timestamp", since, until)
+    if url:
+        clauses.append("url = ?")
+        params.append(url)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    query = (
+        "SELECT SUBSTR(timestamp, 1, 10) AS day, COUNT(*) AS count, AVG(rank) AS avg, "
+        f"MIN(rank) AS min, MAX(rank) AS max FROM scores {where} GROUP BY SUBSTR(timestamp, 1, 10) ORDER BY day"
+    )
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(_sql(query), params)
+        return [dict(r) for r in cur.fetchall()]
+
+
+def iter_scores(
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    url: Optional[str] = None,
+    batch_size: int = 2000,
+) -> Iterator[Tuple[int, str, float, str]]:
+    """
+    Stream `(id, url, rank, timestamp)` rows in id order without loading the table.
+
+    Postgres uses a named (server-side) cursor fetching `batch_size` rows per
+    round trip; SQLite iterates a cursor on a dedicated connection, so the
+    generator may be resumed from any thread (e.g. a streaming HTTP response).
+    Close the generator to release the connection early.
+    """
+    _ensure_schema()
+    clauses, params = _window("timestamp", since, until)
+    if url:
+        clauses.append("url = ?")
+        params.append(url)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    query = _sql(f"SELECT id, url, rank, timestamp FROM scores {where} ORDER BY id")
+
+    if DB_ENGINE == "postgres":
+        with _raw_connection() as conn:
+            try:
+                with conn.cursor(name=f"leo_export_{uuid.uuid4().hex}") as cur:
+                    cur.itersize = batch_size
+                    cur.execute(query, params)
+                    for row in cur:
+                        yield row["id"], row["url"], row["rank"], row["timestamp"]
+            except GeneratorExit:
+                # Abandoned mid-stream: end the read transaction before the connection goes back to the pool.
+                conn.rollback()
+                raise
+        return
+
+    conn = sqlite3.connect(SQLITE_PATH, timeout=30, check_same_thread=False)
+    try:
+        cur = conn.execute(query, params)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+
+@_instrumented("get_page_snapshot")
+def get_page_snapshot(url: str) -> Optional[Dict[str, Any]]:
+    """Return the stored validators and analysis for a URL, or None."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            _sql(
+                "SELECT etag, last_modified, content_hash, metrics, leo_rank, suggestions "
+                "FROM page_cache WHERE url = ?"
+            ),
+            (url,),
+        )
+        row = cur.fetchone()
+    if row is None:
+        return None
+    return {
+        "etag": row["etag"],
+        "last_modified": row["last_modified"],
+        "content_hash": row["content_hash"],
+        "metrics": json.loads(row["metrics"] or "{}"),
+        "leo_rank": row["leo_rank"],
+        "suggestions": json.loads(row["suggestions"] or "[]"),
+    }
+
+
+@_instrumented("save_page_snapshot")
+def save_page_snapshot(
+    url: str,
+    etag: Optional[str],
+    last_modified: Optional[str],
+    content_hash: Optional[str],
+    metrics: Dict[str, float],
+    leo_rank: float,
+    suggestions: List[str],
+    fingerprint: Optional[str] = None,
+) -> None:
+    """Insert or replace the validators, content fingerprint and analysis stored for a URL."""
+    ts = datetime.utcnow().isoformat()
+    with connection() as conn:
+        conn.cursor().execute(
+            _sql(
+                """
+                INSERT INTO page_cache
+                    (url, etag, last_modified, content_hash, metrics, leo_rank, suggestions, timestamp, fingerprint)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash,
+                    metrics = excluded.metrics,
+                    leo_rank = excluded.leo_rank,
+                    suggestions = excluded.suggestions,
+                    timestamp = excluded.timestamp,
+                    fingerprint = excluded.fingerprint
+                """
+            ),
+            (
+                url,
+                etag,
+                last_modified,
+                content_hash,
+                json.dumps(metrics),
+                leo_rank,
+                json.dumps(suggestions),
+                ts,
+                fingerprint,
+            ),
+        )
+
+
+@_instrumented("get_recent_fingerprints")
+def get_recent_fingerprints(since: str) -> List[Dict[str, Any]]:
+    """Fingerprinted snapshots stored at or after `since`, oldest first (seeds the near-duplicate index)."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            _sql(
+                "SELECT url, fingerprint, metrics, suggestions, timestamp FROM page_cache "
+                "WHERE fingerprint IS NOT NULL AND timestamp >= ? ORDER BY timestamp"
+            ),
+            (since,),
+        )
+        rows = cur.fetchall()
+    return [
+        {
+            "url": row["url"],
+            "fingerprint": row["fingerprint"],
+            "metrics": json.loads(row["metrics"] or "{}"),
+            "suggestions": json.loads(row["suggestions"] or "[]"),
+            "timestamp": row["timestamp"],
+        }
+        for row in rows
+    ]
+
+
+@_instrumented("rescore")
+def rescore(coefficients: Dict[str, float], chunk_size: int = 100000) -> Dict[str, int]:
+    """
+    Recompute every stored LeoRank as the coefficient-weighted mean of its
+    non-NULL metric columns (rounded to 2 places), without re-auditing.
+
+    `scores` is updated set-based in SQL, one transaction per `chunk_size` ids;
+    rows saved before metrics were stored are left as they are. The
+    `latest_scores` rollup and the `page_cache` snapshots (reused for unchanged
+    pages) are then brought in line. Returns row counts per table and `skipped`.
+    """
+    unknown = set(coefficients) - set(METRIC_COLUMNS)
+    if unknown:
+        raise ValueError(f"No stored values for metrics: {', '.join(sorted(unknown))}")
+    terms = [(column, float(coefficients.get(column, 0.0))) for column in METRIC_COLUMNS]
+    numerator = " + ".join(f"COALESCE({column}, 0) * ?" for column, _ in terms)
+    denominator = " + ".join(f"CASE WHEN {column} IS NULL THEN 0 ELSE ? END" for column, _ in terms)
+    scored = " OR ".join(f"{column} IS NOT NULL" for column, _ in terms)
+    weights = [w for _, w in terms] * 2
+    counts = {"scores": 0, "latest_scores": 0, "page_cache": 0, "skipped": 0}
+
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT MIN(id) AS low, MAX(id) AS high, COUNT(*) AS n FROM scores")
+        row = dict(cur.fetchone())
+    low, high, total = row["low"], row["high"], row["n"] or 0
+    if low is not None:
+        update = _sql(
+            f"UPDATE scores SET rank = ROUND(CAST(({numerator}) / NULLIF({denominator}, 0) AS NUMERIC), 2) "
+            f"WHERE id >= ? AND id < ? AND ({scored})"
+        )
+        for start in range(low, high + 1, chunk_size):
+            with connection() as conn:
+                cur = conn.cursor()
+                cur.execute(update, (*weights, start, start + chunk_size))
+                counts["scores"] += cur.rowcount
+    counts["skipped"] = total - counts["scores"]
+
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            UPDATE latest_scores SET rank = (
+                SELECT MAX(s.rank) FROM scores s WHERE s.url = latest_scores.url AND s.timestamp = latest_scores.timestamp
+            )
+            WHERE EXISTS (SELECT 1 FROM scores s WHERE s.url = latest_scores.url AND s.timestamp = latest_scores.timestamp)
+            """
+        )
+        counts["latest_scores"] = cur.rowcount
+        cur.execute("SELECT url, metrics FROM page_cache")
+        snapshots = []
+        for snapshot in cur.fetchall():
+            metrics = json.loads(snapshot["metrics"] or "{}")
+            present = [(metrics[column], w) for column, w in terms if metrics.get(column) is not None]
+            total = sum(w for _, w in present)
+            if total:
+                snapshots.append((round(sum(value * w for value, w in present) / total, 2), snapshot["url"]))
+        cur.executemany(_sql("UPDATE page_cache SET leo_rank = ? WHERE url = ?"), snapshots)
+        counts["page_cache"] = len(snapshots)
+    return counts
@@ -0,0 +1,244 @@
+"""
+leo/dedup.py
+Near-duplicate page detection for the audit pipeline.
+
+`simhash(text)` reduces a page's visible text to a 64-bit SimHash over
+3-word shingles: pages that differ by a few words get fingerprints a few bits
+apart. In the pipeline the fingerprint comes with `state.text_stats`, computed
+from the crawler's single tokenization pass (`simhash_tokens`).
+
+`SimHashIndex` stores recently analyzed pages by fingerprint and finds one
+within `max_distance` bits without scanning: it keeps sorted tables keyed on
+pairs of bit blocks (Manku-style permuted tables), so a lookup is a few binary
+searches plus a distance check of the handful of entries sharing a key.
+
+The DedupAgent looks each crawled page up in the process-wide index
+(`get_dedup_index()`, seeded from the fingerprints stored in `page_cache`) and,
+on a hit, reuses the match's semantic score and suggestions.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from itertools import combinations
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from leo.utils.log_utils import get_logger
+from leo.utils.text_utils import SIMHASH_MIN_WORDS, SIMHASH_SHINGLE, simhash_tokens, tokenize
+from leo.utils.url_utils import normalize_url
+
+logger = get_logger(__name__)
+
+DEDUP_ENABLED = os.getenv("LEO_DEDUP", "1") != "0"
+DEDUP_MAX_DISTANCE = int(os.getenv("LEO_DEDUP_MAX_DISTANCE", "6"))
+DEDUP_TTL = float(os.getenv("LEO_DEDUP_TTL", "86400"))
+DEDUP_SIZE = int(os.getenv("LEO_DEDUP_SIZE", "100000"))
+MIN_WORDS = SIMHASH_MIN_WORDS
+SHINGLE = SIMHASH_SHINGLE
+
+
+def simhash(text: str, shingle: int = SHINGLE) -> Optional[int]:
+    """64-bit SimHash of the text's word shingles, or None for texts under `MIN_WORDS` words."""
+    return simhash_tokens(tokenize(text or ""), shingle)
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+@dataclass
+class DuplicateMatch:
+    """A previously analyzed page whose fingerprint is within the distance threshold."""
+
+    url: str
+    distance: int
+    metrics: Dict[str, float]
+    suggestions: List[str]
+
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _hamming_many(fingerprints: np.ndarray, fingerprint: int) -> np.ndarray:
+    diff = (fingerprints ^ np.uint64(fingerprint)).astype("<u8")
+    return _POPCOUNT[diff.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class SimHashIndex:
+    """
+    Permuted-table SimHash index (Manku et al.) with per-entry expiry and LRU
+    eviction; one entry per (normalized) URL.
+
+    The 64 bits are cut into `max_distance + 2` blocks. Two fingerprints within
+    `max_distance` bits differ in at most that many blocks, so they agree
+    exactly on at least two; one table per pair of blocks, sorted by that
+    pair's bits, narrows a lookup to the entries sharing a ~16-bit key (for the
+    default distance of 6: 28 tables of 16-bit keys). Each table is a sorted
+    NumPy array probed by binary search, so a lookup inspects about
+    `tables * size / 2**key_bits` candidates (~45 at 100k entries) and costs
+    O(tables · log n). New entries go to a tail of at most `merge_every`
+    that is compared directly, then are merged into the sorted tables
+    (O(tables · n) copying per merge). Memory is about `tables * 16` bytes per
+    entry (~45 MB at 100k entries).
+    """
+
+    def __init__(
+        self,
+        max_distance: int = DEDUP_MAX_DISTANCE,
+        ttl: float = DEDUP_TTL,
+        max_entries: int = DEDUP_SIZE,
+        clock=time.time,
+        merge_every: int = 256,
+    ):
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.merge_every = merge_every
+        blocks = max_distance + 2
+        edges = [round(i * 64 / blocks) for i in range(blocks + 1)]
+        spans = [(lo, hi - lo) for lo, hi in zip(edges, edges[1:])]
+        self._keys = [(spans[i], spans[j]) for i, j in combinations(range(blocks), 2)]
+        self._lock = threading.Lock()
+        # slot -> (url, fingerprint, metrics, suggestions, stored_at), None once removed
+        self._slots: List[Optional[Tuple[str, int, Dict[str, float], List[str], float]]] = []
+        self._by_url: "OrderedDict[str, int]" = OrderedDict()  # LRU order
+        self._indexed = 0  # slots [0, _indexed) are in the tables, the rest form the tail
+        self._fingerprints = np.zeros(merge_every, dtype="<u8")  # by slot, grown by doubling
+        # per block pair: (sorted keys, slot of each key)
+        self._tables: List[Tuple[np.ndarray, np.ndarray]] = [
+            (np.zeros(0, dtype="<u8"), np.zeros(0, dtype=np.int64)) for _ in self._keys
+        ]
+
+    def _table_keys(self, fingerprints: np.ndarray, spec) -> np.ndarray:
+        (lo_a, width_a), (lo_b, width_b) = spec
+        a = (fingerprints >> np.uint64(lo_a)) & np.uint64((1 << width_a) - 1)
+        b = (fingerprints >> np.uint64(lo_b)) & np.uint64((1 << width_b) - 1)
+        return (a << np.uint64(width_b)) | b
+
+    def _rebuild(self) -> None:
+        # Drop removed slots, renumbering the live ones in LRU order, and re-sort every table.
+        live = [self._slots[slot] for slot in self._by_url.values()]
+        self._slots = live
+        self._by_url = OrderedDict((entry[0], slot) for slot, entry in enumerate(live))
+        self._indexed = len(live)
+        indexed = np.fromiter((entry[1] for entry in live), dtype="<u8", count=len(live))
+        self._fingerprints = np.zeros(max(2 * len(live), self.merge_every), dtype="<u8")
+        self._fingerprints[: len(live)] = indexed
+        self._tables = []
+        for spec in self._keys:
+            keys = self._table_keys(indexed, spec)
+            order = np.argsort(keys, kind="stable")
+            self._tables.append((keys[order], order))
+
+    def _merge(self) -> None:
+        # Insert the sorted tail into every table: O(n) copying per table, no re-sort.
+        slots = np.arange(self._indexed, len(self._slots))
+        fingerprints = self._fingerprints[self._indexed : len(self._slots)]
+        for i, spec in enumerate(self._keys):
+            keys, table_slots = self._tables[i]
+            new = self._table_keys(fingerprints, spec)
+            order = np.argsort(new, kind="stable")
+            at = keys.searchsorted(new[order], "right")
+            self._tables[i] = (np.insert(keys, at, new[order]), np.insert(table_slots, at, slots[order]))
+        self._indexed = len(self._slots)
+
+    def _remove(self, url: str) -> None:
+        self._slots[self._by_url.pop(url)] = None
+
+    def add(
+        self,
+        url: str,
+        fingerprint: int,
+        metrics: Dict[str, float],
+        suggestions: List[str],
+        stored_at: Optional[float] = None,
+    ) -> None:
+        with self._lock:
+            if url in self._by_url:
+                self._remove(url)
+            slot = len(self._slots)
+            if slot == len(self._fingerprints):
+                self._fingerprints = np.concatenate([self._fingerprints, np.zeros_like(self._fingerprints)])
+            self._fingerprints[slot] = fingerprint
+            self._by_url[url] = slot
+            self._slots.append((url, fingerprint, dict(metrics), list(suggestions), stored_at or self.clock()))
+            while len(self._by_url) > self.max_entries:
+                self._remove(next(iter(self._by_url)))
+            if len(self._slots) - self._indexed >= self.merge_every:
+                # Replaced and evicted entries leave dead slots behind; compact once they are half the slots.
+                self._rebuild() if len(self._slots) > 2 * len(self._by_url) else self._merge()
+
+    def _candidates(self, fingerprint: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Slots that may be within `max_distance` bits, with their fingerprints."""
+        found = [np.arange(self._indexed, len(self._slots))]
+        for ((lo_a, width_a), (lo_b, width_b)), (keys, slots) in zip(self._keys, self._tables):
+            a, b = (fingerprint >> lo_a) & ((1 << width_a) - 1), (fingerprint >> lo_b) & ((1 << width_b) - 1)
+            key = np.uint64(a << width_b | b)  # a plain int would promote the whole table to float64
+            lo, hi = keys.searchsorted(key, "left"), keys.searchsorted(key, "right")
+            if hi > lo:
+                found.append(slots[lo:hi])
+        candidates = np.unique(np.concatenate(found))
+        return candidates, self._fingerprints[candidates]
+
+    def find(self, fingerprint: int, exclude: Optional[str] = None) -> Optional[DuplicateMatch]:
+        """The closest fresh entry within `max_distance` bits, other than `exclude`."""
+        now = self.clock()
+        best = None
+        with self._lock:
+            slots, fingerprints = self._candidates(fingerprint)
+            distances = _hamming_many(fingerprints, fingerprint)
+            close = distances <= self.max_distance
+            for distance, slot in sorted(zip(distances[close].tolist(), slots[close].tolist())):
+                entry = self._slots[slot]
+                if entry is None or entry[0] == exclude:
+                    continue
+                url, _, metrics, suggestions, stored_at = entry
+                if now - stored_at > self.ttl:
+                    self._remove(url)
+                    continue
+                best = DuplicateMatch(url, distance, metrics, suggestions)
+                self._by_url.move_to_end(url)
+                break
+        return best
+
+    def __len__(self) -> int:
+        return len(self._by_url)
+
+
+_index: Optional[SimHashIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_dedup_index() -> SimHashIndex:
+    """The process-wide index, seeded on first use with fingerprints stored within the TTL."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                from leo.db import get_recent_fingerprints
+
+                index = SimHashIndex()
+                since = datetime.utcnow() - timedelta(seconds=index.ttl)
+                try:
+                    for row in get_recent_fingerprints(since.isoformat()):
+                        stored_at = time.time() - (datetime.utcnow() - datetime.fromisoformat(row["timestamp"])).total_seconds()
+                        index.add(
+                            normalize_url(row["url"]),
+                            int(row["fingerprint"], 16),
+                            row["metrics"],
+                            row["suggestions"],
+                            stored_at,
+                        )
+                except Exception as e:
+                    logger.warning(f"[Dedup] ⚠️ Could not seed the near-duplicate index from the database: {e}")
+                _index = index
+    return _index
+
+
+__all__ = ["DuplicateMatch", "SimHashIndex", "get_dedup_index", "hamming", "simhash"]
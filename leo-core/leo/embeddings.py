@@ -0,0 +1,315 @@
+"""
+leo/embeddings.py
+Embedding provider layer used by the SemanticAgent.
+
+Providers share one method, `embed(chunks) -> np.ndarray`, and compose:
+
+    FallbackEmbeddingProvider(
+        CachedEmbeddingProvider(BatchingEmbeddingProvider(OpenAIEmbeddingProvider()), EmbeddingCache()),
+        LocalEmbeddingProvider(),
+    )
+
+- `EmbeddingCache` is an on-disk SQLite store keyed by a hash of (model, chunk)
+  with size-based LRU eviction, so re-audits of identical content are free.
+- `BatchingEmbeddingProvider` coalesces concurrent `embed` calls (e.g. the
+  pages of a batch run) into one upstream request.
+- `FallbackEmbeddingProvider` switches to the local NumPy backend when the
+  remote provider is unreachable.
+- `FakeEmbeddingProvider` is a deterministic, network-free stand-in for tests.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from leo import telemetry
+from leo.utils.log_utils import get_logger
+from leo.utils.metrics_utils import embed_texts
+from leo.utils.openai_utils import get_client
+
+logger = get_logger(__name__)
+
+EMBEDDING_MODEL = os.getenv("LEO_EMBEDDING_MODEL", "text-embedding-3-small")
+CACHE_PATH = os.getenv("LEO_EMBEDDING_CACHE", "/tmp/leo-embeddings.db")
+CACHE_MAX_BYTES = int(float(os.getenv("LEO_EMBEDDING_CACHE_MB", "256")) * 1024 * 1024)
+
+
+class EmbeddingProvider(ABC):
+    """Base class: `name` identifies the vector space and namespaces cache entries."""
+
+    name = "base"
+
+    @abstractmethod
+    def embed(self, chunks: Sequence[str]) -> np.ndarray:
+        """One row per chunk, in order."""
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """Deterministic offline embeddings from `metrics_utils.embed_texts`."""
+
+    def __init__(self, dimensions: int = 64):
+        self.dimensions = dimensions
+        self.name = f"local-{dimensions}"
+
+    def embed(self, chunks: Sequence[str]) -> np.ndarray:
+        return embed_texts(chunks, dimensions=self.dimensions)
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI embeddings, sending up to `batch_size` chunks per request."""
+
+    def __init__(self, model: str = EMBEDDING_MODEL, batch_size: int = 1024, client=None):
+        self.model = model
+        self.name = f"openai:{model}"
+        self.batch_size = batch_size
+        self.client = client or get_client()
+        if self.client is None:
+            raise RuntimeError("OpenAI client unavailable (missing OPENAI_API_KEY or SDK)")
+
+    def embed(self, chunks: Sequence[str]) -> np.ndarray:
+        vectors = []
+        for i in range(0, len(chunks), self.batch_size):
+            response = self.client.embeddings.create(input=list(chunks[i : i + self.batch_size]), model=self.model)
+            vectors.extend(item.embedding for item in response.data)
+        return np.asarray(vectors, dtype=float)
+
+
+class FakeEmbeddingProvider(EmbeddingProvider):
+    """Network-free provider for tests: records every request and can simulate outages."""
+
+    def __init__(self, dimensions: int = 16, fail: bool = False):
+        self.name = f"fake-{dimensions}"
+        self.dimensions = dimensions
+        self.fail = fail
+        self.requests: List[List[str]] = []
+
+    def embed(self, chunks: Sequence[str]) -> np.ndarray:
+        self.requests.append(list(chunks))
+        if self.fail:
+            raise ConnectionError("fake provider offline")
+        return embed_texts(chunks, dimensions=self.dimensions)
+
+
+class FallbackEmbeddingProvider(EmbeddingProvider):
+    """
+    Use `primary`, switching the whole call to `fallback` when it raises.
+    `name` reports the provider that served this thread's last call.
+    """
+
+    def __init__(self, primary: EmbeddingProvider, fallback: EmbeddingProvider):
+        self.primary = primary
+        self.fallback = fallback
+        self._served = threading.local()
+
+    @property
+    def name(self) -> str:
+        return getattr(self._served, "provider", self.primary).name
+
+    def embed(self, chunks: Sequence[str]) -> np.ndarray:
+        try:
+            vectors = self.primary.embed(chunks)
+            self._served.provider = self.primary
+            return vectors
+        except Exception as e:
+            logger.warning(f"[Embeddings] ⚠️ {self.primary.name} failed — using {self.fallback.name} ({e})")
+            vectors = self.fallback.embed(chunks)
+            self._served.provider = self.fallback
+            return vectors
+
+
+class EmbeddingCache:
+    """On-disk embedding store keyed by content hash, evicting least recently used entries by size."""
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB,
+                size INTEGER,
+                last_access REAL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)")
+        self._conn.commit()
+        self.total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def key(model: str, chunk: str) -> str:
+        return hashlib.sha256(f"{model}\0{chunk}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Return cached vectors for the keys present, refreshing their recency."""
+        found: Dict[str, np.ndarray] = {}
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                batch = list(keys[i : i + 500])
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update((key, np.frombuffer(blob, dtype=np.float32).astype(float)) for key, blob in rows)
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?", [(now, key) for key in found]
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        telemetry.inc("leo_cache_hits_total", len(found), cache="embeddings")
+        telemetry.inc("leo_cache_misses_total", len(keys) - len(found), cache="embeddings")
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Store vectors (as float32) and evict the least recently used entries beyond `max_bytes`."""
+        now = time.time()
+        rows = [(key, np.asarray(v, dtype=np.float32).tobytes(), now) for key, v in items.items()]
+        with self._lock:
+            for key, blob, ts in rows:
+                previous = self._conn.execute("SELECT size FROM embeddings WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, blob, len(blob), ts),
+                )
+                self.total_bytes += len(blob) - (previous[0] if previous else 0)
+            if self.total_bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+            self._conn.commit()
+
+    def _evict(self, target_bytes: int) -> None:
+        doomed, freed = [], 0
+        excess = self.total_bytes - target_bytes
+        for key, size in self._conn.execute("SELECT key, size FROM embeddings ORDER BY last_access"):
+            if freed >= excess:
+                break
+            doomed.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+        self.total_bytes -= freed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CachedEmbeddingProvider(EmbeddingProvider):
+    """Serve repeated chunks from an `EmbeddingCache`; only misses reach the wrapped provider."""
+
+    def __init__(self, provider: EmbeddingProvider, cache: EmbeddingCache):
+        self.provider = provider
+        self.cache = cache
+        self.name = provider.name
+
+    def embed(self, chunks: Sequence[str]) -> np.ndarray:
+        keys = [EmbeddingCache.key(self.name, chunk) for chunk in chunks]
+        found = self.cache.get_many(list(dict.fromkeys(keys)))
+        missing: Dict[str, str] = {}
+        for key, chunk in zip(keys, chunks):
+            if key not in found:
+                missing.setdefault(key, chunk)
+        if missing:
+            vectors = self.provider.embed(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(fresh)
+            found.update(fresh)
+        if not keys:
+            return np.zeros((0, 0), dtype=float)
+        return np.vstack([found[key] for key in keys])
+
+
+class BatchingEmbeddingProvider(EmbeddingProvider):
+    """
+    Coalesce concurrent `embed` calls into single upstream requests.
+
+    The first caller of a batch waits up to `max_wait` seconds (or until
+    `max_batch` chunks are queued) for other threads to join, then issues
+    one request for everyone and hands each caller its slice.
+    """
+
+    def __init__(self, provider: EmbeddingProvider, max_batch: int = 1024, max_wait: float = 0.02):
+        self.provider = provider
+        self.name = provider.name
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._pending: List[tuple] = []
+        self._pending_chunks = 0
+
+    def embed(self, chunks: Sequence[str]) -> np.ndarray:
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((list(chunks), future))
+            self._pending_chunks += len(chunks)
+            leader = len(self._pending) == 1
+            if self._pending_chunks >= self.max_batch:
+                self._cond.notify_all()
+        if leader:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending_chunks >= self.max_batch, timeout=self.max_wait)
+                batch, self._pending, self._pending_chunks = self._pending, [], 0
+            self._flush(batch)
+        return future.result()
+
+    def _flush(self, batch: List[tuple]) -> None:
+        try:
+            vectors = self.provider.embed([chunk for chunks, _ in batch for chunk in chunks])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        offset = 0
+        for chunks, future in batch:
+            future.set_result(vectors[offset : offset + len(chunks)])
+            offset += len(chunks)
+
+
+_default_provider: Optional[EmbeddingProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """Return the process-wide provider: cached, batched OpenAI with local fallback, or local only."""
+    global _default_provider
+    if _default_provider is None:
+        with _provider_lock:
+            if _default_provider is None:
+                local = LocalEmbeddingProvider()
+                if get_client() is None:
+                    _default_provider = local
+                else:
+                    remote = BatchingEmbeddingProvider(OpenAIEmbeddingProvider())
+                    _default_provider = FallbackEmbeddingProvider(
+                        CachedEmbeddingProvider(remote, EmbeddingCache()), local
+                    )
+    return _default_provider
+
+
+__all__ = [
+    "BatchingEmbeddingProvider",
+    "CachedEmbeddingProvider",
+    "EmbeddingCache",
+    "EmbeddingProvider",
+    "FakeEmbeddingProvider",
+    "FallbackEmbeddingProvider",
+    "LocalEmbeddingProvider",
+    "OpenAIEmbeddingProvider",
+    "get_embedding_provider",
+]
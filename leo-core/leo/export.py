@@ -0,0 +1,73 @@
+"""
+leo/export.py
+Streaming export of the audit history as NDJSON or CSV, optionally gzip-compressed.
+
+Rows come from `db.iter_scores` (server-side cursors) and are encoded into
+byte chunks of roughly `chunk_bytes`, so memory stays constant whatever the
+table size. Used by `GET /export` and `leo export`.
+"""
+
+import csv
+import io
+import json
+import zlib
+from typing import Iterable, Iterator, Optional, Tuple
+
+from leo import db
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+COLUMNS = ("id", "url", "rank", "timestamp")
+
+
+def encode_rows(rows: Iterable[Tuple], fmt: str = "ndjson", chunk_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    """Encode `(id, url, rank, timestamp)` rows as NDJSON or CSV (with header) byte chunks."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    buffer = io.StringIO()
+    if fmt == "csv":
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(COLUMNS)
+        write = writer.writerow
+    else:
+        def write(row):
+            buffer.write(json.dumps(dict(zip(COLUMNS, row))))
+            buffer.write("\n")
+
+    for row in rows:
+        write(row)
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a byte stream into a gzip stream incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_scores(
+    fmt: str = "ndjson",
+    compress: bool = False,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    url: Optional[str] = None,
+) -> Iterator[bytes]:
+    """Byte chunks of the score history export."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    chunks = encode_rows(db.iter_scores(since=since, until=until, url=url), fmt)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+__all__ = ["FORMATS", "encode_rows", "export_scores", "gzip_chunks"]
@@ -2,56 +2,394 @@
 leo/graph.py
 Defines the LangGraph-style pipeline orchestrating LEO Core agents.
 Each agent reads and writes to a shared LeoState object.
+
+Agents declare the state artifacts they read (`inputs`) and write (`outputs`);
+`PipelineGraph` turns those declarations into a dependency DAG and runs every
+node whose inputs are ready concurrently on a shared thread pool, so Structure
+and Semantic overlap, and blocking OpenAI calls no longer serialize the audit:
+
+    crawler ─┬─> structure ────────────┬─> scoring ──> advisor
+             ├─> dedup ──> semantic  ─┤
+             └─> retrieval ───────────┘
+
+Agents come from a registry (`register_agent`), and a graph can be narrowed
+to the agents needed for a set of requested outputs (`PipelineGraph.select`),
+so a caller that wants only the structure score never pays for embeddings or
+the Advisor's LLM call. The DedupAgent looks up each page's fingerprint so a
+near-duplicate of a recently audited page reuses its semantic score and
+suggestions (see leo/dedup.py); the fingerprint is also an Advisor input.
+
+In lean mode (`execute(..., lean=True)`) the raw artifacts in `RELEASABLE`
+are dropped from the state as soon as every agent that reads them has
+finished, so only compact results (counts, hashes, metrics) outlive the
+analysis. Every run records the high-water mark of the bytes those raw
+artifacts held in `state.peak_bytes`.
 """
 
-from leo.state import LeoState
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from leo import telemetry
+from leo.state import LeoState, PageValidators
 from leo.agents.crawler_agent import CrawlerAgent
 from leo.agents.structure_agent import StructureAgent
+from leo.agents.dedup_agent import DedupAgent
 from leo.agents.semantic_agent import SemanticAgent
-from leo.agents.scoring_agent import ScoringAgent
+from leo.agents.retrieval_agent import RetrievalAgent
+from leo.agents.scoring_agent import SCORED_METRICS, ScoringAgent
 from leo.agents.advisor_agent import AdvisorAgent
-from leo.db import save_score
+from leo.embeddings import LocalEmbeddingProvider, get_embedding_provider
+from leo.db import get_page_snapshot, save_page_snapshot, save_score
+from leo.dedup import DEDUP_ENABLED, get_dedup_index
+from leo.utils.log_utils import get_logger
+from leo.utils.url_utils import normalize_url
+
+logger = get_logger(__name__)
+
+GRAPH_WORKERS = int(os.getenv("LEO_GRAPH_WORKERS", "16"))
+
+# Raw artifacts a lean run drops once their last consumer has finished.
+RELEASABLE = ("html", "text")
+
+_node_pool: Optional[ThreadPoolExecutor] = None
+_node_pool_lock = threading.Lock()
+
+
+def _get_node_pool() -> ThreadPoolExecutor:
+    # Nodes never wait on other nodes, so one shared pool is safe for nested batch runs.
+    global _node_pool
+    if _node_pool is None:
+        with _node_pool_lock:
+            if _node_pool is None:
+                _node_pool = ThreadPoolExecutor(max_workers=GRAPH_WORKERS, thread_name_prefix="leo-node")
+    return _node_pool
+
+
+def held_bytes(state: LeoState) -> int:
+    """Bytes held by the raw artifacts of `state` (HTML, visible text, link targets)."""
+    total = sys.getsizeof(state.html) if state.html else 0
+    if state.text:
+        total += sys.getsizeof(state.text)
+    document = state.document
+    if document is not None:
+        if document.text and document.text is not state.text:
+            total += sys.getsizeof(document.text)
+        total += sum(sys.getsizeof(href) for href in document.hrefs)
+    return total
+
+
+def release(state: LeoState, artifact: str) -> None:
+    """Drop a raw artifact; the document's copy of the text goes with `text`."""
+    if artifact == "text" and state.document is not None:
+        state.document.text = ""
+    setattr(state, artifact, None)
+
+
+class PipelineGraph:
+    """Dependency DAG of agents built from their declared inputs and outputs."""
+
+    def __init__(self, agents: Iterable):
+        self.agents = {agent.name: agent for agent in agents}
+        producers: Dict[str, str] = {}
+        for agent in self.agents.values():
+            for artifact in agent.outputs:
+                if artifact in producers:
+                    raise ValueError(f"'{artifact}' is produced by both {producers[artifact]} and {agent.name}")
+                producers[artifact] = agent.name
+        # Inputs nobody produces (e.g. 'url') are provided by the initial state.
+        self.dependencies: Dict[str, Set[str]] = {
+            agent.name: {producers[i] for i in agent.inputs if i in producers} for agent in self.agents.values()
+        }
+        self.producers = producers
+        self.consumers: Dict[str, Set[str]] = {
+            artifact: {agent.name for agent in self.agents.values() if artifact in agent.inputs}
+            for artifact in RELEASABLE
+        }
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order, done = [], set()
+        remaining = dict(self.dependencies)
+        while remaining:
+            ready = [name for name, deps in remaining.items() if deps <= done]
+            if not ready:
+                raise ValueError(f"Cycle between agents: {sorted(remaining)}")
+            for name in ready:
+                order.append(name)
+                done.add(name)
+                del remaining[name]
+        return order
+
+    def execute(
+        self,
+        state: LeoState,
+        stop: Optional[Callable[[LeoState], bool]] = None,
+        on_stage: Optional[Callable[[str, LeoState], None]] = None,
+        lean: bool = False,
+    ) -> LeoState:
+        """
+        Run every node once its dependencies have finished, recording wall time
+        per node in `state.timings`. When `stop(state)` becomes true after a
+        node completes, no further nodes are started. `on_stage(name, state)`
+        is called as each node completes, from the thread driving the graph.
+        With `lean`, raw artifacts are released once no pending node reads them.
+        """
+        pool = _get_node_pool()
+        done: Set[str] = set()
+        running = {}
+        halted = False
+        held = [a for a in RELEASABLE if a in self.producers]
+
+        def timed(name: str):
+            started = time.perf_counter()
+            try:
+                self.agents[name].run(state)
+            except Exception:
+                telemetry.inc("leo_stage_errors_total", stage=name)
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                state.timings[name] = round(elapsed, 6)
+                telemetry.observe("leo_stage_duration_seconds", elapsed, stage=name)
+            return name
+
+        def finish(name: str):
+            nonlocal halted
+            done.add(name)
+            logger.debug(f"[LEO] {name} complete ({state.timings[name] * 1000:.1f} ms)")
+            if on_stage is not None:
+                try:
+                    on_stage(name, state)
+                except Exception as e:
+                    logger.warning(f"[LEO] ⚠️ on_stage callback failed after {name}: {e}")
+            if stop is not None and stop(state):
+                halted = True
+            state.peak_bytes = max(state.peak_bytes, held_bytes(state))
+            if lean:
+                for artifact in list(held):
+                    if self.producers[artifact] in done and self.consumers[artifact] <= done:
+                        release(state, artifact)
+                        held.remove(artifact)
+
+        while True:
+            if not halted:
+                started = done | {running[f] for f in running}
+                ready = [n for n in self.order if n not in started and self.dependencies[n] <= done]
+                if len(ready) == 1 and not running:
+                    # Nothing to overlap with: run inline and skip the thread handoff.
+                    finish(timed(ready[0]))
+                    continue
+                for name in ready:
+                    running[pool.submit(timed, name)] = name
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                del running[future]
+                finish(future.result())
+        if lean:
+            for artifact in held:
+                release(state, artifact)
+        telemetry.observe("leo_audit_peak_bytes", state.peak_bytes)
+        return state
+
+    def select(self, outputs: Iterable[str]) -> "PipelineGraph":
+        """The smallest subgraph producing `outputs`: their producers and everything those depend on."""
+        outputs = set(outputs)
+        unknown = outputs - set(self.producers)
+        if unknown:
+            raise ValueError(
+                f"Unknown outputs: {', '.join(sorted(unknown))} (available: {', '.join(sorted(self.producers))})"
+            )
+        needed: Set[str] = set()
+        stack = [self.producers[artifact] for artifact in outputs]
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.dependencies[name])
+        return PipelineGraph(agent for name, agent in self.agents.items() if name in needed)
+
 
+# name -> factory(session=..., max_links=..., analysis_pool=...); registration order matters (see build_graph).
+_registry: Dict[str, Callable[..., object]] = {}
 
-def run_pipeline(url: str) -> LeoState:
+
+def register_agent(name: str, factory: Callable[..., object]) -> None:
     """
-    Execute the full LEO pipeline:
-    Crawler → Structure → Semantic → Scoring → Advisor.
+    Add (or replace) an agent in the default graph. `factory` receives the
+    graph options as keyword arguments (`session`, `max_links`,
+    `analysis_pool`) and must accept unknown ones.
     """
-    state = LeoState(url=url)
+    _registry[name] = factory
+
+
+def _crawler(session=None, max_links: int = 0, analysis_pool=None, **_):
+    if analysis_pool is None:
+        return CrawlerAgent(session=session, max_links=max_links)
+    # Local embeddings are CPU-bound and move to the workers too; remote ones are
+    # I/O-bound and stay in-process, where concurrent pages are coalesced into one request.
+    offload_semantic = isinstance(get_embedding_provider(), LocalEmbeddingProvider)
+    return CrawlerAgent(
+        session=session, max_links=max_links, analysis_pool=analysis_pool, offload_semantic=offload_semantic
+    )
 
-    print(f"[LEO] Starting audit for: {url}")
 
-    # 1️⃣ Crawler
-    crawler = CrawlerAgent()
-    state = crawler.run(state)
-    print("[LEO] Crawler complete")
+register_agent("crawler", _crawler)
+register_agent("structure", lambda **_: StructureAgent())
+register_agent("dedup", lambda **_: DedupAgent())
+register_agent("semantic", lambda **_: SemanticAgent())
+register_agent("retrieval", lambda **_: RetrievalAgent())
+register_agent("scoring", lambda **_: ScoringAgent())
+register_agent("advisor", lambda **_: AdvisorAgent())
+
+
+def resolve_outputs(metrics: Optional[Iterable[str]] = None, suggestions: bool = True) -> Optional[Set[str]]:
+    """
+    Outputs for a request: the named metrics (every scored metric plus
+    `leo_rank` when `metrics` is None) and `suggestions` if wanted.
+    Returns None when that amounts to the full audit; raises ValueError for
+    names no registered agent produces.
+    """
+    if metrics is None:
+        outputs = set(SCORED_METRICS) | {"leo_rank"}
+    else:
+        outputs = {name.strip() for name in metrics if name.strip()}
+        unknown = outputs - available_outputs()
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+    if suggestions:
+        outputs.add("suggestions")
+    return None if metrics is None and suggestions else outputs
+
+
+def available_outputs() -> Set[str]:
+    """Every artifact the registered agents can produce."""
+    return set(build_graph().producers)
+
+
+def build_graph(
+    session=None,
+    max_links: int = 0,
+    analysis_pool=None,
+    outputs: Optional[Iterable[str]] = None,
+) -> PipelineGraph:
+    """
+    The audit graph of every registered agent, or of only those needed for
+    `outputs`; `max_links` > 0 makes the crawler record link targets.
+
+    With `analysis_pool` the crawler delegates parsing and the structure score
+    to worker processes (see leo/analysis.py). Agents whose outputs an earlier
+    registered agent already produces (there: structure, and semantic with
+    local embeddings) are left out.
+    """
+    agents, produced = [], set()
+    for factory in _registry.values():
+        agent = factory(session=session, max_links=max_links, analysis_pool=analysis_pool)
+        if agent.outputs and set(agent.outputs) <= produced:
+            continue
+        agents.append(agent)
+        produced.update(agent.outputs)
+    graph = PipelineGraph(agents)
+    return graph if outputs is None else graph.select(outputs)
+
+
+def run_pipeline(
+    url: str,
+    session=None,
+    revalidate: bool = True,
+    on_stage: Optional[Callable[[str, LeoState], None]] = None,
+    max_links: int = 0,
+    analysis_pool=None,
+    lean: bool = False,
+    outputs: Optional[Iterable[str]] = None,
+    persist: bool = True,
+) -> LeoState:
+    """
+    Execute the full LEO pipeline as a DAG:
+    Crawler → (Structure ∥ Semantic ∥ Retrieval) → Scoring → Advisor.
+
+    `session` is an optional pooled `requests.Session` shared across audits
+    (see `leo.batch.run_pipeline_many`); the process-wide session is used otherwise.
+
+    With `revalidate` the crawler re-fetches conditionally using the validators
+    stored by the previous audit; when the page is unchanged the stored metrics,
+    LeoRank and suggestions are reused and the analysis agents are skipped.
+    They are skipped as well when the fetch fails (`state.error`).
+
+    `on_stage(name, state)` is called as each agent completes, so callers can
+    stream partial metrics before the slower stages (e.g. the Advisor) finish.
+    With `max_links` the crawler also records link targets in
+    `state.document.hrefs` (see `leo.site`). `analysis_pool` runs the
+    CPU-bound stages in worker processes (see `build_graph`). With `lean`
+    the returned state no longer carries `html` and `text` (see `PipelineGraph.execute`).
+
+    `outputs` (see `resolve_outputs`) runs only the agents needed for those
+    artifacts, e.g. `{"structure"}` runs the crawler and StructureAgent alone.
+    Without `persist` nothing is written to the database. Partial audits
+    record their score only when `leo_rank` was requested, and never replace
+    the stored snapshot that unchanged pages are answered from. Failed audits
+    (`state.error`) write nothing, so the URL keeps its last good rank.
+
+    A persisted full audit adds the page's fingerprint to the near-duplicate
+    index; `state.duplicate_of` names the page whose analysis was reused.
+    """
+    outputs = set(outputs) if outputs is not None else None
+    graph = build_graph(session, max_links, analysis_pool, outputs)
+    state = LeoState(url=url)
 
-    # 2️⃣ Structure analysis
-    structure = StructureAgent()
-    state = structure.run(state)
-    print("[LEO] Structure analysis complete")
+    logger.info(f"[LEO] Starting audit for: {url}")
+    telemetry.inc("leo_audits_total")
 
-    # 3️⃣ Semantic analysis
-    semantic = SemanticAgent()
-    state = semantic.run(state)
-    print("[LEO] Semantic analysis complete")
+    snapshot = get_page_snapshot(url) if revalidate else None
+    if snapshot:
+        state.validators = PageValidators(
+            etag=snapshot["etag"],
+            last_modified=snapshot["last_modified"],
+            content_hash=snapshot["content_hash"],
+        )
 
-    # 4️⃣ Scoring
-    scorer = ScoringAgent()
-    state = scorer.run(state)
-    print(f"[LEO] Scoring complete — LeoRank: {state.leo_rank:.2f}")
+    # Unchanged pages reuse the snapshot and failed fetches have nothing to analyze: stop after the crawler.
+    graph.execute(
+        state, stop=lambda s: s.not_modified or bool(s.error), on_stage=on_stage, lean=lean
+    )
 
-    # 5️⃣ Advisor
-    advisor = AdvisorAgent()
-    state = advisor.run(state)
-    print("[LEO] Advisor suggestions generated")
+    if snapshot:
+        telemetry.inc("leo_cache_hits_total" if state.not_modified else "leo_cache_misses_total", cache="page")
+    if state.not_modified and snapshot:
+        state.metrics = snapshot["metrics"]
+        state.leo_rank = snapshot["leo_rank"]
+        state.suggestions = snapshot["suggestions"]
+        logger.info(f"[LEO] Page unchanged — reusing stored analysis, LeoRank: {state.leo_rank:.2f}")
+        if persist:
+            save_score(state.url, state.leo_rank, state.metrics)
+        logger.info("[LEO] Audit finished successfully ✅")
+        return state
 
-    # Save to DB
-    if state.leo_rank is not None:
-        save_score(state.url, state.leo_rank)
+    # Save to DB; a failed fetch has no rank to record and must not displace the URL's last one
+    if persist and not state.error and (outputs is None or "leo_rank" in outputs):
+        save_score(state.url, state.leo_rank, state.metrics)
+    # Only pages analyzed in full are fingerprinted for reuse, so matches never chain.
+    original = outputs is None and not state.error and not state.duplicate_of
+    if persist and outputs is None and state.validators and not state.error:
+        save_page_snapshot(
+            state.url,
+            state.validators.etag,
+            state.validators.last_modified,
+            state.validators.content_hash,
+            state.metrics,
+            state.leo_rank,
+            state.suggestions,
+            state.fingerprint if original else None,
+        )
+    if persist and original and state.fingerprint and DEDUP_ENABLED:
+        get_dedup_index().add(normalize_url(state.url), int(state.fingerprint, 16), state.metrics, state.suggestions)
 
-    print("[LEO] Audit finished successfully ✅")
+    logger.info("[LEO] Audit finished successfully ✅")
     return state
 
 
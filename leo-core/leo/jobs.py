@@ -0,0 +1,262 @@
+"""
+leo/jobs.py
+Background audit jobs for the API.
+
+`JobManager.submit(url)` returns immediately with an `AuditJob`; a bounded
+worker pool runs the pipeline. Submissions for a URL that already has a
+queued or running job join that job instead of starting another one
+(single-flight), so bursts of identical requests cost one audit. Finished
+jobs stay pollable until `history` newer jobs push them out.
+
+Each job also publishes progress events — one `stage` event per completed
+agent with the metrics computed so far, then a terminal `done` or `failed`
+event — which `watch(job)` turns into an async stream for SSE/WebSocket
+clients. Late subscribers first receive the events they missed.
+
+Successful results are stored in the audit result cache (`leo.cache`);
+`JobManager.lookup(url)` serves from it, starting a background refresh job
+when the entry is stale.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+from leo import telemetry
+from leo.cache import TTLCache, get_result_cache, result_key
+from leo.state import LeoState
+from leo.utils.url_utils import normalize_url
+from leo.utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+API_WORKERS = int(os.getenv("LEO_API_WORKERS", "4"))
+JOB_HISTORY = int(os.getenv("LEO_JOB_HISTORY", "1000"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+def audit_summary(state: LeoState, outputs: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """The public JSON shape of an audit result, narrowed to `outputs` when given (see `resolve_outputs`)."""
+    summary = {
+        "url": state.url,
+        "metrics": state.metrics,
+        "leo_rank": state.leo_rank,
+        "suggestions": state.suggestions,
+        "timestamp": state.timestamp,
+    }
+    if outputs is not None:
+        summary["metrics"] = {name: value for name, value in state.metrics.items() if name in outputs}
+        for key in ("leo_rank", "suggestions"):
+            if key not in outputs:
+                del summary[key]
+    return summary
+
+
+def stage_event(name: str, state: LeoState) -> Dict[str, Any]:
+    """Progress event emitted when an agent completes."""
+    return {
+        "event": "stage",
+        "stage": name,
+        "metrics": dict(state.metrics),
+        "leo_rank": state.leo_rank,
+        "elapsed_ms": round(sum(state.timings.values()) * 1000, 3),
+    }
+
+
+def final_event(state: LeoState) -> Dict[str, Any]:
+    """Terminal event carrying the full result (or the error)."""
+    if state.error:
+        return {"event": "failed", "error": state.error}
+    return {"event": "done", "result": audit_summary(state)}
+
+
+@dataclass
+class AuditJob:
+    """One audit request; `future` resolves to the final `LeoState`."""
+
+    url: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    future: Future = field(default_factory=Future, repr=False)
+    events: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+    _listeners: List[Callable] = field(default_factory=list, repr=False)
+    _events_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        with self._events_lock:
+            self.events.append(event)
+            for listener in self._listeners:
+                listener(event)
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Call `listener` with every past and future event; listeners must not block."""
+        with self._events_lock:
+            for event in self.events:
+                listener(event)
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable) -> None:
+        with self._events_lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "url": self.url,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "result": None,
+        }
+        if self.status == DONE:
+            data["result"] = audit_summary(self.future.result())
+        return data
+
+
+class JobManager:
+    """Bounded worker pool for audits with per-URL in-flight deduplication."""
+
+    def __init__(
+        self,
+        workers: int = API_WORKERS,
+        history: int = JOB_HISTORY,
+        runner=None,
+        cache: Optional[TTLCache] = None,
+    ):
+        if runner is None:
+            from leo.graph import run_pipeline
+
+            # Finished states are cached and kept in job history: never hold the raw page.
+            runner = functools.partial(run_pipeline, lean=True)
+        self.runner = runner
+        self.cache = cache if cache is not None else get_result_cache()
+        self.history = history
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="leo-job")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, AuditJob]" = OrderedDict()
+        self._inflight: Dict[str, AuditJob] = {}
+
+    def submit(self, url: str) -> AuditJob:
+        """Queue an audit of `url`, or return the job already auditing it (after normalization)."""
+        key = normalize_url(url)
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is not None:
+                telemetry.inc("leo_jobs_total", outcome="coalesced")
+                return job
+            job = AuditJob(url=url)
+            self._inflight[key] = job
+            self._jobs[job.id] = job
+            self._trim()
+        telemetry.inc("leo_jobs_total", outcome="submitted")
+        self._pool.submit(self._run, job)
+        return job
+
+    def lookup(self, url: str) -> Optional[LeoState]:
+        """
+        Cached result for `url`, or None. A stale entry is still returned, and a
+        refresh job is submitted (joining any refresh already in flight).
+        """
+        hit = self.cache.get(result_key(url))
+        if hit is None:
+            return None
+        state, fresh = hit
+        if not fresh:
+            self.submit(url)
+        return state
+
+    def get(self, job_id: str) -> Optional[AuditJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: AuditJob) -> None:
+        job.status = RUNNING
+        try:
+            state = self.runner(job.url, on_stage=lambda name, s: job.publish(stage_event(name, s)))
+        except Exception as e:
+            logger.error(f"[Jobs] ❌ Audit {job.id} failed for {job.url}: {e}")
+            state = LeoState(url=job.url, error=str(e))
+        if not state.error:
+            self.cache.set(result_key(job.url), state)
+        with self._lock:
+            self._inflight.pop(normalize_url(job.url), None)
+        job.error = state.error
+        job.finished_at = time.time()
+        job.future.set_result(state)
+        job.status = FAILED if state.error else DONE
+        job.publish(final_event(state))
+
+    def _trim(self) -> None:
+        # Drop the oldest finished jobs beyond the history limit; in-flight jobs are never dropped.
+        excess = len(self._jobs) - self.history
+        if excess <= 0:
+            return
+        for job_id in [jid for jid, job in self._jobs.items() if job.finished][:excess]:
+            del self._jobs[job_id]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+async def watch(job: AuditJob) -> AsyncIterator[Dict[str, Any]]:
+    """Yield the job's events on the running event loop until the terminal one."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def listener(event):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+        except RuntimeError:
+            pass  # the consumer's loop is gone
+
+    job.subscribe(listener)
+    try:
+        while True:
+            event = await queue.get()
+            yield event
+            if event["event"] in (DONE, FAILED):
+                return
+    finally:
+        job.unsubscribe(listener)
+
+
+_default_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Return the process-wide job manager, creating it on first use."""
+    global _default_manager
+    if _default_manager is None:
+        with _manager_lock:
+            if _default_manager is None:
+                _default_manager = JobManager()
+    return _default_manager
+
+
+__all__ = [
+    "AuditJob",
+    "JobManager",
+    "audit_summary",
+    "final_event",
+    "get_job_manager",
+    "stage_event",
+    "watch",
+]
@@ -0,0 +1,140 @@
+"""
+leo/llm.py
+Chat-completion backend layer used by the AdvisorAgent.
+
+Backends share one method, `complete(prompt) -> str`, and compose like the
+embedding providers in leo/embeddings.py:
+
+    LimitedLLMBackend(OpenAIChatBackend())
+
+- `OpenAIChatBackend` reuses the process-wide OpenAI client and sends every
+  request with an explicit timeout (`LEO_LLM_TIMEOUT`).
+- `LimitedLLMBackend` caps concurrent calls with a process-wide semaphore
+  (`LEO_LLM_CONCURRENCY`), so a large batch cannot open hundreds of requests.
+- `FakeLLMBackend` is a deterministic, network-free stand-in for tests and
+  local runs (`LEO_LLM_BACKEND=fake`).
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from leo import telemetry
+from leo.utils.openai_utils import get_client
+
+LLM_MODEL = os.getenv("LEO_LLM_MODEL", "gpt-4o-mini")
+LLM_TIMEOUT = float(os.getenv("LEO_LLM_TIMEOUT", "20"))
+LLM_CONCURRENCY = int(os.getenv("LEO_LLM_CONCURRENCY", "4"))
+
+_llm_slots = threading.BoundedSemaphore(max(1, LLM_CONCURRENCY))
+
+
+class LLMBackend(ABC):
+    """Base class: `name` identifies the model and namespaces cached replies."""
+
+    name = "base"
+
+    @abstractmethod
+    def complete(self, prompt: str, max_tokens: int = 200) -> str:
+        """The model's reply to a single-turn prompt."""
+
+
+class OpenAIChatBackend(LLMBackend):
+    """OpenAI chat completions over the shared client, with a per-request timeout."""
+
+    def __init__(self, model: str = LLM_MODEL, timeout: float = LLM_TIMEOUT, client=None):
+        self.model = model
+        self.name = f"openai:{model}"
+        self.timeout = timeout
+        self.client = client or get_client()
+        if self.client is None:
+            raise RuntimeError("OpenAI client unavailable (missing OPENAI_API_KEY or SDK)")
+
+    def complete(self, prompt: str, max_tokens: int = 200) -> str:
+        chat = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            timeout=self.timeout,
+        )
+        return (chat.choices[0].message.content or "").strip()
+
+
+class LimitedLLMBackend(LLMBackend):
+    """Run `backend` under a semaphore shared by every limited backend in the process."""
+
+    def __init__(self, backend: LLMBackend, slots: threading.Semaphore = None):
+        self.backend = backend
+        self.name = backend.name
+        self.slots = slots or _llm_slots
+
+    def complete(self, prompt: str, max_tokens: int = 200) -> str:
+        with self.slots:
+            with telemetry.timed("leo_llm_duration_seconds", "leo_llm_errors_total", backend=self.name):
+                return self.backend.complete(prompt, max_tokens)
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Network-free backend: records prompts, can simulate latency and outages,
+    and answers deterministically from the `Structure:` / `Semantic:` /
+    `LeoRank:` lines of the prompt — one numbered tip list per site, or a
+    JSON array of lists when the prompt describes several sites.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0, fail: bool = False):
+        self.latency = latency
+        self.fail = fail
+        self.prompts: List[str] = []
+        self._lock = threading.Lock()
+
+    def complete(self, prompt: str, max_tokens: int = 200) -> str:
+        with self._lock:
+            self.prompts.append(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail:
+            raise ConnectionError("fake LLM offline")
+        sites = re.findall(r"Structure: ([\d.]+)\s+Semantic: ([\d.]+)\s+LeoRank: ([\d.]+)", prompt)
+        tips = [
+            [f"Improve structure (now {s}).", f"Clarify content (semantic {sem}).", f"Target LeoRank above {rank}."]
+            for s, sem, rank in sites
+        ]
+        if len(tips) == 1:
+            return "\n".join(f"{i}. {tip}" for i, tip in enumerate(tips[0], 1))
+        return json.dumps(tips)
+
+
+_default_backend: Optional[LLMBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_llm_backend() -> Optional[LLMBackend]:
+    """
+    Return the process-wide, concurrency-limited backend, or None when no LLM
+    is configured. `LEO_LLM_BACKEND=fake` selects `FakeLLMBackend`.
+    """
+    global _default_backend
+    if _default_backend is None:
+        with _backend_lock:
+            if _default_backend is None:
+                if os.getenv("LEO_LLM_BACKEND", "openai") == "fake":
+                    _default_backend = LimitedLLMBackend(FakeLLMBackend())
+                elif get_client() is not None:
+                    _default_backend = LimitedLLMBackend(OpenAIChatBackend())
+    return _default_backend
+
+
+__all__ = [
+    "FakeLLMBackend",
+    "LLMBackend",
+    "LimitedLLMBackend",
+    "OpenAIChatBackend",
+    "get_llm_backend",
+]
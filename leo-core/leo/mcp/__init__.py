@@ -1,5 +1,11 @@
 """MCP integration for Leo Core."""
 
-from .server import serve
+__all__ = ["start_mcp_server"]
 
-__all__ = ["serve"]
+
+def __getattr__(name):
+    if name == "start_mcp_server":
+        from .server import start_mcp_server
+
+        return start_mcp_server
+    raise AttributeError(f"module 'leo.mcp' has no attribute {name!r}")
@@ -1,54 +1,209 @@
 """
 leo/mcp/server.py
 Model Context Protocol (MCP) server to expose LEO Core tools for GPT-native access.
+
+The protocol is one JSON request per line: `{"id": ..., "method": ..., "params": {...}}`.
+Requests on a connection are handled concurrently, so clients may pipeline
+several of them; each response echoes the request `id` as
+`{"id": ..., "result": ...}` or `{"id": ..., "error": ...}` and is written as
+soon as it is ready, possibly out of order. Requests without an `id` get the
+bare result line, as before; since nothing ties such a reply to its request,
+they are answered one at a time, in the order they arrived on the connection.
+
+`leo_audit` with `"stream": true` (and an `id`) first sends one
+`{"id": ..., "event": {...}}` line per completed agent with the metrics so far,
+then the usual result line. A failed audit ends the stream with a `failed`
+event and an error response.
+
+`leo_audit` answers from the audit result cache when it can (see `leo.cache`),
+and runs full audits as jobs of the shared `JobManager` (see `leo.jobs`), joining
+any audit of the same URL already in flight from MCP or the REST API. Other
+blocking work (partial audits, DB reads) runs on a thread pool of
+`LEO_MCP_CONCURRENCY` workers, so the event loop keeps serving every client.
 """
 
 import json
 import asyncio
-from leo.graph import run_pipeline
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from leo import telemetry
 from leo.db import get_recent_scores
+from leo.utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+MCP_CONCURRENCY = int(os.getenv("LEO_MCP_CONCURRENCY", "8"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MCP_CONCURRENCY, thread_name_prefix="leo-mcp")
+    return _executor
+
+
+async def _run_blocking(fn, *args):
+    """Run a blocking call on the MCP worker pool without stalling the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+
+
+async def leo_audit(url: str, emit=None, metrics=None, suggestions: bool = True, persist: bool = True) -> str:
+    """
+    Run a LEO audit and return JSON result; `emit(event)` receives per-stage progress.
+    `metrics` (list or comma-separated) and `suggestions=false` limit the agents that run.
+    Full audits go through the shared job manager, so concurrent MCP and REST
+    requests for one URL share a single run.
+    """
+    from leo.graph import resolve_outputs, run_pipeline
+    from leo.jobs import FAILED, audit_summary, final_event, get_job_manager, stage_event, watch
+
+    if isinstance(metrics, str):
+        metrics = metrics.split(",")
+    outputs = resolve_outputs(metrics, suggestions)
+    manager = get_job_manager()
+    cached = manager.lookup(url)
+    if cached is not None:
+        return json.dumps(audit_summary(cached, outputs))
+
+    if outputs is None and persist:
+        job = manager.submit(url)
+        if emit is not None:
+            async for event in watch(job):
+                if event["event"] in ("stage", FAILED):
+                    await emit(event)
+        state = await asyncio.wrap_future(job.future)
+        if state.error:
+            raise RuntimeError(state.error)
+        return json.dumps(audit_summary(state))
+
+    # Partial or unrecorded audits bypass the job queue and the result cache.
+    loop = asyncio.get_running_loop()
+    sent = []
 
+    def forward(name, state):
+        sent.append(asyncio.run_coroutine_threadsafe(emit(stage_event(name, state)), loop))
 
-async def leo_audit(url: str) -> str:
-    """Run full LEO audit and return JSON result."""
-    state = run_pipeline(url)
-    return json.dumps({
-        "url": state.url,
-        "metrics": state.metrics,
-        "leo_rank": state.leo_rank,
-        "suggestions": state.suggestions,
-        "timestamp": state.timestamp,
-    })
+    on_stage = forward if emit is not None else None
+    state = await _run_blocking(
+        functools.partial(run_pipeline, url, on_stage=on_stage, lean=True, outputs=outputs, persist=persist)
+    )
+    for future in sent:
+        await asyncio.wrap_future(future)
+    if state.error:
+        if emit is not None:
+            await emit(final_event(state))
+        raise RuntimeError(state.error)
+    return json.dumps(audit_summary(state, outputs))
 
 
 async def leo_recent() -> str:
     """Return recent scores from the DB as JSON."""
-    rows = get_recent_scores(10)
+    rows = await _run_blocking(get_recent_scores, 10)
     return json.dumps([dict(r) if isinstance(r, dict) else {"url": r[0], "rank": r[1], "timestamp": r[2]} for r in rows])
 
 
+async def leo_stats() -> str:
+    """Return pipeline instrumentation (stage latencies, caches, DB calls) as JSON."""
+    return json.dumps(telemetry.snapshot())
+
+
+METHODS = {
+    "leo_audit": leo_audit,
+    "leo_recent": leo_recent,
+    "leo_stats": leo_stats,
+}
+
+
+async def dispatch(line: bytes, send=None) -> bytes:
+    """Execute one request line and return its response line; `send(line)` writes stream events."""
+    request_id = None
+    try:
+        request = json.loads(line.decode())
+        request_id = request.get("id")
+        method = request.get("method")
+        params = dict(request.get("params", {}))
+        params.pop("emit", None)
+        handler = METHODS.get(method)
+        if handler is None:
+            result, error = None, f"Unknown method {method}"
+        else:
+            if method == "leo_audit" and request.get("stream") and request_id is not None and send is not None:
+                async def emit(event):
+                    await send(json.dumps({"id": request_id, "event": event}).encode() + b"\n")
+
+                params["emit"] = emit
+            result, error = await handler(**params), None
+    except Exception as e:
+        result, error = None, str(e)
+
+    if request_id is None:
+        body = result if error is None else json.dumps({"error": error})
+    elif error is None:
+        # Tool results are already JSON documents; splice them in without re-parsing.
+        body = f'{{"id": {json.dumps(request_id)}, "result": {result}}}'
+    else:
+        body = json.dumps({"id": request_id, "error": error})
+    return body.encode() + b"\n"
+
+
+def _has_id(line: bytes) -> bool:
+    try:
+        request = json.loads(line.decode())
+    except ValueError:
+        return False
+    return isinstance(request, dict) and request.get("id") is not None
+
+
 async def handle_request(reader, writer):
-    """Minimal async socket server to process JSON MCP-style requests."""
+    """
+    Serve one connection: requests with an `id` are handled concurrently and
+    answered as each finishes; requests without one are answered in order.
+    """
+    write_lock = asyncio.Lock()
+    # Backpressure: stop reading once this many requests from the connection are in flight.
+    slots = asyncio.Semaphore(MCP_CONCURRENCY * 2)
+    pending = set()
+    unnamed = None  # the latest id-less request's task; the next one waits for it
+
+    async def send(data: bytes):
+        async with write_lock:
+            writer.write(data)
+            await writer.drain()
+
+    async def respond(line: bytes, after: Optional[asyncio.Task] = None):
+        try:
+            if after is not None:
+                await asyncio.gather(after, return_exceptions=True)
+            await send(await dispatch(line, send))
+        except ConnectionError:
+            pass
+        finally:
+            slots.release()
+
     while True:
+        await slots.acquire()
         data = await reader.readline()
         if not data:
+            slots.release()
             break
-        try:
-            request = json.loads(data.decode())
-            method = request.get("method")
-            params = request.get("params", {})
-
-            if method == "leo_audit":
-                result = await leo_audit(**params)
-            elif method == "leo_recent":
-                result = await leo_recent()
-            else:
-                result = json.dumps({"error": f"Unknown method {method}"})
-        except Exception as e:
-            result = json.dumps({"error": str(e)})
-
-        writer.write(result.encode() + b"\n")
-        await writer.drain()
+        if _has_id(data):
+            task = asyncio.create_task(respond(data))
+        else:
+            task = unnamed = asyncio.create_task(respond(data, unnamed))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
     writer.close()
 
 
@@ -56,7 +211,7 @@ def start_mcp_server(port: int = 8800):
     """Launch MCP-compatible socket server."""
     async def main():
         server = await asyncio.start_server(handle_request, "0.0.0.0", port)
-        print(f"[MCP] Server running on port {port}")
+        logger.info(f"[MCP] Server running on port {port} (concurrency {MCP_CONCURRENCY})")
         async with server:
             await server.serve_forever()
 
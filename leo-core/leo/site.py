@@ -0,0 +1,368 @@
+"""
+leo/site.py
+Whole-site crawl mode: audit every reachable page of one host and roll the
+page scores up into a domain-level LeoRank.
+
+The frontier is seeded with the start URL and the URLs listed in the site's
+sitemaps (from robots.txt `Sitemap:` lines, else /sitemap.xml), then grows
+with same-host links discovered by the crawler. URLs are normalized before
+deduplication and remembered as 64-bit digests (`SeenSet`), so a 100k-URL
+site costs a few MB of bookkeeping. Fetches respect robots.txt (cached per
+host) and per-host politeness: at most `concurrency` audits in flight and at
+least `delay` seconds (or the robots Crawl-delay) between request starts.
+"""
+
+import gzip
+import hashlib
+import io
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+
+import requests
+
+from leo.cache import TTLCache
+from leo.utils.http_utils import USER_AGENT, build_session
+from leo.utils.log_utils import get_logger
+from leo.utils.url_utils import normalize_url
+
+logger = get_logger(__name__)
+
+MAX_LINKS_PER_PAGE = 500
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+SKIPPED_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".css", ".js",
+    ".zip", ".gz", ".mp4", ".mp3", ".woff", ".woff2", ".xml", ".json",
+)
+
+
+class SeenSet:
+    """Set of normalized URLs stored as 64-bit BLAKE2b digests."""
+
+    def __init__(self):
+        self._digests = set()
+
+    @staticmethod
+    def _digest(url: str) -> int:
+        return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def add(self, url: str) -> bool:
+        """Add `url`; return False if it was already present."""
+        digest = self._digest(url)
+        if digest in self._digests:
+            return False
+        self._digests.add(digest)
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        return self._digest(url) in self._digests
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+
+class RobotsCache:
+    """robots.txt rules per scheme+host, fetched once and kept for `ttl` seconds."""
+
+    def __init__(self, session: requests.Session, ttl: float = 3600.0, timeout: float = 10.0):
+        self.session = session
+        self.timeout = timeout
+        self._cache = TTLCache("robots", max_entries=1024, ttl=ttl)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def rules(self, url: str) -> RobotFileParser:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        hit = self._cache.get(origin)
+        if hit:
+            return hit[0]
+        with self._locks_guard:
+            lock = self._locks.setdefault(origin, threading.Lock())
+        with lock:  # one fetch per origin, however many threads ask
+            hit = self._cache.get(origin)
+            if hit:
+                return hit[0]
+            parser = self._fetch(origin)
+            self._cache.set(origin, parser)
+            return parser
+
+    def _fetch(self, origin: str) -> RobotFileParser:
+        parser = RobotFileParser(origin + "/robots.txt")
+        try:
+            response = self.session.get(origin + "/robots.txt", timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.warning(f"[Site] ⚠️ robots.txt unavailable for {origin} ({e}) — assuming allowed")
+            parser.parse([])
+            return parser
+        if response.status_code in (401, 403):
+            parser.disallow_all = True
+        elif response.status_code >= 400:
+            parser.allow_all = True
+        else:
+            parser.parse(response.text[:512 * 1024].splitlines())
+        return parser
+
+    def allowed(self, url: str) -> bool:
+        return self.rules(url).can_fetch(USER_AGENT, url)
+
+    def crawl_delay(self, url: str) -> float:
+        return float(self.rules(url).crawl_delay(USER_AGENT) or 0)
+
+    def sitemaps(self, url: str) -> List[str]:
+        return list(self.rules(url).site_maps() or [])
+
+
+class HostThrottle:
+    """Space request starts to one host at least `delay` seconds apart."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def sitemap_urls(
+    session: requests.Session,
+    sitemap_url: str,
+    timeout: float = 10.0,
+    depth: int = 2,
+) -> Iterator[str]:
+    """Yield page URLs from a sitemap or sitemap index (nested up to `depth` levels)."""
+    try:
+        response = session.get(sitemap_url, timeout=timeout, stream=True)
+        with response:
+            if response.status_code >= 400:
+                return
+            body = response.raw.read(MAX_SITEMAP_BYTES, decode_content=True)
+    except requests.RequestException as e:
+        logger.warning(f"[Site] ⚠️ Sitemap {sitemap_url} unavailable ({e})")
+        return
+    if body[:2] == b"\x1f\x8b":
+        body = gzip.decompress(body)
+
+    nested = []
+    is_index = False
+    try:
+        for event, elem in ElementTree.iterparse(io.BytesIO(body), events=("start", "end")):
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if event == "start":
+                is_index = is_index or tag == "sitemapindex"
+            elif tag == "loc" and elem.text:
+                if is_index:
+                    nested.append(elem.text.strip())
+                else:
+                    yield elem.text.strip()
+            elif tag in ("url", "sitemap"):
+                elem.clear()
+    except ElementTree.ParseError as e:
+        logger.warning(f"[Site] ⚠️ Malformed sitemap {sitemap_url} ({e})")
+    if depth > 0:
+        for loc in nested:
+            yield from sitemap_urls(session, loc, timeout, depth - 1)
+
+
+@dataclass
+class PageResult:
+    """Compact per-page outcome kept for the roll-up."""
+
+    url: str
+    depth: int
+    leo_rank: Optional[float]
+    metrics: Dict[str, float]
+    error: Optional[str] = None
+
+
+@dataclass
+class SiteReport:
+    """Domain-level roll-up of a site crawl."""
+
+    host: str
+    pages: int = 0
+    failed: int = 0
+    blocked: int = 0
+    discovered: int = 0
+    leo_rank: Optional[float] = None
+    metrics: Dict[str, float] = field(default_factory=dict)
+    best: List[Tuple[str, float]] = field(default_factory=list)
+    worst: List[Tuple[str, float]] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "host": self.host,
+            "leo_rank": self.leo_rank,
+            "metrics": self.metrics,
+            "pages": self.pages,
+            "failed": self.failed,
+            "blocked": self.blocked,
+            "discovered": self.discovered,
+            "best": self.best,
+            "worst": self.worst,
+            "elapsed": round(self.elapsed, 3),
+        }
+
+
+class _Rollup:
+    """Running sums for the domain score; only the extreme pages are kept."""
+
+    def __init__(self, keep: int = 5):
+        self.keep = keep
+        self.ranks = 0.0
+        self.scored = 0
+        self.metric_sums: Dict[str, float] = {}
+        self.ranked: List[Tuple[float, str]] = []
+
+    def add(self, page: PageResult) -> None:
+        if page.leo_rank is None:
+            return
+        self.ranks += page.leo_rank
+        self.scored += 1
+        for name, value in page.metrics.items():
+            if isinstance(value, (int, float)):
+                self.metric_sums[name] = self.metric_sums.get(name, 0.0) + value
+        self.ranked.append((page.leo_rank, page.url))
+        if len(self.ranked) > 4 * self.keep:
+            self.ranked.sort()
+            self.ranked = self.ranked[: self.keep] + self.ranked[-self.keep:]
+
+    def finish(self, report: SiteReport) -> SiteReport:
+        if self.scored:
+            report.leo_rank = round(self.ranks / self.scored, 2)
+            report.metrics = {k: round(v / self.scored, 2) for k, v in self.metric_sums.items()}
+        ranked = sorted(self.ranked)
+        report.worst = [(url, rank) for rank, url in ranked[: self.keep]]
+        report.best = [(url, rank) for rank, url in reversed(ranked[-self.keep:])]
+        return report
+
+
+def _crawlable(url: str, host: str) -> bool:
+    parts = urlsplit(url)
+    return (
+        parts.scheme in ("http", "https")
+        and parts.netloc == host
+        and not parts.path.lower().endswith(SKIPPED_EXTENSIONS)
+    )
+
+
+def crawl_site(
+    seed: str,
+    max_pages: int = 100,
+    max_depth: int = 3,
+    concurrency: int = 4,
+    delay: float = 0.5,
+    use_sitemap: bool = True,
+    revalidate: bool = False,
+    session: Optional[requests.Session] = None,
+    on_page: Optional[Callable[[PageResult], None]] = None,
+) -> SiteReport:
+    """
+    Crawl and audit up to `max_pages` pages of the seed's host, breadth first,
+    and return the domain-level `SiteReport` (mean LeoRank and metrics over
+    the audited pages). `on_page` is called as each page audit finishes.
+
+    `revalidate` is off by default: unchanged pages skip parsing, so they would
+    contribute no links to the frontier.
+    """
+    from leo.graph import run_pipeline
+
+    started = time.perf_counter()
+    seed = normalize_url(seed)
+    host = urlsplit(seed).netloc
+    own_session = session is None
+    session = session or build_session(per_host=max(1, concurrency), max_hosts=4)
+    robots = RobotsCache(session)
+    throttle = HostThrottle(max(delay, robots.crawl_delay(seed)))
+    report = SiteReport(host=host)
+    rollup = _Rollup()
+    seen = SeenSet()
+    frontier: deque = deque()
+    discovered: deque = deque()  # links found by workers, drained by the scheduling loop
+    submitted = 0
+
+    def enqueue(url: str, depth: int) -> None:
+        if submitted + len(frontier) >= max_pages:
+            return
+        url = normalize_url(url)
+        if not _crawlable(url, host) or not seen.add(url):
+            return
+        report.discovered += 1
+        if not robots.allowed(url):
+            report.blocked += 1
+            return
+        frontier.append((url, depth))
+
+    def audit(url: str, depth: int) -> PageResult:
+        throttle.wait()
+        try:
+            state = run_pipeline(
+                url, session=session, revalidate=revalidate, max_links=MAX_LINKS_PER_PAGE, lean=True
+            )
+        except Exception as e:
+            logger.error(f"[Site] ❌ Audit failed for {url}: {e}")
+            return PageResult(url=url, depth=depth, leo_rank=None, metrics={}, error=str(e))
+        links = state.document.hrefs if state.document and depth < max_depth else []
+        for href in links:
+            absolute = urljoin(url, href)
+            if _crawlable(absolute, host):
+                discovered.append((absolute, depth + 1))
+        if state.error:
+            # A failed fetch still carries the default 0.0 rank; keep it out of the domain score.
+            return PageResult(url=url, depth=depth, leo_rank=None, metrics={}, error=state.error)
+        return PageResult(url=url, depth=depth, leo_rank=state.leo_rank, metrics=state.metrics)
+
+    enqueue(seed, 0)
+    if use_sitemap:
+        sitemaps = robots.sitemaps(seed) or [f"{urlsplit(seed).scheme}://{host}/sitemap.xml"]
+        for sitemap in sitemaps:
+            for loc in sitemap_urls(session, sitemap):
+                enqueue(loc, 1)
+                if submitted + len(frontier) >= max_pages:
+                    break
+
+    logger.info(f"[Site] Crawling {host}: {len(frontier)} seed URLs, up to {max_pages} pages")
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="leo-site") as pool:
+            pending = set()
+            while True:
+                while discovered:
+                    enqueue(*discovered.popleft())
+                while frontier and len(pending) < concurrency and submitted < max_pages:
+                    pending.add(pool.submit(audit, *frontier.popleft()))
+                    submitted += 1
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page = future.result()
+                    report.pages += 1
+                    if page.error:
+                        report.failed += 1
+                    rollup.add(page)
+                    if on_page is not None:
+                        on_page(page)
+    finally:
+        if own_session:
+            session.close()
+
+    report.elapsed = time.perf_counter() - started
+    rollup.finish(report)
+    logger.info(f"[Site] ✅ {host}: {report.pages} pages, domain LeoRank {report.leo_rank}")
+    return report
+
+
+__all__ = ["HostThrottle", "PageResult", "RobotsCache", "SeenSet", "SiteReport", "crawl_site", "sitemap_urls"]
@@ -2,12 +2,59 @@ from datetime import datetime, timezone
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional
 
+
+class DocumentStats(BaseModel):
+    """Single-pass analysis of a page: visible text plus structural counts."""
+
+    text: str = Field(default="", description="Visible text (script/style/noscript removed)")
+    headings: int = Field(default=0, description="Number of <h1>–<h3> elements")
+    metas: int = Field(default=0, description="Number of <meta> elements")
+    images: int = Field(default=0, description="Number of <img> elements")
+    images_missing_alt: int = Field(default=0, description="Images without a non-empty alt attribute")
+    links: int = Field(default=0, description="Number of <a> elements carrying an href attribute")
+    links_broken: int = Field(default=0, description="Links with an empty or fragment-only href")
+    parser: str = Field(default="html.parser", description="Parser backend used for the analysis")
+    truncated: bool = Field(default=False, description="Body or text was cut at the crawler's byte/text budget")
+    hrefs: List[str] = Field(default_factory=list, description="Link targets, when link collection is enabled")
+
+
+class TextStats(BaseModel):
+    """Statistics of the visible text from a single tokenization pass (see leo/utils/text_utils.py)."""
+
+    tokens: int = Field(default=0, description="Number of word tokens")
+    avg_token_length: float = Field(default=0.0, description="Mean characters per word token")
+    characters: int = Field(default=0, description="Characters of text, surrounding whitespace excluded")
+    keyword_hits: int = Field(default=0, description="Whole-word occurrences of the configured keywords")
+    keywords: Dict[str, int] = Field(default_factory=dict, description="Occurrences per keyword that was found")
+    fingerprint: Optional[str] = Field(default=None, description="64-bit SimHash of the word shingles (hex), None for short texts")
+
+
+class PageValidators(BaseModel):
+    """HTTP cache validators and body fingerprint from the last successful fetch."""
+
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = Field(default=None, description="SHA-256 of the response body")
+
+
 class LeoState(BaseModel):
     url: str
     html: Optional[str] = None
+    text: Optional[str] = Field(default=None, description="Visible page text extracted by the crawler")
+    document: Optional[DocumentStats] = Field(default=None, description="Parsed document artifact shared by agents")
+    text_stats: Optional[TextStats] = Field(default=None, description="Token and keyword statistics of the text")
     metrics: Dict[str, float] = Field(default_factory=dict, description="Computed metrics for this audit")
     leo_rank: float = Field(default=0.0, description="Aggregated visibility score (0–100)")
     suggestions: List[str] = Field(default_factory=list, description="AI-generated improvement suggestions")
+    error: Optional[str] = Field(default=None, description="Failure reason when the audit could not complete")
+    validators: Optional[PageValidators] = Field(default=None, description="Validators used for conditional re-fetch")
+    not_modified: bool = Field(default=False, description="True when the page is unchanged since the last audit")
+    timings: Dict[str, float] = Field(default_factory=dict, description="Wall time per pipeline node, in seconds")
+    fingerprint: Optional[str] = Field(default=None, description="64-bit SimHash of the visible text, as hex")
+    duplicate_of: Optional[str] = Field(
+        default=None, description="Recently audited near-duplicate whose semantic score and suggestions were reused"
+    )
+    peak_bytes: int = Field(default=0, description="High-water mark of bytes held by raw HTML, text and link targets")
     timestamp: str = Field(
         default_factory=lambda: datetime.now(timezone.utc).isoformat(),
         description="Audit timestamp in UTC."
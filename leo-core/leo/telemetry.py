@@ -0,0 +1,153 @@
+"""
+leo/telemetry.py
+In-process instrumentation for LEO Core: counters and histograms recorded by
+the pipeline, the crawler, the caches and the database layer, exposed in the
+Prometheus text format (`GET /internal/stats`) and as JSON (MCP `leo_stats`).
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# name -> (type, help, buckets)
+METRICS = {
+    "leo_audits_total": ("counter", "Audits started by run_pipeline.", None),
+    "leo_jobs_total": ("counter", "API audit jobs by outcome (submitted, coalesced).", None),
+    "leo_stage_duration_seconds": ("histogram", "Wall time per pipeline stage.", DURATION_BUCKETS),
+    "leo_stage_errors_total": ("counter", "Exceptions raised by pipeline stages.", None),
+    "leo_fetch_errors_total": ("counter", "Failed page fetches.", None),
+    "leo_fetch_bytes_total": ("counter", "Response body bytes downloaded by the crawler.", None),
+    "leo_html_bytes": ("histogram", "Size of fetched HTML documents in bytes.", SIZE_BUCKETS),
+    "leo_audit_peak_bytes": ("histogram", "Per-audit high-water mark of raw HTML/text held in memory.", SIZE_BUCKETS),
+    "leo_parse_duration_seconds": ("histogram", "Time spent parsing HTML.", DURATION_BUCKETS),
+    "leo_cache_hits_total": ("counter", "Cache hits by cache name.", None),
+    "leo_cache_misses_total": ("counter", "Cache misses by cache name.", None),
+    "leo_cache_stale_total": ("counter", "Stale entries served while a refresh runs, by cache name.", None),
+    "leo_cache_evictions_total": ("counter", "Entries evicted to stay within the size limit, by cache name.", None),
+    "leo_llm_duration_seconds": ("histogram", "LLM completion latency by backend.", DURATION_BUCKETS),
+    "leo_llm_errors_total": ("counter", "Failed LLM completions by backend.", None),
+    "leo_db_duration_seconds": ("histogram", "Database call latency by operation.", DURATION_BUCKETS),
+    "leo_db_errors_total": ("counter", "Failed database calls by operation.", None),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_counters: Dict[str, Dict[LabelKey, float]] = {}
+_histograms: Dict[str, Dict[LabelKey, list]] = {}
+
+
+def _key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    """Increment a counter."""
+    if not value:
+        return
+    key = _key(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """Record one observation in a histogram."""
+    buckets = METRICS.get(name, ("histogram", "", DURATION_BUCKETS))[2] or DURATION_BUCKETS
+    key = _key(labels)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        # [per-bucket counts..., +Inf count, sum]
+        entry = series.setdefault(key, [0] * (len(buckets) + 1) + [0.0])
+        entry[bisect_left(buckets, value)] += 1
+        entry[-1] += value
+
+
+@contextmanager
+def timed(name: str, error_counter: str = None, **labels) -> Iterator[None]:
+    """Observe the duration of the block in histogram `name`; count failures in `error_counter`."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if error_counter:
+            inc(error_counter, **labels)
+        raise
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def snapshot() -> Dict[str, Dict]:
+    """Return all series as plain data: counters as values, histograms as count/sum/buckets."""
+    with _lock:
+        data: Dict[str, Dict] = {}
+        for name, series in _counters.items():
+            data[name] = {_label_text(k) or "total": v for k, v in series.items()}
+        for name, series in _histograms.items():
+            buckets = METRICS.get(name, ("", "", DURATION_BUCKETS))[2] or DURATION_BUCKETS
+            data[name] = {
+                _label_text(k) or "total": {
+                    "count": sum(entry[:-1]),
+                    "sum": round(entry[-1], 6),
+                    "buckets": dict(zip([str(b) for b in buckets] + ["+Inf"], _cumulative(entry[:-1]))),
+                }
+                for k, entry in series.items()
+            }
+        return data
+
+
+def render_prometheus() -> str:
+    """Render every series in the Prometheus text exposition format (v0.0.4)."""
+    lines = []
+    with _lock:
+        names = sorted(set(_counters) | set(_histograms))
+        for name in names:
+            kind, help_text, buckets = METRICS.get(name, ("counter" if name in _counters else "histogram", "", None))
+            lines.append(f"# HELP {name} {help_text}".rstrip())
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted(_counters.get(name, {}).items()):
+                lines.append(f"{name}{_label_block(key)} {value}")
+            buckets = buckets or DURATION_BUCKETS
+            for key, entry in sorted(_histograms.get(name, {}).items()):
+                for bound, count in zip([str(b) for b in buckets] + ["+Inf"], _cumulative(entry[:-1])):
+                    lines.append(f"{name}_bucket{_label_block(key + (('le', bound),))} {count}")
+                lines.append(f"{name}_sum{_label_block(key)} {entry[-1]}")
+                lines.append(f"{name}_count{_label_block(key)} {sum(entry[:-1])}")
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Drop all recorded series (used by tests and benchmarks)."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _cumulative(counts) -> list:
+    total, out = 0, []
+    for count in counts:
+        total += count
+        out.append(total)
+    return out
+
+
+def _label_text(key: LabelKey) -> str:
+    return ",".join(f"{k}={v}" for k, v in key)
+
+
+def _label_block(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+__all__ = ["inc", "observe", "timed", "snapshot", "render_prometheus", "reset"]
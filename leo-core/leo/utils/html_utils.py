@@ -1,26 +1,209 @@
-"""HTML utility helpers for Leo Core."""
+"""HTML utility helpers for Leo Core.
+
+`analyze_html` walks a page exactly once and produces a `DocumentStats`
+artifact (visible text plus every structural count the agents need), so the
+crawler, the structure agent and these helpers never re-parse the same HTML.
+The walk is event-driven (no tree is built) and uses lxml's parser when it is
+installed, falling back to the standard library `html.parser`.
+
+`DocumentAnalyzer` accepts markup in chunks, so the crawler parses while the
+body streams in; with `max_text_chars` it stops buffering text once the budget
+is reached while still counting structure.
+"""
 from __future__ import annotations
 
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from leo.state import DocumentStats
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - exercised when lxml is absent
+    etree = None
+
+SKIPPED_TAGS = frozenset({"script", "style", "noscript"})
+HEADING_TAGS = frozenset({"h1", "h2", "h3"})
+
+
+class _DocumentCollector:
+    """Parser target accumulating text and structural counts in one traversal."""
+
+    def __init__(self, parser: str, max_text_chars: Optional[int] = None, max_links: int = 0):
+        self.parser = parser
+        self.max_text_chars = max_text_chars
+        self.max_links = max_links
+        self.hrefs: List[str] = []
+        self.truncated = False
+        self._text_chars = 0
+        self._skip_depth = 0
+        self._parts: List[str] = []
+        self._pending: List[str] = []
+        self.headings = 0
+        self.metas = 0
+        self.images = 0
+        self.images_missing_alt = 0
+        self.links = 0
+        self.links_broken = 0
+
+    def _flush(self) -> None:
+        # Parsers may deliver one text node in several pieces; strip it whole.
+        if self._pending:
+            stripped = "".join(self._pending).strip()
+            if stripped:
+                self._parts.append(stripped)
+                self._text_chars += len(stripped) + 1
+            self._pending.clear()
+
+    @property
+    def text_full(self) -> bool:
+        return self.max_text_chars is not None and self._text_chars >= self.max_text_chars
+
+    def start(self, tag: str, attrib: Dict[str, Optional[str]]) -> None:
+        self._flush()
+        tag = tag.lower()
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+            return
+        if tag in HEADING_TAGS:
+            self.headings += 1
+        elif tag == "meta":
+            self.metas += 1
+        elif tag == "img":
+            self.images += 1
+            if not attrib.get("alt"):
+                self.images_missing_alt += 1
+        elif tag == "a" and "href" in attrib:
+            self.links += 1
+            href = attrib.get("href")
+            if not href or href.startswith("#"):
+                self.links_broken += 1
+            elif len(self.hrefs) < self.max_links:
+                self.hrefs.append(href)
+
+    def end(self, tag: str) -> None:
+        self._flush()
+        if tag.lower() in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def data(self, data: str) -> None:
+        if self._skip_depth:
+            return
+        if self.text_full:
+            self.truncated = True
+            return
+        self._pending.append(data)
+
+    def close(self) -> DocumentStats:
+        self._flush()
+        text = " ".join(self._parts)
+        if self.max_text_chars is not None and len(text) > self.max_text_chars:
+            text = text[: self.max_text_chars]
+            self.truncated = True
+        return DocumentStats(
+            text=text,
+            headings=self.headings,
+            metas=self.metas,
+            images=self.images,
+            images_missing_alt=self.images_missing_alt,
+            links=self.links,
+            links_broken=self.links_broken,
+            parser=self.parser,
+            truncated=self.truncated,
+            hrefs=self.hrefs,
+        )
+
+
+class _StdlibAdapter(HTMLParser):
+    """Drive a `_DocumentCollector` from the standard library parser."""
+
+    def __init__(self, target: _DocumentCollector):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        # Void elements written as <img/>: never open a skipped region.
+        if tag not in SKIPPED_TAGS:
+            self.target.start(tag, dict(attrs))
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+class DocumentAnalyzer:
+    """Incremental single-pass HTML analyzer.
+
+    Feed markup with `feed()` (in one piece or in chunks) and call `close()`
+    to obtain the `DocumentStats` artifact. `max_text_chars` caps the visible
+    text kept in memory; `max_links` > 0 also records up to that many link
+    targets in `DocumentStats.hrefs` (used by the site crawler).
+    """
+
+    def __init__(self, backend: Optional[str] = None, max_text_chars: Optional[int] = None, max_links: int = 0):
+        self.backend = backend or default_backend()
+        self._collector = _DocumentCollector(self.backend, max_text_chars, max_links)
+        if self.backend == "lxml":
+            if etree is None:
+                raise ValueError("lxml backend requested but lxml is not installed")
+            self._parser = etree.HTMLParser(target=self._collector)
+        elif self.backend == "html.parser":
+            self._parser = _StdlibAdapter(self._collector)
+        else:
+            raise ValueError(f"Unknown HTML parser backend: {self.backend}")
+
+    def feed(self, markup: str) -> None:
+        if markup:
+            self._parser.feed(markup)
+
+    def mark_truncated(self) -> None:
+        """Record that the markup fed was cut short (e.g. by a byte cap)."""
+        self._collector.truncated = True
+
+    def close(self) -> DocumentStats:
+        if self.backend == "lxml":
+            try:
+                self._parser.close()
+            except etree.XMLSyntaxError:
+                # lxml refuses to close an empty document; the counts stand.
+                pass
+        else:
+            self._parser.close()
+        return self._collector.close()
+
+
+def default_backend() -> str:
+    """Return the fastest available parser backend."""
+    return "lxml" if etree is not None else "html.parser"
+
+
+def analyze_html(html: str, backend: Optional[str] = None, max_text_chars: Optional[int] = None) -> DocumentStats:
+    """Parse HTML once and return visible text with structural counts."""
+    analyzer = DocumentAnalyzer(backend, max_text_chars)
+    analyzer.feed(html or "")
+    return analyzer.close()
 
 
 def extract_visible_text(html: str) -> str:
     """Return a cleaned string containing visible text from HTML."""
     if not html:
         return ""
+    return " ".join(analyze_html(html).text.split())
 
-    soup = BeautifulSoup(html, "html.parser")
 
-    for element in soup(["script", "style", "noscript"]):
-        element.decompose()
-
-    text = soup.get_text(separator=" ", strip=True)
-    return " ".join(text.split())
-
-
-def parse_html(html: str) -> BeautifulSoup:
+def parse_html(html: str) -> "BeautifulSoup":
     """Parse HTML into a BeautifulSoup document."""
+    from bs4 import BeautifulSoup
+
     return BeautifulSoup(html or "", "html.parser")
 
 
-__all__ = ["extract_visible_text", "parse_html"]
+__all__ = ["DocumentAnalyzer", "analyze_html", "default_backend", "extract_visible_text", "parse_html"]
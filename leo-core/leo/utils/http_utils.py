@@ -0,0 +1,72 @@
+"""HTTP helpers for Leo Core — pooled, keep-alive sessions shared by crawlers."""
+from __future__ import annotations
+
+import codecs
+import re
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = "LEO-Core/0.2"
+HTML_CONTENT_TYPES = frozenset({"text/html", "application/xhtml+xml"})
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+_default_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def build_session(per_host: int = 10, max_hosts: int = 100) -> requests.Session:
+    """Create a keep-alive session with at most `per_host` connections per host.
+
+    Requests beyond the per-host limit wait for a pooled connection instead of
+    opening a new one, so a batch never hammers a single origin.
+    """
+    adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=per_host, pool_block=True)
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _default_session
+    if _default_session is None:
+        with _session_lock:
+            if _default_session is None:
+                _default_session = build_session()
+    return _default_session
+
+
+def media_type(content_type: Optional[str]) -> str:
+    """`'text/html; charset=utf-8'` -> `'text/html'` ('' when missing)."""
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+def is_html(content_type: Optional[str]) -> bool:
+    """True for HTML media types; a missing Content-Type is given the benefit of the doubt."""
+    kind = media_type(content_type)
+    return not kind or kind in HTML_CONTENT_TYPES
+
+
+def sniff_encoding(content_type: Optional[str], head: bytes = b"") -> str:
+    """Charset from the Content-Type header, else from a <meta> tag in `head`, else UTF-8."""
+    for candidate in (
+        re.search(r"charset=[\"']?([\w-]+)", content_type or "", re.IGNORECASE),
+        _META_CHARSET.search(head[:4096]),
+    ):
+        if candidate:
+            name = candidate.group(1)
+            name = name.decode("ascii", "ignore") if isinstance(name, bytes) else name
+            try:
+                return codecs.lookup(name).name
+            except LookupError:
+                continue
+    return "utf-8"
+
+
+__all__ = ["USER_AGENT", "build_session", "get_session", "is_html", "media_type", "sniff_encoding"]
@@ -0,0 +1,42 @@
+"""Logging helpers for Leo Core.
+
+All agents log through the `leo` logger hierarchy. The level comes from
+`LEO_LOG_LEVEL` (or the chart's `LOG_LEVEL`), default INFO; set it to WARNING
+to silence per-stage chatter in hot batch loops.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sys
+
+_configured = False
+
+
+def _configure() -> None:
+    global _configured
+    if _configured:
+        return
+    root = logging.getLogger("leo")
+    if not root.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        root.addHandler(handler)
+        root.propagate = False
+    root.setLevel(os.getenv("LEO_LOG_LEVEL", os.getenv("LOG_LEVEL", "INFO")).upper())
+    _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Return a logger under the `leo` hierarchy, configuring the hierarchy on first use."""
+    _configure()
+    return logging.getLogger(name if name.startswith("leo") else f"leo.{name}")
+
+
+def set_level(level: str) -> None:
+    """Change the log level of every `leo` logger at runtime."""
+    _configure()
+    logging.getLogger("leo").setLevel(level.upper())
+
+
+__all__ = ["get_logger", "set_level"]
@@ -1,10 +1,9 @@
 """Metric utilities for Leo Core."""
 from __future__ import annotations
 
-from typing import Iterable, List
+from typing import Iterable, List, Optional, Sequence
 
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
 
 def normalize_count(count: int, max_expected: int = 10) -> float:
@@ -14,11 +13,11 @@ def normalize_count(count: int, max_expected: int = 10) -> float:
     return max(0.0, min(count / float(max_expected), 1.0))
 
 
-def text_richness(text: str, baseline: int = 2000) -> float:
-    """Estimate textual richness as a function of length."""
+def text_richness(text: str, baseline: int = 2000, characters: Optional[int] = None) -> float:
+    """Estimate textual richness as a function of length (`characters`, when already known)."""
     if baseline <= 0:
         return 0.0
-    length = len(text.strip())
+    length = len(text.strip()) if characters is None else characters
     if length <= 0:
         return 0.0
     return max(0.0, min(length / float(baseline), 1.0))
@@ -32,46 +31,92 @@ def chunk_text(text: str, chunk_size: int = 500) -> List[str]:
     return [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
 
 
-def embed_texts(chunks: Iterable[str], dimensions: int = 64) -> np.ndarray:
-    """Generate deterministic stub embeddings for text chunks."""
-    vectors = []
-    for chunk in chunks:
-        vector = np.zeros(dimensions, dtype=float)
-        for index, char in enumerate(chunk.encode("utf-8")):
-            vector[index % dimensions] += (char % 32) / 31.0
-        norm = np.linalg.norm(vector)
-        if norm > 0:
-            vector /= norm
-        vectors.append(vector)
-    if not vectors:
-        return np.zeros((0, dimensions), dtype=float)
-    return np.vstack(vectors)
+def embed_texts(chunks: Iterable[str], dimensions: int = 64, block_bytes: int = 1 << 18) -> np.ndarray:
+    """Generate deterministic stub embeddings for text chunks.
+
+    Each chunk's UTF-8 bytes are folded into `dimensions` buckets by position
+    and the vectors are L2-normalized. All chunks are processed as flat NumPy
+    arrays in blocks of roughly `block_bytes` bytes, so the temporary index
+    arrays stay bounded however many pages are embedded at once.
+    """
+    chunks = list(chunks)
+    vectors = np.zeros((len(chunks), dimensions), dtype=float)
+    start = 0
+    while start < len(chunks):
+        encoded: List[bytes] = []
+        size = 0
+        while start + len(encoded) < len(chunks) and (not encoded or size < block_bytes):
+            data = chunks[start + len(encoded)].encode("utf-8")
+            encoded.append(data)
+            size += len(data)
+        rows = len(encoded)
+        lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=rows)
+        values = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        # Position of every byte inside its own chunk, and the chunk it belongs to
+        chunk_index = np.repeat(np.arange(rows), lengths)
+        positions = np.arange(values.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        buckets = chunk_index * dimensions + positions % dimensions
+        vectors[start : start + rows] = np.bincount(
+            buckets, weights=(values % 32) / 31.0, minlength=rows * dimensions
+        ).reshape(rows, dimensions)
+        start += rows
+    return _normalize_rows(vectors)
+
+
+def _normalize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """Return L2-normalized rows; all-zero rows stay zero."""
+    embeddings = np.asarray(embeddings, dtype=float)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return np.divide(embeddings, norms, out=np.zeros_like(embeddings), where=norms > 0)
 
 
 def average_cosine_similarity(embeddings: np.ndarray) -> float:
-    """Compute the average pairwise cosine similarity for embeddings."""
+    """Compute the average pairwise cosine similarity for embeddings.
+
+    Uses the identity sum_{i!=j} u_i.u_j = |sum_i u_i|^2 - sum_i |u_i|^2 over
+    unit vectors, which is O(n*d) and never materializes the n x n matrix.
+    """
     if embeddings.size == 0:
         return 0.0
     if embeddings.shape[0] == 1:
         return 1.0
-    similarity_matrix = cosine_similarity(embeddings)
-    # Exclude self similarities by masking the diagonal
-    n = embeddings.shape[0]
-    mask = ~np.eye(n, dtype=bool)
-    if mask.sum() == 0:
-        return 0.0
-    values = similarity_matrix[mask]
-    return float(np.clip(values.mean(), 0.0, 1.0))
+    return cohesion_scores(embeddings, [embeddings.shape[0]])[0]
+
+
+def cohesion_scores(embeddings: np.ndarray, counts: Sequence[int]) -> List[float]:
+    """Mean off-diagonal cosine similarity for consecutive groups of rows.
+
+    `counts[k]` rows of `embeddings` belong to page k (in order). Pages with a
+    single chunk score 1.0 and empty pages 0.0, matching
+    `average_cosine_similarity`.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    if counts.size == 0:
+        return []
+    unit = _normalize_rows(embeddings)
+    squared = np.einsum("ij,ij->i", unit, unit)
+    scores = np.zeros(counts.size, dtype=float)
+    present = counts > 0
+    if present.any():
+        starts = (np.cumsum(counts) - counts)[present]
+        sums = np.add.reduceat(unit, starts, axis=0)
+        diagonal = np.add.reduceat(squared, starts)
+        n = counts[present].astype(float)
+        pairs = np.maximum(n * (n - 1), 1.0)
+        means = (np.einsum("ij,ij->i", sums, sums) - diagonal) / pairs
+        scores[present] = np.where(n > 1, np.clip(means, 0.0, 1.0), 1.0)
+    return scores.tolist()
 
 
 def compute_retrieval_score(
     text: str,
     heading_count: int,
     anchor_count: int,
+    characters: Optional[int] = None,
 ) -> float:
     """Combine retrieval-oriented heuristics into a 0-1 score."""
 
-    richness = text_richness(text, baseline=3000)
+    richness = text_richness(text, baseline=3000, characters=characters)
     heading_signal = normalize_count(heading_count, max_expected=12)
     anchor_signal = normalize_count(anchor_count, max_expected=60)
 
@@ -84,6 +129,7 @@ __all__ = [
     "chunk_text",
     "embed_texts",
     "average_cosine_similarity",
+    "cohesion_scores",
     "text_richness",
     "compute_retrieval_score",
 ]
@@ -0,0 +1,45 @@
+"""OpenAI SDK helpers for Leo Core."""
+from __future__ import annotations
+
+import os
+import threading
+
+DEFAULT_TIMEOUT = float(os.getenv("LEO_OPENAI_TIMEOUT", "30"))
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def load_openai():
+    """Return the `openai` module, or None when it is not installed.
+
+    The SDK takes hundreds of milliseconds to import, so agents only call this
+    when an API key is actually configured.
+    """
+    try:
+        import openai
+    except ImportError:
+        return None
+    return openai
+
+
+def get_client():
+    """Return a process-wide OpenAI client with explicit timeouts, or None when unavailable.
+
+    Reusing one client keeps its HTTP connection pool warm across audits.
+    """
+    global _client
+    api_key = os.getenv("OPENAI_API_KEY", "")
+    if not api_key:
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                openai = load_openai()
+                if openai is None:
+                    return None
+                _client = openai.OpenAI(api_key=api_key, timeout=DEFAULT_TIMEOUT, max_retries=2)
+    return _client
+
+
+__all__ = ["DEFAULT_TIMEOUT", "get_client", "load_openai"]
@@ -0,0 +1,170 @@
+"""
+leo/utils/text_utils.py
+Single-pass text statistics shared by the agents.
+
+`compute_text_stats(text)` tokenizes the visible text once into lowercase
+words and returns a `TextStats` artifact: token count, average token length,
+stripped character count, keyword hits and the SimHash fingerprint used for
+near-duplicate detection (leo/dedup.py). Keywords come from
+`leo/config/keywords.yml` and may be phrases; they are matched on whole
+tokens by a token-level Aho-Corasick automaton (`KeywordMatcher`), so the
+cost is one step per token however many keywords are configured, and "ai"
+never matches inside "maintain".
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import yaml
+from leo.state import TextStats
+
+KEYWORDS_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "keywords.yml")
+DEFAULT_KEYWORDS = ("ai", "ml", "data", "cloud", "intelligence", "automation")
+
+SIMHASH_MIN_WORDS = 50  # shorter texts have too few shingles for a meaningful fingerprint
+SIMHASH_SHINGLE = 3
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of a text."""
+    return _TOKEN.findall(text.lower())
+
+
+def simhash_tokens(tokens: Sequence[str], shingle: int = SIMHASH_SHINGLE) -> Optional[int]:
+    """64-bit SimHash of the tokens' `shingle`-word shingles, or None under `SIMHASH_MIN_WORDS` tokens."""
+    if len(tokens) < SIMHASH_MIN_WORDS:
+        return None
+    grams = {" ".join(tokens[i : i + shingle]) for i in range(len(tokens) - shingle + 1)}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little") for g in grams),
+        dtype="<u8",
+        count=len(grams),
+    )
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    majority = bits.sum(axis=0, dtype=np.int64) * 2 > len(grams)
+    return int(np.packbits(majority, bitorder="little").view("<u8")[0])
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over word tokens. Every occurrence of every keyword
+    is reported, including overlapping ones ("machine learning" and
+    "learning" both match "machine learning").
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        for keyword in keywords:
+            tokens = tokenize(keyword)
+            if tokens and " ".join(tokens) not in self.keywords:
+                self._insert(tokens, len(self.keywords))
+                self.keywords.append(" ".join(tokens))
+        self._link()
+
+    def _insert(self, tokens: Sequence[str], index: int) -> None:
+        node = 0
+        for token in tokens:
+            nxt = self._goto[node].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][token] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        self._out[node] += (index,)
+
+    def _link(self) -> None:
+        # Breadth-first: a node's failure link is the longest proper suffix that is also a trie path.
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                self._out[child] += self._out[self._fail[child]]
+
+    def count(self, tokens: Iterable[str]) -> Dict[str, int]:
+        """Occurrences of each keyword in the token stream (keywords that never occur are omitted)."""
+        goto, fail, out, root = self._goto, self._fail, self._out, self._goto[0]
+        found = []
+        node = 0
+        for token in tokens:
+            if node == 0 and token not in root:
+                continue  # the common case: a token that starts no keyword
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            if out[node]:
+                found.append(out[node])
+        hits = Counter(chain.from_iterable(found))
+        return {self.keywords[index]: n for index, n in hits.items()}
+
+
+def load_keywords(path: Optional[str] = None) -> List[str]:
+    """Keywords from a YAML file (a list, or a list under a `keywords:` key)."""
+    try:
+        with open(path or KEYWORDS_PATH, "r") as f:
+            data = yaml.safe_load(f) or []
+    except OSError:
+        return list(DEFAULT_KEYWORDS)
+    keywords = data.get("keywords", []) if isinstance(data, dict) else data
+    return [str(keyword) for keyword in keywords]
+
+
+_matchers: Dict[str, Tuple[float, KeywordMatcher]] = {}
+_matchers_lock = threading.Lock()
+
+
+def get_keyword_matcher(path: Optional[str] = None) -> KeywordMatcher:
+    """The automaton for a keyword file, built once and rebuilt only when the file's mtime changes."""
+    path = path or KEYWORDS_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = -1.0
+    cached = _matchers.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, KeywordMatcher(load_keywords(path)))
+        with _matchers_lock:
+            _matchers[path] = cached
+    return cached[1]
+
+
+def compute_text_stats(text: str, matcher: Optional[KeywordMatcher] = None) -> TextStats:
+    """Tokenize `text` once and derive every statistic the agents use from that pass."""
+    text = text or ""
+    tokens = tokenize(text)
+    keywords = (matcher or get_keyword_matcher()).count(tokens)
+    fingerprint = simhash_tokens(tokens)
+    return TextStats(
+        tokens=len(tokens),
+        avg_token_length=round(sum(map(len, tokens)) / len(tokens), 4) if tokens else 0.0,
+        characters=len(text.strip()),
+        keyword_hits=sum(keywords.values()),
+        keywords=keywords,
+        fingerprint=None if fingerprint is None else f"{fingerprint:016x}",
+    )
+
+
+__all__ = [
+    "KeywordMatcher",
+    "compute_text_stats",
+    "get_keyword_matcher",
+    "load_keywords",
+    "simhash_tokens",
+    "tokenize",
+]
@@ -0,0 +1,33 @@
+"""
+leo/utils/url_utils.py
+URL normalization shared by the caches, job deduplication and the site crawler.
+"""
+
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid"}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for cache keys and deduplication: lowercase scheme
+    and host, default port and fragment dropped, empty path as "/", and query
+    parameters sorted with tracking parameters (utm_*, gclid, ...) removed.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "http"
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        host = f"{parts.username}@{host}"
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not (k.lower().startswith("utm_") or k.lower() in TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+__all__ = ["normalize_url"]
@@ -0,0 +1,82 @@
+"""Shared fixtures: an isolated SQLite database, offline agents and a local stub HTTP site."""
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+os.environ["LEO_SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="leo-tests-"), "leo.db")
+os.environ.pop("OPENAI_API_KEY", None)
+
+
+class StubSite:
+    """In-process HTTP server serving canned pages; `routes` maps path -> body or (status, headers, body)."""
+
+    def __init__(self, routes=None, delay=0.0):
+        self.routes = dict(routes or {})
+        self.delay = delay
+        self.hits = []
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                site.hits.append((self.path, dict(self.headers)))
+                if site.delay:
+                    time.sleep(site.delay)
+                route = site.routes.get(self.path)
+                if route is None:
+                    status, headers, body = 404, {}, "not found"
+                elif callable(route):
+                    status, headers, body = route(self)
+                elif isinstance(route, tuple):
+                    status, headers, body = route
+                else:
+                    status, headers, body = 200, {}, route
+                payload = body.encode("utf-8") if isinstance(body, str) else body
+                self.send_response(status)
+                headers = {"Content-Type": "text/html; charset=utf-8", **headers}
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                if status != 304:
+                    self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if status != 304:
+                    self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_site():
+    """Factory fixture: `stub_site(routes, delay=...)` returns a running StubSite."""
+    sites = []
+
+    def factory(routes=None, delay=0.0):
+        site = StubSite(routes, delay).__enter__()
+        sites.append(site)
+        return site
+
+    yield factory
+    for site in sites:
+        site.__exit__(None, None, None)
@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+from leo.agents.advisor_agent import AdvisorAgent, SuggestionService
+from leo.llm import FakeLLMBackend, LimitedLLMBackend, LLMBackend
+from leo.state import LeoState
+
+
+def audited(structure, semantic, rank):
+    return LeoState(url="https://x.com", metrics={"structure": structure, "semantic": semantic}, leo_rank=rank)
+
+
+def test_suggestions_are_memoized_per_metric_bucket():
+    fake = FakeLLMBackend()
+    agent = AdvisorAgent(service=SuggestionService(fake, bucket=5))
+
+    first = agent.run(audited(61.2, 40.9, 51.0)).suggestions
+    assert first == ["Improve structure (now 60.0).", "Clarify content (semantic 40.0).", "Target LeoRank above 50.0."]
+    # Same buckets: served from the cache.
+    assert agent.run(audited(59.9, 39.1, 52.4)).suggestions == first
+    assert len(fake.prompts) == 1
+    agent.run(audited(80.0, 40.0, 50.0))
+    assert len(fake.prompts) == 2
+
+
+def test_concurrent_misses_are_batched_and_deduplicated():
+    fake = FakeLLMBackend(latency=0.05)
+    service = SuggestionService(fake, max_wait=0.2)
+    keys = [(10.0, 20.0, 30.0), (40.0, 50.0, 60.0), (10.0, 20.0, 30.0)]
+    results = {}
+
+    def worker(i):
+        results[i] = service.suggest(keys[i])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(fake.prompts) == 1 and "Website 2:" in fake.prompts[0]
+    assert results[0] == results[2] == ["Improve structure (now 10.0).", "Clarify content (semantic 20.0).",
+                                        "Target LeoRank above 30.0."]
+    assert results[1][0] == "Improve structure (now 40.0)."
+
+
+def test_llm_calls_are_capped_and_failures_fall_back_to_static_tips():
+    slots = threading.BoundedSemaphore(2)
+    fake = FakeLLMBackend(latency=0.1)
+    backend = LimitedLLMBackend(fake, slots)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+    original = fake.complete
+
+    def tracked(prompt, max_tokens=200):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        try:
+            return original(prompt, max_tokens)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    fake.complete = tracked
+    threads = [threading.Thread(target=backend.complete, args=(f"prompt {i}",)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 2
+
+    agent = AdvisorAgent(backend=FakeLLMBackend(fail=True))
+    assert agent.run(audited(30.0, 30.0, 30.0)).suggestions[0].startswith("Add descriptive <alt> tags")
+
+
+def test_incomplete_backend_fails_at_construction():
+    class NoComplete(LLMBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        NoComplete()
@@ -6,3 +6,48 @@ def test_structure_score_present():
     s = LeoState(url="https://x.com", html=html)
     s = StructureAgent().run(s)
     assert "structure" in s.metrics
+
+
+def test_document_analysis_backends_agree():
+    from leo.utils.html_utils import analyze_html, default_backend
+
+    html = (
+        "<html><head><meta charset='utf-8'><title>T</title><script>var x = 1;</script></head>"
+        "<body><noscript>hidden</noscript><h1>H</h1><h3>S</h3><img src='a.jpg' alt='x'><img src='b.jpg'>"
+        "<a href='/'>home</a><a href='#top'>top</a><a>plain</a><p>Hello world</p></body></html>"
+    )
+    baseline = analyze_html(html, "html.parser")
+    assert baseline.text == "T H S home top plain Hello world"
+    assert (baseline.headings, baseline.metas, baseline.images, baseline.images_missing_alt) == (2, 1, 2, 1)
+    assert (baseline.links, baseline.links_broken) == (2, 1)
+    fast = analyze_html(html, default_backend())
+    assert fast.model_dump(exclude={"parser"}) == baseline.model_dump(exclude={"parser"})
+
+
+def test_structure_agent_reuses_document():
+    from leo.state import DocumentStats
+
+    s = LeoState(url="https://x.com", html="<html></html>", document=DocumentStats(headings=10, metas=15))
+    s = StructureAgent().run(s)
+    assert s.metrics["structure"] == 100.0
+
+
+def test_crawler_streams_within_byte_and_text_budgets(stub_site):
+    from leo.agents.crawler_agent import CrawlerAgent
+
+    page = "<html><body><h1>Big</h1>" + "<p>word " * 50000 + "</body></html>"
+    site = stub_site({
+        "/big": page,
+        "/latin": (200, {"Content-Type": "text/html; charset=iso-8859-1"}, "<p>café</p>".encode("latin-1")),
+        "/pdf": (200, {"Content-Type": "application/pdf"}, "%PDF-1.4"),
+    })
+    crawler = CrawlerAgent(max_bytes=20000, max_text_chars=500)
+
+    s = crawler.run(LeoState(url=site.url("/big")))
+    assert s.error is None and len(s.html) == 20000
+    assert s.document.truncated and len(s.text) == 500 and s.text.startswith("Big word word")
+
+    assert crawler.run(LeoState(url=site.url("/latin"))).text == "café"
+
+    s = crawler.run(LeoState(url=site.url("/pdf")))
+    assert "unsupported content type application/pdf" in s.error
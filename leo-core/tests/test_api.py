@@ -7,3 +7,152 @@ def test_health():
     r = client.get("/healthz")
     assert r.status_code == 200
     assert r.json().get("status") == "ok"
+
+
+def test_internal_stats_exposes_stage_instrumentation(stub_site):
+    import asyncio
+    import json
+
+    from leo.graph import run_pipeline
+    from leo.mcp.server import leo_stats
+
+    site = stub_site({"/": "<html><body><h1>Stats</h1><p>data</p></body></html>"})
+    run_pipeline(site.url("/"), revalidate=False)
+
+    r = client.get("/internal/stats")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain")
+    assert 'leo_stage_duration_seconds_count{stage="structure"}' in r.text
+    assert "leo_fetch_bytes_total" in r.text
+    assert 'leo_db_duration_seconds_count{op="save_score"}' in r.text
+
+    stats = json.loads(asyncio.run(leo_stats()))
+    assert stats["leo_stage_duration_seconds"]["stage=crawler"]["count"] >= 1
+
+
+def test_audit_jobs_return_immediately_and_coalesce(stub_site):
+    import time
+
+    site = stub_site({"/slow": "<html><body><h1>Jobs</h1><p>data cloud</p></body></html>"}, delay=0.5)
+    url = site.url("/slow")
+
+    started = time.perf_counter()
+    first = client.post("/audits", json={"url": url})
+    second = client.post("/audits", json={"url": url})
+    assert time.perf_counter() - started < 0.4
+    assert first.status_code == 202 and first.json()["status"] in ("queued", "running")
+    assert second.json()["id"] == first.json()["id"]
+
+    job_id = first.json()["id"]
+    for _ in range(100):
+        body = client.get(f"/audits/{job_id}").json()
+        if body["status"] == "done":
+            break
+        time.sleep(0.05)
+    assert body["result"]["url"] == url and body["result"]["leo_rank"] is not None
+    assert len(site.hits) == 1
+
+    assert client.get("/audits/nope").status_code == 404
+
+
+def test_audit_stream_emits_stage_events_before_result(stub_site):
+    import json
+
+    site = stub_site({"/s": "<html><head><title>S</title></head><body><h1>Stream</h1><p>data cloud</p></body></html>"})
+
+    with client.stream("GET", "/audit/stream", params={"url": site.url("/s")}) as r:
+        assert r.headers["content-type"].startswith("text/event-stream")
+        events = [json.loads(line[len("data: "):]) for line in r.iter_lines() if line.startswith("data: ")]
+
+    stages = [e["stage"] for e in events if e.get("event") == "stage"]
+    assert stages[0] == "crawler" and stages[-1] == "advisor"
+    assert "structure" in next(e for e in events if e.get("stage") == "scoring")["metrics"]
+    assert events[-1]["event"] == "done" and events[-1]["result"]["leo_rank"] is not None
+
+    with client.websocket_connect("/ws/audit") as ws:
+        ws.send_json({"url": site.url("/s")})
+        received = [ws.receive_json()]
+        while received[-1]["event"] not in ("done", "failed"):
+            received.append(ws.receive_json())
+    assert received[0]["event"] == "job" and received[-1]["event"] == "done"
+    # Unchanged page: the crawler revalidates and the stored analysis is reused.
+    assert [e["stage"] for e in received if e["event"] == "stage"] == ["crawler"]
+    assert received[-1]["result"]["leo_rank"] == events[-1]["result"]["leo_rank"]
+
+
+def test_score_query_endpoints():
+    from leo import db
+
+    db.save_scores([("https://q.example/", 50.0, "2032-05-01T00:00:00"), ("https://q.example/", 70.0, "2032-05-02T00:00:00")])
+
+    r = client.get("/scores/history", params={"url": "https://q.example/", "limit": 1})
+    assert r.json()["results"][0]["rank"] == 70.0 and r.json()["next_cursor"]
+    older = client.get("/scores/history", params={"url": "https://q.example/", "limit": 1, "cursor": r.json()["next_cursor"]})
+    assert older.json()["results"][0]["rank"] == 50.0
+    assert client.get("/scores/history", params={"url": "x", "cursor": "!!"}).status_code == 400
+
+    board = client.get("/scores/leaderboard", params={"limit": 1000}).json()["results"]
+    assert {"url": "https://q.example/", "rank": 70.0, "timestamp": "2032-05-02T00:00:00", "audits": 2} in board
+
+    stats = client.get("/scores/aggregate", params={"url": "https://q.example/", "daily": True}).json()
+    assert stats["count"] == 2 and stats["p50"] == 50.0 and len(stats["days"]) == 2
+
+
+def test_export_streams_ndjson_csv_and_gzip():
+    import gzip
+    import json
+
+    from leo import db
+
+    db.save_scores([(f"https://export.example/{i}", float(i), f"2033-01-01T00:00:{i:02d}") for i in range(50)])
+    params = {"url": "https://export.example/7"}
+
+    r = client.get("/export", params=params)
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["rank"] for line in r.text.splitlines()] == [7.0]
+
+    r = client.get("/export", params={"format": "csv", "since": "2033-01-01", "until": "2033-01-02"})
+    lines = r.text.splitlines()
+    assert lines[0] == "id,url,rank,timestamp" and len(lines) == 51
+
+    r = client.get("/export", params={"gzip": True, "since": "2033-01-01", "until": "2033-01-02"})
+    assert r.headers["content-type"] == "application/gzip"
+    assert len(gzip.decompress(r.content).splitlines()) == 50
+
+    assert client.get("/export", params={"format": "xml"}).status_code == 400
+
+
+def test_audit_runs_only_requested_metrics(stub_site):
+    site = stub_site({"/sel": "<html><body><h1>Sel</h1><p>data cloud ai</p></body></html>"})
+    r = client.get("/audit", params={"url": site.url("/sel"), "metrics": "structure", "suggestions": "false"})
+    assert r.status_code == 200
+    body = r.json()
+    assert set(body["metrics"]) == {"structure"} and "leo_rank" not in body and "suggestions" not in body
+
+    assert client.get("/audit", params={"url": site.url("/sel"), "metrics": "speed"}).status_code == 400
+
+
+def test_failed_audit_returns_the_error(stub_site):
+    site = stub_site({})
+    r = client.get("/audit", params={"url": site.url("/missing")})
+    assert r.status_code == 200
+    assert set(r.json()) == {"error"} and "404" in r.json()["error"]
+
+
+def test_audit_streams_end_with_failed_event_for_unreachable_pages(stub_site):
+    import json
+
+    site = stub_site({})
+    url = site.url("/gone")
+    with client.stream("GET", "/audit/stream", params={"url": url}) as r:
+        events = [json.loads(line[len("data: "):]) for line in r.iter_lines() if line.startswith("data: ")]
+    # The audit stops at the failed fetch: the failed event directly follows the crawler stage.
+    assert events[0]["url"] == url
+    assert [(e["event"], e.get("stage")) for e in events[1:]] == [("stage", "crawler"), ("failed", None)]
+    assert "404" in events[-1]["error"]
+
+    with client.websocket_connect("/ws/audit") as ws:
+        ws.send_json({"url": url})
+        received = [ws.receive_json()]
+        while received[-1]["event"] not in ("done", "failed"):
+            received.append(ws.receive_json())
+    assert [(e["event"], e.get("stage")) for e in received[1:]] == [("stage", "crawler"), ("failed", None)]
@@ -0,0 +1,46 @@
+from leo import db
+from leo.batch import BatchStats, run_pipeline_many
+
+PAGE = "<html><head><meta name='d'><title>Page</title></head><body><h1>Hi</h1><p>data cloud ai</p></body></html>"
+
+
+def test_batch_streams_results_and_overlaps_fetches(stub_site):
+    # The schema and the agent modules are created/imported lazily on first use; warm them
+    # outside the timed window so only fetch overlap is measured.
+    db.init_db()
+    import leo.graph  # noqa: F401
+
+    site = stub_site({f"/p{i}": PAGE for i in range(8)}, delay=0.2)
+    urls = [site.url(f"/p{i}") for i in range(8)]
+
+    stats = BatchStats()
+    results = list(run_pipeline_many(urls, concurrency=8, per_host=8, stats=stats))
+
+    assert sorted(r.url for r in results) == sorted(urls)
+    assert all(r.error is None and r.metrics["structure"] > 0 for r in results)
+    assert stats.completed == 8 and stats.failed == 0
+    # Sequential fetching would need at least 8 * 0.2s.
+    assert stats.elapsed < 1.2
+    assert stats.throughput > 8 / 1.6
+
+
+def test_batch_reports_failures(stub_site):
+    site = stub_site({})
+    stats = BatchStats()
+    results = list(run_pipeline_many([site.url("/missing")], stats=stats))
+    assert results[0].error and stats.failed == 1
+
+
+def test_batch_process_pool_matches_in_process_analysis(stub_site):
+    routes = {f"/p{i}": PAGE.replace("Hi", f"Hi {i}") for i in range(4)}
+    # Separate sites, so the second run is not served from the first run's snapshots.
+    inline_site, pooled_site = stub_site(routes), stub_site(routes)
+    inline = {r.url[len(inline_site.base_url):]: r for r in run_pipeline_many(map(inline_site.url, routes))}
+    pooled = list(run_pipeline_many(map(pooled_site.url, routes), processes=2))
+
+    assert len(pooled) == 4
+    for result in pooled:
+        expected = inline[result.url[len(pooled_site.base_url):]]
+        assert result.error is None
+        assert result.metrics == expected.metrics
+        assert result.document == expected.document
@@ -0,0 +1,35 @@
+from leo import db
+from leo.bench import compare, generate_page, run_benchmarks
+
+
+def test_generated_pages_have_requested_shape():
+    from leo.utils.html_utils import analyze_html
+
+    doc = analyze_html(generate_page(sections=10, images=12, links=30))
+    assert doc.headings == 10
+    assert doc.images == 12
+    assert doc.links == 30 and doc.links_broken == 3
+
+
+def test_run_benchmarks_reports_and_restores_db():
+    sqlite_path = db.SQLITE_PATH
+    report = run_benchmarks(sizes=("small",), iterations=2, batch_audits=4, concurrency=2, db_rows=20)
+    results = report["results"]
+
+    assert results["pipeline.small.audits_per_s"] > 0
+    assert results["pipeline.small.peak_memory_bytes"] > 0
+    assert "pipeline.small.crawler_ms" in results and "pipeline.small.scoring_ms" in results
+    assert results["batch.c2.audits_per_s"] > 0
+    assert results["db.sqlite.bulk_writes_per_s"] > 0
+    # Benchmark rows went to a scratch database.
+    assert db.SQLITE_PATH == sqlite_path
+    assert not any(r["url"].startswith("https://bench.example") for r in db.get_recent_scores(50))
+
+
+def test_compare_flags_regressions_by_direction():
+    baseline = {"x.audits_per_s": 100.0, "x.crawler_ms": 10.0, "x.peak_memory_bytes": 1000, "gone_ms": 1.0}
+    assert compare({"x.audits_per_s": 90.0, "x.crawler_ms": 12.0, "x.peak_memory_bytes": 1100}, baseline) == []
+
+    regressions = compare({"x.audits_per_s": 50.0, "x.crawler_ms": 20.0, "x.peak_memory_bytes": 500}, baseline)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("x.audits_per_s") and regressions[1].startswith("x.crawler_ms")
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from leo.cache import TTLCache, result_key
+from leo.jobs import JobManager
+from leo.state import LeoState
+from leo.utils.url_utils import normalize_url
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_fresh_stale_expired_and_lru():
+    clock = Clock()
+    cache = TTLCache("test", max_entries=2, ttl=10, grace=5, clock=clock)
+    cache.set("a", 1)
+    assert cache.get("a") == (1, True)
+    clock.now = 12
+    assert cache.get("a") == (1, False)
+    clock.now = 16
+    assert cache.get("a") is None and len(cache) == 0
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None and cache.get("a")[0] == 1 and cache.get("c")[0] == 3
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://Example.com:443?b=2&utm_source=x&a=1#top") == "https://example.com/?a=1&b=2"
+    assert normalize_url("http://example.com:8080/p") == "http://example.com:8080/p"
+    assert result_key("https://example.com/") == result_key("https://EXAMPLE.com")
+
+
+def test_result_key_follows_the_weights_the_scoring_agent_loads(tmp_path, monkeypatch):
+    import os
+
+    from leo.agents import scoring_agent
+
+    weights = tmp_path / "weights.yml"
+    weights.write_text("structure: 0.4\nsemantic: 0.4\nretrieval: 0.2\n")
+    monkeypatch.setattr(scoring_agent, "WEIGHTS_PATH", str(weights))
+    before = result_key("https://example.com")
+    assert before[1] == scoring_agent.weights_version()
+
+    weights.write_text("structure: 0.6\nsemantic: 0.2\nretrieval: 0.2\n")
+    os.utime(weights, (1, 1))  # a distinct mtime even on coarse-grained filesystems
+    assert result_key("https://example.com") != before
+
+
+def test_stale_result_is_served_while_one_refresh_runs():
+    clock = Clock()
+    release = threading.Event()
+    calls = []
+
+    def runner(url, on_stage=None):
+        calls.append(url)
+        release.wait(5)
+        return LeoState(url=url, leo_rank=float(len(calls)))
+
+    manager = JobManager(workers=2, runner=runner, cache=TTLCache("t", ttl=10, grace=100, clock=clock))
+    assert manager.lookup("https://example.com") is None
+    job = manager.submit("https://example.com")
+    release.set()
+    job.future.result(5)
+    assert manager.lookup("https://example.com/").leo_rank == 1.0
+
+    release.clear()
+    clock.now = 50
+    # Stale: served immediately, and repeated lookups share one refresh.
+    assert manager.lookup("https://example.com").leo_rank == 1.0
+    assert manager.lookup("https://example.com").leo_rank == 1.0
+    release.set()
+    for _ in range(100):
+        hit = manager.cache.get(result_key("https://example.com"))
+        if hit and hit[1]:
+            break
+        time.sleep(0.02)
+    assert len(calls) == 2 and hit[0].leo_rank == 2.0
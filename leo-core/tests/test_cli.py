@@ -0,0 +1,41 @@
+"""Cold-start guard: `python -X importtime` budget for short CLI invocations."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Recorded budget for the total import time of `leo --help` and `leo recent`.
+IMPORT_BUDGET_MS = 600
+HEAVY_MODULES = {"uvicorn", "fastapi", "openai", "bs4", "numpy", "yaml", "psycopg2", "requests", "leo.graph", "leo.mcp.server"}
+
+
+def _import_profile(*args):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "cli.py", *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+    modules, total_us = set(), 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.add(name.strip())
+        if not name.startswith("  "):  # top-level import
+            total_us += int(cumulative)
+    return modules, total_us / 1000
+
+
+@pytest.mark.parametrize("args", [("--help",), ("recent", "--limit", "1")])
+def test_cli_cold_start_stays_lean(args):
+    modules, total_ms = _import_profile(*args)
+    assert not modules & HEAVY_MODULES
+    assert total_ms < IMPORT_BUDGET_MS
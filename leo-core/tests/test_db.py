@@ -0,0 +1,145 @@
+import threading
+
+from leo import db
+
+
+def test_bulk_save_and_recent_scores():
+    written = db.save_scores([("https://bulk.example/a", 10.0), ("https://bulk.example/b", 20.0, "2030-01-01T00:00:00")])
+    assert written == 2
+    rows = db.get_recent_scores(2)
+    assert [r["url"] for r in rows] == ["https://bulk.example/b", "https://bulk.example/a"]
+    assert rows[0]["timestamp"] == "2030-01-01T00:00:00"
+
+
+def test_sqlite_connections_are_pooled_per_thread_with_indexes():
+    with db.connection() as first, db.connection() as second:
+        assert first is second
+        assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        indexes = {r["name"] for r in first.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_scores_url_timestamp", "idx_scores_timestamp"} <= indexes
+
+    other = []
+    worker = threading.Thread(target=lambda: other.append(db._sqlite_connection()))
+    worker.start()
+    worker.join()
+    assert other[0] is not first
+
+
+def test_history_leaderboard_and_aggregates_run_in_sql():
+    u = "https://hist.example/"
+    db.save_scores([(u, float(r), f"2031-01-0{d}T00:00:0{i}") for d, i, r in [(1, 0, 10), (1, 1, 20), (2, 0, 30), (3, 0, 40)]])
+    db.save_scores([("https://hist.example/other", 35.0, "2031-01-02T12:00:00")])
+    db.save_score("https://hist.example/now", 99.0)
+
+    rows, cursor = db.get_score_history(u, limit=3)
+    assert [r["rank"] for r in rows] == [40.0, 30.0, 20.0] and cursor
+    more, end = db.get_score_history(u, limit=3, cursor=cursor)
+    assert [r["rank"] for r in more] == [10.0] and end is None
+
+    board, _ = db.get_leaderboard(limit=50)
+    mine = [(r["url"], r["rank"], r["audits"]) for r in board if r["url"].startswith("https://hist.example")]
+    assert mine == [("https://hist.example/now", 99.0, 1), (u, 40.0, 4), ("https://hist.example/other", 35.0, 1)]
+    first, cursor = db.get_leaderboard(limit=1)
+    second, _ = db.get_leaderboard(limit=1, cursor=cursor)
+    assert second[0]["rank"] <= first[0]["rank"] and second[0]["url"] != first[0]["url"]
+
+    stats = db.get_rank_aggregates(since="2031-01-01", until="2031-01-03")
+    assert (stats["count"], stats["min"], stats["max"], stats["p50"], stats["p90"]) == (4, 10.0, 35.0, 20.0, 35.0)
+    days = db.get_daily_aggregates(url=u, since="2031-01-01", until="2031-02-01")
+    assert [(d["day"], d["count"], d["avg"]) for d in days] == [("2031-01-01", 2, 15.0), ("2031-01-02", 1, 30.0), ("2031-01-03", 1, 40.0)]
+
+
+def test_latest_scores_rollup_is_backfilled(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(path)
+    legacy.execute("CREATE TABLE scores (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT, rank FLOAT, timestamp TEXT)")
+    legacy.executemany(
+        "INSERT INTO scores (url, rank, timestamp) VALUES (?, ?, ?)",
+        [("https://l.example/", 1.0, "2020-01-01"), ("https://l.example/", 2.0, "2020-01-02")],
+    )
+    legacy.commit()
+    legacy.close()
+
+    original = db.SQLITE_PATH
+    try:
+        db.configure(sqlite_path=path)
+        board, _ = db.get_leaderboard()
+        assert [(r["url"], r["rank"], r["audits"]) for r in board] == [("https://l.example/", 2.0, 2)]
+    finally:
+        db.configure(sqlite_path=original)
+
+
+def test_iter_scores_streams_in_batches_from_any_thread():
+    db.save_scores([(f"https://iter.example/{i}", float(i), "2034-01-01T00:00:00") for i in range(25)])
+    rows = db.iter_scores(url=None, since="2034-01-01", until="2034-01-02", batch_size=10)
+    first = next(rows)
+    rest = []
+    worker = threading.Thread(target=lambda: rest.extend(rows))
+    worker.start()
+    worker.join()
+    assert [first] + rest == sorted([first] + rest) and len(rest) == 24
+    assert first[1] == "https://iter.example/0"
+
+
+def test_rescore_reweights_history_from_stored_metrics(tmp_path):
+    original = db.SQLITE_PATH
+    try:
+        db.configure(sqlite_path=str(tmp_path / "rescore.db"))
+        u = "https://rescore.example/"
+        db.save_scores([
+            (u, 50.0, "2035-01-01T00:00:00", {"structure": 80.0, "semantic": 20.0}),
+            (u, 40.0, "2035-01-02T00:00:00", {"structure": 60.0, "semantic": 20.0}),
+            ("https://legacy.example/", 33.0, "2035-01-01T00:00:00"),
+        ])
+        db.save_page_snapshot(u, None, None, "h", {"structure": 60.0, "semantic": 20.0}, 40.0, [])
+
+        counts = db.rescore({"structure": 0.75, "semantic": 0.25}, chunk_size=2)
+        assert counts == {"scores": 2, "latest_scores": 2, "page_cache": 1, "skipped": 1}
+        rows, _ = db.get_score_history(u)
+        assert [r["rank"] for r in rows] == [50.0, 65.0]
+        board, _ = db.get_leaderboard()
+        assert {r["url"]: r["rank"] for r in board} == {u: 50.0, "https://legacy.example/": 33.0}
+        assert db.get_page_snapshot(u)["leo_rank"] == 50.0
+    finally:
+        db.configure(sqlite_path=original)
+
+
+def test_postgres_callers_wait_for_a_free_pooled_connection(monkeypatch):
+    class FakePool:
+        # Like psycopg2's ThreadedConnectionPool: getconn() fails instead of waiting when exhausted.
+        def __init__(self, size):
+            self.free, self.peak, self.lock = size, 0, threading.Lock()
+
+        def getconn(self):
+            with self.lock:
+                if not self.free:
+                    raise RuntimeError("connection pool exhausted")
+                self.free -= 1
+                self.peak = max(self.peak, 2 - self.free)
+            return type("Conn", (), {"commit": lambda self: None, "rollback": lambda self: None})()
+
+        def putconn(self, conn):
+            with self.lock:
+                self.free += 1
+
+    pool = FakePool(2)
+    monkeypatch.setattr(db, "DB_ENGINE", "postgres")
+    monkeypatch.setattr(db, "_postgres_pool", lambda: pool)
+    monkeypatch.setattr(db, "_pg_slots", threading.BoundedSemaphore(2))
+    errors = []
+
+    def borrow():
+        try:
+            with db._raw_connection():
+                threading.Event().wait(0.02)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=borrow) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == [] and pool.peak == 2 and pool.free == 2
@@ -0,0 +1,99 @@
+from leo import dedup
+from leo.agents.dedup_agent import DedupAgent
+from leo.dedup import SimHashIndex, hamming, simhash
+from leo.state import LeoState
+from leo.utils.text_utils import compute_text_stats
+
+WORDS = [f"word{i}" for i in range(400)]
+
+
+def text(*replace):
+    words = list(WORDS)
+    for index, word in replace:
+        words[index] = word
+    return " ".join(words)
+
+
+def test_simhash_index_finds_near_duplicates_within_threshold():
+    base, edited = simhash(text()), simhash(text((100, "spring")))
+    assert simhash("too short to fingerprint") is None
+    assert hamming(base, edited) <= 6
+    assert hamming(base, simhash(" ".join(f"other{i}" for i in range(400)))) > 20
+
+    now = [1000.0]
+    index = SimHashIndex(max_distance=6, ttl=60, clock=lambda: now[0])
+    index.add("https://a.com/", base, {"semantic": 71.5}, ["Tip"])
+    match = index.find(edited)
+    assert (match.url, match.metrics, match.suggestions) == ("https://a.com/", {"semantic": 71.5}, ["Tip"])
+    assert match.distance == hamming(base, edited)
+    assert index.find(edited, exclude="https://a.com/") is None
+    # Any fingerprint within the threshold shares a band with the stored one.
+    assert index.find(base ^ 0b10101010101 << 40).distance == 6
+    assert index.find(base ^ 0b1111111) is None
+
+    now[0] += 61
+    assert index.find(base) is None and len(index) == 0
+
+
+def test_dedup_agent_uses_the_fingerprint_from_the_text_stats():
+    stats = compute_text_stats(text((100, "spring")))
+    assert stats.fingerprint == f"{simhash(text((100, 'spring'))):016x}"
+    assert compute_text_stats("too short to fingerprint").fingerprint is None
+
+    index = SimHashIndex(max_distance=6)
+    index.add("https://a.com/", simhash(text()), {"semantic": 71.5}, ["Tip"])
+    # The text itself is not an input: the crawler's tokenization pass already produced the fingerprint.
+    state = DedupAgent(index=index).run(LeoState(url="https://b.com/", text_stats=stats))
+    assert (state.fingerprint, state.duplicate_of) == (stats.fingerprint, "https://a.com/")
+    assert state.metrics["semantic"] == 71.5
+
+
+def test_near_duplicate_page_reuses_semantic_and_suggestions(stub_site, monkeypatch):
+    from leo import graph
+
+    page = "<html><body><h1>Harbour</h1><p>{0}</p></body></html>"
+    site = stub_site({"/a": page.format(text()), "/b": page.format(text((100, "spring")))})
+    monkeypatch.setattr(dedup, "_index", None)
+    first = graph.run_pipeline(site.url("/a"))
+    assert first.fingerprint and first.duplicate_of is None
+
+    # A restarted process seeds the index from the fingerprints stored in page_cache.
+    monkeypatch.setattr(dedup, "_index", None)
+    scored = []
+    original = graph.SemanticAgent.score_texts
+    monkeypatch.setattr(
+        graph.SemanticAgent, "score_texts", lambda self, *args: scored.append(args) or original(self, *args)
+    )
+    second = graph.run_pipeline(site.url("/b"))
+
+    assert second.duplicate_of == site.url("/a")
+    assert second.metrics["semantic"] == first.metrics["semantic"]
+    assert second.suggestions == first.suggestions
+    assert scored == []
+    # Duplicates are not indexed themselves, so a re-audit of /a is not matched against /b.
+    assert graph.run_pipeline(site.url("/a"), revalidate=False).duplicate_of is None
+
+
+def test_simhash_index_agrees_with_a_linear_scan_across_merges_and_evictions():
+    import random
+
+    rng = random.Random(7)
+    index = SimHashIndex(max_distance=4, ttl=60, max_entries=300, clock=lambda: 0.0, merge_every=16)
+    stored = {}
+    for i in range(1000):
+        url = f"https://a.com/{rng.randrange(400)}"  # re-adding a URL replaces its entry
+        stored.pop(url, None)
+        stored[url] = rng.getrandbits(64)
+        index.add(url, stored[url], {}, [])
+        if len(stored) > 300:
+            stored.pop(next(iter(stored)))
+    assert len(index) == len(stored)
+
+    for url, fingerprint in rng.sample(sorted(stored.items()), 100):
+        query = fingerprint ^ sum(1 << bit for bit in rng.sample(range(64), rng.randrange(6)))
+        nearest = min(hamming(fp, query) for fp in stored.values())
+        match = index.find(query)
+        if nearest <= 4:
+            assert match.distance == hamming(stored[match.url], query) == nearest
+        else:
+            assert match is None
@@ -0,0 +1,75 @@
+import threading
+
+import numpy as np
+import pytest
+
+from leo.agents.semantic_agent import SemanticAgent
+from leo.embeddings import (
+    BatchingEmbeddingProvider,
+    CachedEmbeddingProvider,
+    EmbeddingCache,
+    EmbeddingProvider,
+    FakeEmbeddingProvider,
+    FallbackEmbeddingProvider,
+    LocalEmbeddingProvider,
+)
+
+
+def test_cache_serves_repeat_audits_without_requests(tmp_path):
+    fake = FakeEmbeddingProvider()
+    agent = SemanticAgent(CachedEmbeddingProvider(fake, EmbeddingCache(str(tmp_path / "emb.db"))))
+    text = "Cloud data platform for AI teams. " * 60
+
+    first = agent.score_texts([text])
+    assert len(fake.requests) == 1
+    # Duplicate chunks inside one request are embedded once.
+    assert len(fake.requests[0]) == len(set(fake.requests[0]))
+    assert agent.score_texts([text]) == first
+    assert len(fake.requests) == 1
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "emb.db"), max_bytes=4 * 64)  # four 16-dim float32 vectors
+    vector = np.ones(16)
+    cache.put_many({"a": vector, "b": vector, "c": vector})
+    cache.get_many(["a"])
+    cache.put_many({"d": vector, "e": vector})
+    assert set(cache.get_many(["a", "b", "c", "d", "e"])) == {"a", "d", "e"}
+    assert cache.total_bytes == 3 * 64
+
+
+def test_concurrent_calls_are_coalesced_into_one_request():
+    fake = FakeEmbeddingProvider()
+    provider = BatchingEmbeddingProvider(fake, max_wait=0.2)
+    results = {}
+
+    def worker(i):
+        results[i] = provider.embed([f"page {i} chunk a", f"page {i} chunk b"])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(fake.requests) == 1 and len(fake.requests[0]) == 8
+    for i, vectors in results.items():
+        assert np.allclose(vectors, fake.embed([f"page {i} chunk a", f"page {i} chunk b"]))
+
+
+def test_offline_provider_falls_back_to_local_embeddings():
+    primary = FakeEmbeddingProvider(fail=True)
+    provider = FallbackEmbeddingProvider(primary, LocalEmbeddingProvider())
+    assert provider.embed(["a", "b"]).shape == (2, 64)
+    assert provider.name == "local-64"
+    primary.fail = False
+    provider.embed(["a"])
+    assert provider.name == "fake-16"
+
+
+def test_incomplete_provider_fails_at_construction():
+    class NoEmbed(EmbeddingProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        NoEmbed()
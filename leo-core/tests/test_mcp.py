@@ -0,0 +1,87 @@
+import asyncio
+import json
+import time
+
+from leo.mcp.server import handle_request
+
+PAGE = "<html><head><title>MCP</title></head><body><h1>Hi</h1><p>data cloud</p></body></html>"
+
+
+async def _exchange(lines, expected):
+    server = await asyncio.start_server(handle_request, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"".join(json.dumps(line).encode() + b"\n" for line in lines))
+        await writer.drain()
+        responses = [json.loads(await reader.readline()) for _ in range(expected)]
+        writer.close()
+        return responses
+
+
+def test_mcp_pipelines_requests_and_replies_out_of_order(stub_site):
+    import leo.graph  # noqa: F401  (keep first-import cost out of the timing)
+
+    site = stub_site({"/a": PAGE, "/b": PAGE}, delay=0.5)
+    requests = [
+        {"id": 1, "method": "leo_audit", "params": {"url": site.url("/a")}},
+        {"id": 2, "method": "leo_audit", "params": {"url": site.url("/b")}},
+        {"id": "stats", "method": "leo_stats"},
+        {"id": 4, "method": "nope"},
+    ]
+
+    started = time.perf_counter()
+    responses = asyncio.run(_exchange(requests, expected=4))
+    elapsed = time.perf_counter() - started
+
+    # Fast requests are answered while the audits are still running.
+    assert {r["id"] for r in responses[:2]} == {"stats", 4}
+    assert responses[1 if responses[0]["id"] == "stats" else 0]["error"] == "Unknown method nope"
+    audits = {r["id"]: r["result"] for r in responses[2:]}
+    assert audits[1]["url"] == site.url("/a") and audits[2]["url"] == site.url("/b")
+    # Both audits ran at the same time (sequentially they need at least 2 * 0.5s).
+    assert elapsed < 0.9
+
+
+def test_mcp_requests_without_id_get_bare_results_in_order(stub_site):
+    site = stub_site({"/slow": PAGE}, delay=0.3)
+    requests = [
+        {"method": "leo_audit", "params": {"url": site.url("/slow")}},
+        {"method": "leo_stats"},
+        {"method": "nope"},
+    ]
+    audit, stats, unknown = asyncio.run(_exchange(requests, expected=3))
+    assert audit["url"] == site.url("/slow")
+    assert "id" not in stats and "leo_stage_duration_seconds" in stats
+    assert unknown == {"error": "Unknown method nope"}
+
+
+def test_mcp_stream_mode_sends_stage_events_then_result(stub_site):
+    site = stub_site({"/s": PAGE})
+    request = {"id": 7, "method": "leo_audit", "stream": True, "params": {"url": site.url("/s")}}
+    responses = asyncio.run(_exchange([request], expected=8))
+
+    assert [r["event"]["stage"] for r in responses[:7]][0] == "crawler"
+    assert all(r["id"] == 7 for r in responses)
+    assert responses[-1]["result"]["url"] == site.url("/s")
+
+
+def test_mcp_stream_reports_failed_audits(stub_site):
+    site = stub_site({})
+    request = {"id": 9, "method": "leo_audit", "stream": True, "params": {"url": site.url("/gone")}}
+    *events, response = asyncio.run(_exchange([request], expected=3))
+    # The audit stops at the failed fetch: no analysis agent runs on the empty page.
+    assert [e["event"].get("stage") for e in events] == ["crawler", None]
+    assert events[-1]["event"] == {"event": "failed", "error": response["error"]}
+    assert response["id"] == 9 and "404" in response["error"]
+
+
+def test_mcp_audit_joins_the_job_already_auditing_the_url(stub_site):
+    from leo.jobs import get_job_manager
+
+    site = stub_site({"/shared": PAGE}, delay=0.3)
+    url = site.url("/shared")
+    job = get_job_manager().submit(url)  # e.g. a concurrent GET /audit
+    (response,) = asyncio.run(_exchange([{"id": 1, "method": "leo_audit", "params": {"url": url}}], expected=1))
+    assert response["result"]["leo_rank"] == job.future.result().leo_rank
+    assert [path for path, _ in site.hits] == ["/shared"]
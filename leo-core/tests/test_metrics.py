@@ -0,0 +1,54 @@
+import numpy as np
+
+from leo.agents.semantic_agent import SemanticAgent
+from leo.utils.metrics_utils import average_cosine_similarity, chunk_text, cohesion_scores, embed_texts
+from leo.utils.text_utils import KeywordMatcher, compute_text_stats
+
+
+def _pairwise_mean(embeddings):
+    unit = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    sims = unit @ unit.T
+    return sims[~np.eye(len(unit), dtype=bool)].mean()
+
+
+def test_embed_texts_matches_per_byte_definition():
+    chunks = ["héllo wörld", "data cloud", ""]
+    vectors = embed_texts(chunks, dimensions=8, block_bytes=4)
+    expected = np.zeros((3, 8))
+    for row, chunk in enumerate(chunks):
+        for index, byte in enumerate(chunk.encode("utf-8")):
+            expected[row, index % 8] += (byte % 32) / 31.0
+        norm = np.linalg.norm(expected[row])
+        if norm:
+            expected[row] /= norm
+    assert np.allclose(vectors, expected)
+
+
+def test_cohesion_is_linear_time_pairwise_mean():
+    rng = np.random.default_rng(0)
+    a, b = rng.random((12, 16)), rng.random((5, 16))
+    assert np.isclose(average_cosine_similarity(a), _pairwise_mean(a))
+    scores = cohesion_scores(np.vstack([a, b[:1], b]), [12, 0, 1, 5])
+    assert np.allclose(scores, [_pairwise_mean(a), 0.0, 1.0, _pairwise_mean(b)])
+
+
+def test_semantic_batch_matches_single_page_runs():
+    texts = ["AI data cloud platform. " * 200, "Gardening tips for spring. " * 150, "short ai"]
+    agent = SemanticAgent()
+    batch = agent.score_texts(texts)
+    assert batch == [agent.score_texts([t])[0] for t in texts]
+    assert len(chunk_text(texts[0])) > 1 and 0 < batch[0] <= 100
+
+
+def test_text_stats_match_whole_word_keywords_and_phrases():
+    matcher = KeywordMatcher(["AI", "machine learning", "learning", "new york city", "york", "a b a"])
+    stats = compute_text_stats("  AI: maintain Machine Learning in New York City; a b a b a  ", matcher)
+    assert stats.keywords == {"ai": 1, "machine learning": 1, "learning": 1, "new york city": 1, "york": 1, "a b a": 2}
+    assert (stats.tokens, stats.keyword_hits, stats.characters) == (13, 7, 57)
+    words = "ai maintain machine learning in new york city a b a b a".split()
+    assert stats.avg_token_length == round(sum(map(len, words)) / 13, 4)
+
+    # "ai" inside "maintain" or "said" is no longer a keyword hit.
+    agent = SemanticAgent()
+    assert compute_text_stats("said maintain").keyword_hits == 0
+    assert agent.score_texts(["short ai"]) == [agent._fallback_score(compute_text_stats("short ai"))] == [27.5]
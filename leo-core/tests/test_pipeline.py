@@ -1,3 +1,5 @@
+import pytest
+
 from leo.state import LeoState
 from leo.agents.scoring_agent import ScoringAgent
 
@@ -5,3 +7,149 @@ def test_scoring_computes_rank():
     s = LeoState(url="https://example.com", metrics={"structure": 80.0, "semantic": 60.0})
     s = ScoringAgent().run(s)
     assert 0 <= s.leo_rank <= 100
+
+
+def test_metrics_missing_from_the_weights_keep_their_default_weight(tmp_path):
+    from leo.agents.scoring_agent import DEFAULT_WEIGHTS, coefficients
+
+    partial = tmp_path / "weights.yml"
+    partial.write_text("weights:\n  structure: 0.4\n  semantic: 0.4\n")
+    assert coefficients({"structure": 0.4, "semantic": 0.4}) == coefficients(DEFAULT_WEIGHTS)
+    assert coefficients(DEFAULT_WEIGHTS)["retrieval"] == 0.2
+    metrics = {"structure": 80.0, "semantic": 60.0, "retrieval": 10.0}
+    rank = ScoringAgent(str(partial)).run(LeoState(url="https://example.com", metrics=metrics)).leo_rank
+    assert rank == round(0.4 * 80 + 0.4 * 60 + 0.2 * 10, 2)
+
+
+def test_unchanged_page_reuses_stored_analysis(stub_site, monkeypatch):
+    from leo import graph
+
+    page = "<html><head><meta name='a'></head><body><h1>T</h1><p>data cloud ai</p></body></html>"
+
+    def etag_route(handler):
+        if handler.headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, ""
+        return 200, {"ETag": '"v1"'}, page
+
+    site = stub_site({"/etag": etag_route, "/plain": page})
+    first = {path: graph.run_pipeline(site.url(path)) for path in ("/etag", "/plain")}
+
+    calls = []
+    monkeypatch.setattr(graph.StructureAgent, "run", lambda self, s: calls.append(s) or s)
+    for path in ("/etag", "/plain"):
+        again = graph.run_pipeline(site.url(path))
+        assert again.not_modified
+        assert again.leo_rank == first[path].leo_rank
+        assert again.metrics == first[path].metrics
+    assert calls == []
+    assert site.hits[-2][1].get("If-None-Match") == '"v1"'
+
+
+def test_failed_reaudit_leaves_the_leaderboard_row_unchanged(stub_site):
+    from leo import db, graph
+
+    page = "<html><body><h1>Harbour</h1><p>data cloud ai</p></body></html>"
+    site = stub_site({"/flaky": page})
+    url = site.url("/flaky")
+    first = graph.run_pipeline(url)
+    before = [row for row in db.get_leaderboard(limit=1000)[0] if row["url"] == url]
+    history = db.get_score_history(url)
+
+    site.routes["/flaky"] = (404, {}, "gone")
+    failed = graph.run_pipeline(url, revalidate=False)
+
+    assert failed.error
+    assert [row for row in db.get_leaderboard(limit=1000)[0] if row["url"] == url] == before
+    assert before[0]["rank"] == first.leo_rank and before[0]["audits"] == 1
+    assert db.get_score_history(url) == history
+
+
+class _SleepAgent:
+    def __init__(self, name, inputs, outputs, delay=0.2):
+        self.name, self.inputs, self.outputs, self.delay = name, inputs, outputs, delay
+
+    def run(self, state):
+        import time
+
+        time.sleep(self.delay)
+        state.metrics[self.name] = 1.0
+        return state
+
+
+def test_graph_runs_independent_agents_concurrently():
+    import time
+
+    from leo.graph import PipelineGraph
+
+    graph = PipelineGraph([
+        _SleepAgent("fetch", (), ("text",), delay=0.0),
+        _SleepAgent("left", ("text",), ("a",)),
+        _SleepAgent("right", ("text",), ("b",)),
+        _SleepAgent("join", ("a", "b"), ("rank",), delay=0.0),
+    ])
+    assert graph.dependencies["join"] == {"left", "right"}
+
+    started = time.perf_counter()
+    state = graph.execute(LeoState(url="https://example.com"))
+    assert time.perf_counter() - started < 0.35
+    assert set(state.metrics) == {"fetch", "left", "right", "join"}
+    assert set(state.timings) == set(state.metrics) and state.timings["left"] >= 0.2
+
+    with pytest.raises(ValueError):
+        PipelineGraph([_SleepAgent("x", ("b",), ("a",)), _SleepAgent("y", ("a",), ("b",))])
+
+
+def test_lean_run_releases_raw_artifacts_after_last_consumer(stub_site):
+    from leo import graph
+
+    page = "<html><head><meta name='a'></head><body><h1>T</h1>" + "<p>data cloud ai platform</p>" * 500 + "</body></html>"
+    site = stub_site({"/lean": page, "/full": page})
+    seen = {}
+
+    def on_stage(name, state):
+        seen[name] = (state.html is not None, state.text is not None)
+
+    lean = graph.run_pipeline(site.url("/lean"), on_stage=on_stage, lean=True)
+    full = graph.run_pipeline(site.url("/full"))
+
+    # Only the structure agent reads the HTML and only the semantic agent reads the text.
+    assert seen["crawler"] == (True, True)
+    assert not any(seen["scoring"]) and not any(seen["advisor"])
+    assert lean.html is None and lean.text is None and lean.document.text == ""
+    assert lean.document.headings == 1 and lean.validators.content_hash
+    assert lean.metrics == full.metrics and lean.leo_rank == full.leo_rank
+    assert full.html == page and full.text
+    assert lean.peak_bytes >= len(page) and lean.peak_bytes == full.peak_bytes
+
+
+def test_requested_outputs_run_only_the_agents_they_need(stub_site, monkeypatch):
+    from leo import db, graph
+
+    page = "<html><head><meta name='a'></head><body><h1>T</h1><a href='/x'>x</a><p>data cloud ai</p></body></html>"
+    site = stub_site({"/only": page})
+    monkeypatch.setattr(graph.AdvisorAgent, "run", lambda self, s: (_ for _ in ()).throw(AssertionError("advisor ran")))
+
+    state = graph.run_pipeline(
+        site.url("/only"), outputs=graph.resolve_outputs(["structure", "retrieval"], suggestions=False), persist=False
+    )
+    assert set(state.timings) == {"crawler", "structure", "retrieval"}
+    assert set(state.metrics) == {"structure", "retrieval"} and state.metrics["retrieval"] > 0
+    assert db.get_score_history(site.url("/only"))[0] == [] and db.get_page_snapshot(site.url("/only")) is None
+
+    assert graph.resolve_outputs() is None
+    with pytest.raises(ValueError):
+        graph.resolve_outputs(["speed"])
+
+    class WordCountAgent:
+        name, inputs, outputs = "words", ("text",), ("words",)
+
+        def run(self, state):
+            state.metrics["words"] = float(len(state.text.split()))
+            return state
+
+    graph.register_agent("words", lambda **_: WordCountAgent())
+    try:
+        state = graph.run_pipeline(site.url("/only"), outputs={"words"}, persist=False)
+        assert set(state.timings) == {"crawler", "words"} and state.metrics == {"words": 5.0}
+    finally:
+        graph._registry.pop("words")
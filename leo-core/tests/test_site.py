@@ -0,0 +1,48 @@
+from leo.site import SeenSet, crawl_site
+
+HOME = """<html><head><title>Home</title><meta name='d'></head><body><h1>Home</h1><p>data cloud</p>
+<a href='/about'>about</a><a href='/private/x'>secret</a><a href='https://elsewhere.example/'>out</a>
+<a href='/about?utm_source=nav#team'>about again</a><a href='/logo.png'>logo</a></body></html>"""
+PAGE = "<html><head><title>{0}</title></head><body><h1>{0}</h1><p>ai search content</p>{1}</body></html>"
+
+
+def test_site_crawl_uses_sitemap_links_and_robots(stub_site):
+    site = stub_site({})
+    site.routes.update({
+        "/": HOME,
+        "/robots.txt": (200, {"Content-Type": "text/plain"}, f"User-agent: *\nDisallow: /private\nSitemap: {site.url('/sitemap.xml')}\n"),
+        "/sitemap.xml": (200, {"Content-Type": "application/xml"}, (
+            "<?xml version='1.0'?><urlset xmlns='http://www.sitemaps.org/schemas/sitemap/0.9'>"
+            f"<url><loc>{site.url('/docs')}</loc></url><url><loc>{site.url('/private/y')}</loc></url></urlset>"
+        )),
+        "/about": PAGE.format("About", "<a href='/team'>team</a><a href='/'>home</a><a href='/gone'>broken</a>"),
+        "/docs": PAGE.format("Docs", ""),
+        "/team": PAGE.format("Team", ""),
+    })
+
+    pages = []
+    report = crawl_site(site.url("/"), max_pages=20, concurrency=2, delay=0, on_page=pages.append)
+
+    audited = sorted(p.url.replace(site.base_url, "") for p in pages)
+    assert audited == ["/", "/about", "/docs", "/gone", "/team"]
+    assert report.pages == 5 and report.failed == 1 and report.blocked == 2
+    assert not any(path.startswith("/private") for path, _ in site.hits)
+    assert [path for path, _ in site.hits].count("/robots.txt") == 1
+    # The broken link counts as failed, not as a zero-rank page.
+    scored = [p for p in pages if not p.error]
+    assert report.leo_rank == round(sum(p.leo_rank for p in scored) / 4, 2)
+    assert report.best[0][1] >= report.worst[0][1]
+    assert all("/gone" not in url for url, _ in report.worst)
+
+
+def test_site_crawl_respects_page_budget(stub_site):
+    routes = {f"/p{i}": PAGE.format(i, f"<a href='/p{i + 1}'>next</a>") for i in range(10)}
+    site = stub_site(routes)
+    report = crawl_site(site.url("/p0"), max_pages=3, max_depth=10, delay=0, use_sitemap=False)
+    assert report.pages == 3
+
+
+def test_seen_set_dedupes_compactly():
+    seen = SeenSet()
+    assert seen.add("https://a.example/") and not seen.add("https://a.example/")
+    assert "https://a.example/" in seen and len(seen) == 1